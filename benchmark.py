@@ -0,0 +1,133 @@
+import sys
+import os
+import json
+import logging
+import argparse
+
+from src.backends import BACKENDS
+from src.benchmark import (
+    LADDER,
+    QUICK_LADDER,
+    check_backends,
+    compare,
+    describe,
+    graph_name,
+    run_benchmarks,
+)
+
+logging.basicConfig(level=os.environ.get("LOGLEVEL", "INFO"))
+
+parser = argparse.ArgumentParser(
+    description="Benchmark the removal methods and centrality measures",
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+)
+parser.add_argument(
+    "-o", type=str, default=None, help="write the results to this JSON file"
+)
+parser.add_argument(
+    "--input",
+    type=str,
+    default=None,
+    help="read the results from this JSON file instead of running the benchmarks",
+)
+parser.add_argument(
+    "--compare",
+    type=str,
+    default=None,
+    help="flag cases that are slower than in this stored JSON file, exits with 1 on regressions",
+)
+parser.add_argument(
+    "--threshold",
+    type=float,
+    default=0.2,
+    help="relative slowdown that counts as regression",
+)
+parser.add_argument(
+    "--repeat", type=int, default=3, help="number of timed calls per case"
+)
+parser.add_argument(
+    "--quick", action="store_true", help="only benchmark a few small graphs"
+)
+parser.add_argument(
+    "--cases",
+    nargs="+",
+    choices=["removal", "measure"],
+    default=["removal", "measure"],
+    help="what to benchmark",
+)
+parser.add_argument(
+    "--sparse",
+    action="store_true",
+    help="benchmark the sparse pagerank and eigenvector centrality",
+)
+parser.add_argument(
+    "--backends",
+    nargs="+",
+    choices=list(BACKENDS),
+    default=[],
+    help="also benchmark the measures of these backends (if installed)",
+)
+parser.add_argument(
+    "--check-backends",
+    action="store_true",
+    help="instead of benchmarking, compare the installed backends with the default "
+    "implementation, exits with 1 on inconsistencies",
+)
+parser.add_argument(
+    "--tol",
+    type=float,
+    default=1.0e-02,
+    help="largest consistent deviation of a backend, relative to the largest value",
+)
+
+args = parser.parse_args()
+
+if args.check_backends:
+    inconsistent = 0
+    for record in check_backends(QUICK_LADDER if args.quick else LADDER, args.tol):
+        message = (
+            f"{record['graph']} {record['measure']}@{record['backend']}: "
+            f"deviation {record['error']:.3g}"
+        )
+        if record["consistent"]:
+            logging.info(message)
+        else:
+            logging.error(f"{message} exceeds {args.tol}")
+            inconsistent += 1
+    sys.exit(1 if inconsistent else 0)
+
+if args.input is not None:
+    with open(args.input, "r") as f:
+        results = json.loads(f.read())
+else:
+    ladder = QUICK_LADDER if args.quick else LADDER
+    logging.info(
+        f"benchmarking {', '.join(args.cases)} on {', '.join(graph_name(*graph) for graph in ladder)}"
+    )
+    results = run_benchmarks(
+        ladder,
+        repeat=args.repeat,
+        sparse=args.sparse,
+        cases=tuple(args.cases),
+        backends=tuple(args.backends),
+    )
+    if args.o is not None:
+        with open(args.o, "w") as f:
+            f.write(json.dumps(results, indent=1))
+        logging.info(f"wrote results to {args.o}")
+
+for record in results["results"]:
+    logging.info(f"{describe(record)}: {record['seconds']:.6f} s")
+
+if args.compare is not None:
+    with open(args.compare, "r") as f:
+        baseline = json.loads(f.read())
+    regressions = compare(results, baseline, args.threshold)
+    for record in regressions:
+        logging.error(
+            f"regression: {describe(record)} took {record['seconds']:.6f} s "
+            f"instead of {record['baseline']:.6f} s ({record['ratio']:.2f}x)"
+        )
+    if regressions:
+        sys.exit(1)
+    logging.info(f"no regressions compared to {args.compare}")
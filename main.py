@@ -1,13 +1,16 @@
 import sys
 import os
-from src.centrality import Centralities
-from src.correlation import Correlations
-from src.methods import apply_edge_removal
-from src.networks import get_graph
+import json
 import logging
 import argparse
 
-from src.utils import get_time, StopClock
+from src.backends import BACKENDS, DEFAULT_BACKEND
+from src.centrality import MEASURES
+from src.checkpoint import Manifest
+from src.results import HOST, CsvSink, SqliteSink
+from src.simulation import OUT_DIR, Simulation
+from src.spans import configure
+from src.utils import get_time
 
 logging.basicConfig(level=os.environ.get("LOGLEVEL", "INFO"))
 networks = [
@@ -27,7 +30,9 @@ networks = [
     "iMM904-gemtracted-MetabolicNetwork.csv",
     "CPDB_Yeast_PPI.csv",
 ]
-HOST = os.uname()[1]
+methods = range(0, 5)
+percentages = range(0, 100, 10)
+CACHE_DIR = "cache"
 
 parser = argparse.ArgumentParser(
     description="Robustness of centrality simulator",
@@ -37,71 +42,247 @@ parser = argparse.ArgumentParser(
 
 parser.add_argument("-i", type=int, default=1, help="number of repeated iterations")
 parser.add_argument(
-    "-m", type=int, required=True, choices=range(0, 5), help="removal method"
+    "-m", type=int, choices=methods, help="removal method (required without --sweep)"
 )
 parser.add_argument(
-    "-p", type=int, default=0, choices=range(0, 100, 10), help="removal percentage"
+    "-p", type=int, default=0, choices=percentages, help="removal percentage"
 )
-parser.add_argument("-n", required=True, choices=networks, help="base network")
-
-
-args = parser.parse_args()
-
-network: str = args.n
-percentage: int = int(args.p)
-iterations: int = int(args.i)
-method: int = int(args.m)
-OUT_DIR = "processed"
-
-if not os.path.isdir(OUT_DIR):
-    logging.info(f"creating output dir '{OUT_DIR}' as it does not exist")
-    os.mkdir(OUT_DIR)
-
-logging.info(
-    f"will run {iterations} iterations on {network} while removing {percentage}% edges using method {method}"
+parser.add_argument(
+    "-n", choices=networks, help="base network (required without --sweep)"
+)
+parser.add_argument(
+    "--sweep",
+    type=str,
+    default=None,
+    help="JSON file with lists of 'networks', 'methods' and 'percentages' and a number of 'iterations' "
+    "to run in one process, missing entries are taken from -n, -m, -p and -i",
+)
+parser.add_argument(
+    "--nested",
+    action="store_true",
+    help="remove the edges of all percentages of an iteration in one order, every percentage removes a prefix of it",
+)
+parser.add_argument(
+    "--seed",
+    type=int,
+    default=None,
+    help="derive the random seed of every iteration from this seed, random seeds if not given",
+)
+parser.add_argument(
+    "--network-seed",
+    type=int,
+    default=None,
+    help="the seed of generated networks, which are then cached with their base centrality",
+)
+parser.add_argument(
+    "--manifest",
+    type=str,
+    default=None,
+    help="record completed iterations in this file and skip the ones it lists, to resume an interrupted run",
+)
+parser.add_argument(
+    "--sink",
+    choices=["csv", "sqlite"],
+    default="csv",
+    help="store the correlations in CSV files per run or in an SQLite database",
+)
+parser.add_argument(
+    "--database",
+    type=str,
+    default=f"{OUT_DIR}/results.sqlite",
+    help="the SQLite database of --sink sqlite",
+)
+parser.add_argument(
+    "--spans",
+    action="store_true",
+    help="write nested timing spans of every stage (load, removal, measures, save, correlation) "
+    "to a JSON lines file next to the results",
+)
+parser.add_argument(
+    "--profile",
+    nargs="+",
+    default=[],
+    help="run these stages (span names, e.g. 'subgraph' or 'save') under cProfile, implies --spans",
+)
+parser.add_argument(
+    "--trace-memory",
+    nargs="+",
+    default=[],
+    help="store the peak memory of these stages (span names) with their spans, implies --spans",
+)
+parser.add_argument(
+    "--processes",
+    type=int,
+    default=1,
+    help="number of processes running iterations in parallel (each using -w workers)",
+)
+parser.add_argument(
+    "-w",
+    type=int,
+    default=1,
+    help="number of worker processes for calculating centralities",
+)
+parser.add_argument(
+    "--sparse",
+    action="store_true",
+    help="compute pagerank and eigenvector centrality on a sparse adjacency matrix",
+)
+parser.add_argument(
+    "--tol",
+    type=float,
+    default=1.0e-06,
+    help="convergence tolerance of the sparse pagerank and eigenvector centrality",
+)
+parser.add_argument(
+    "--warm-start",
+    action="store_true",
+    help="start pagerank and eigenvector centrality of shrunk graphs from the base centrality",
+)
+parser.add_argument(
+    "--edge-array",
+    action="store_true",
+    help="remove edges by masking an integer edge array instead of copying the graph",
+)
+parser.add_argument(
+    "--compact",
+    action="store_true",
+    help="hold graphs as integer indexed arrays instead of networkx graphs, implies --edge-array",
+)
+parser.add_argument(
+    "--no-cache",
+    action="store_true",
+    help=f"do not cache parsed network files in '{CACHE_DIR}'",
+)
+parser.add_argument(
+    "--cache-hash",
+    action="store_true",
+    help="identify cached network files by their content hash instead of size and modification time",
+)
+parser.add_argument(
+    "--binary",
+    action="store_true",
+    help="store centralities in a columnar binary format instead of JSON",
+)
+parser.add_argument(
+    "--float32",
+    action="store_true",
+    help="quantize binary centralities to single precision",
+)
+parser.add_argument(
+    "--compress",
+    action="store_true",
+    help="compress binary centralities (disables memory mapping)",
+)
+parser.add_argument(
+    "--kendall",
+    action="store_true",
+    help="also store Kendall's tau in {out_file}--kendall.csv",
+)
+parser.add_argument(
+    "--measures",
+    nargs="+",
+    choices=MEASURES,
+    default=list(MEASURES),
+    help="calculate and correlate only these measures, the others are stored as NaN",
+)
+parser.add_argument(
+    "--top-k",
+    type=int,
+    default=None,
+    help="also store the overlap of the top k nodes in {out_file}--top{k}.csv",
+)
+parser.add_argument(
+    "--approx",
+    type=float,
+    default=None,
+    help="approximate betweenness and load from sampled pivots with this absolute error",
+)
+parser.add_argument(
+    "--backends",
+    nargs="+",
+    choices=[*BACKENDS, DEFAULT_BACKEND],
+    default=[DEFAULT_BACKEND],
+    help="compute every measure with the first installed backend implementing it",
+)
+parser.add_argument(
+    "--subgraph-tol",
+    type=float,
+    default=None,
+    help="estimate subgraph centrality by Lanczos quadrature with this relative error (default: exact)",
+)
+parser.add_argument(
+    "--confidence",
+    type=float,
+    default=0.95,
+    help="confidence of the approximation error bound",
 )
 
 
-g, network_random = get_graph(network)
-
-
-base_centrality_file: str = f"{OUT_DIR}/{network}--{0}.json"
+args = parser.parse_args()
+if args.approx is not None and args.approx <= 0:
+    parser.error("--approx must be a positive error")
+if not 0 < args.confidence < 1:
+    parser.error("--confidence must lie strictly between 0 and 1")
+if args.top_k is not None and args.top_k < 1:
+    parser.error("--top-k must be a positive number of nodes")
 
-base_centrality = Centralities()
+grid = {
+    "networks": [args.n],
+    "methods": [args.m],
+    "percentages": [args.p],
+    "iterations": args.i,
+}
+if args.sweep is not None:
+    with open(args.sweep, "r") as f:
+        grid.update(json.loads(f.read()))
 
-if os.path.isfile(base_centrality_file):
-    logging.info(f"reading base centrality from file {base_centrality_file}")
-    base_centrality.setup(base_centrality_file)
-else:
-    logging.info(f"calculating base centrality")
-    base_centrality.calc(g.copy())
-    if network_random:
-        tmp_base_centrality_file = f"{base_centrality_file}--basefor--{percentage}--method-{method}--{HOST}--{get_time()}"
-        base_centrality.save(tmp_base_centrality_file)
-        logging.info(
-            f"writing temporary base centrality to file {tmp_base_centrality_file}"
-        )
-    else:
-        base_centrality.save(base_centrality_file)
-        logging.info(f"writing base centrality to file {base_centrality_file}")
+choices = {"networks": networks, "methods": methods, "percentages": percentages}
+for key, allowed in choices.items():
+    for value in grid[key]:
+        if value is None:
+            parser.error(f"-{key[0]} is required without a sweep file listing {key}")
+        if value not in allowed:
+            logging.error(f"invalid {key[:-1]} {value} in sweep file {args.sweep}")
+            sys.exit(1)
 
+if args.spans or args.profile or args.trace_memory:
+    os.makedirs(OUT_DIR, exist_ok=True)
+    spans_file = f"{OUT_DIR}/spans--{HOST}--{get_time()}.jsonl"
+    configure(spans_file, args.profile, args.trace_memory)
+    logging.info(f"writing timing spans to {spans_file}")
 
-out_file = f"{OUT_DIR}/{network}--{percentage}--method-{method}--{HOST}"
-num_edges_to_remove = int(percentage / 100 * g.number_of_edges())
-logging.info(
-    f"going to remove {num_edges_to_remove} in every iteration -- writing to {out_file}--DATE.json"
+sink = SqliteSink(args.database) if args.sink == "sqlite" else CsvSink(OUT_DIR)
+simulation = Simulation(
+    calc_options={
+        "workers": int(args.w),
+        "sparse": args.sparse,
+        "tol": float(args.tol),
+        "error": args.approx,
+        "confidence": float(args.confidence),
+        "measures": tuple(args.measures),
+        "subgraph_tol": args.subgraph_tol,
+        "backends": tuple(args.backends),
+    },
+    save_options={
+        "binary": args.binary,
+        "float32": args.float32,
+        "compress": args.compress,
+    },
+    warm_start=args.warm_start,
+    edge_array=args.edge_array,
+    kendall=args.kendall,
+    top_k=args.top_k,
+    cache_dir=None if args.no_cache else CACHE_DIR,
+    cache_hash=args.cache_hash,
+    processes=int(args.processes),
+    nested=args.nested,
+    seed=args.seed,
+    network_seed=args.network_seed,
+    manifest=None if args.manifest is None else Manifest(args.manifest),
+    sink=sink,
+    compact=args.compact,
 )
-
-for iteration in range(iterations):
-    logging.info(f"iteration {iteration} {get_time()}")
-    stop_clock = StopClock()
-    g_copy = apply_edge_removal(g, num_edges_to_remove, method)
-    logging.info(f"  got shrunk graph {stop_clock.stop()}")
-    current_centrality = Centralities()
-    current_centrality.calc(g_copy)
-    current_centrality.save(f"{out_file}--{get_time()}.json")
-    logging.info(f"  calculated and saved centralities {stop_clock.stop()}")
-
-    correlations = Correlations(base_centrality, current_centrality, g)
-    correlations.save(f"{out_file}.csv", network, percentage, method)
-    logging.info(f"  correlations done and saved {stop_clock.stop()}")
+simulation.sweep(
+    grid["networks"], grid["methods"], grid["percentages"], int(grid["iterations"])
+)
+sink.close()
@@ -0,0 +1,198 @@
+import importlib.util
+import logging
+import weakref
+from typing import Callable
+
+import networkx as nx
+import numpy as np
+
+from src.graph import CompactGraph
+from src.spectral import (
+    csr_adjacency,
+    eigenvector_power,
+    pagerank_power,
+    subgraph_dense,
+)
+
+# the implementation of `Centralities.calc`: networkx and the shared
+# shortest path sweep of `src.paths`, every other backend falls back to it
+DEFAULT_BACKEND = "networkx"
+
+
+class Backend:
+    """
+    an alternative implementation of some measures, on its own representation
+    of the graph
+
+    the conversion of a graph is cached as long as the graph lives and its
+    number of edges does not change (graphs are only ever shrunk)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        module: str | None,
+        convert: Callable[[nx.Graph | CompactGraph], object],
+        measures: dict[str, Callable[[object], dict]],
+    ):
+        """
+        :param name: the name of the backend, e.g. `igraph`
+        :param module: the module the backend needs, `None` if always available
+        :param convert: builds the representation of a graph
+        :param measures: compute a measure on the representation, keyed by node label
+        """
+        self.name = name
+        self.module = module
+        self.convert = convert
+        self.measures = measures
+        self.conversions = weakref.WeakKeyDictionary()
+
+    def available(self) -> bool:
+        return self.module is None or importlib.util.find_spec(self.module) is not None
+
+    def converted(self, g: nx.Graph | CompactGraph) -> object:
+        cached = self.conversions.get(g)
+        if cached is None or cached[0] != g.number_of_edges():
+            cached = (g.number_of_edges(), self.convert(g))
+            self.conversions[g] = cached
+        return cached[1]
+
+    def compute(self, measure: str, g: nx.Graph | CompactGraph) -> dict:
+        return self.measures[measure](self.converted(g))
+
+
+def _scipy_pagerank(converted: tuple) -> dict:
+    nodes, a = converted
+    return dict(zip(nodes, pagerank_power(a)[0].tolist()))
+
+
+def _scipy_eigenvector(converted: tuple) -> dict:
+    nodes, a = converted
+    return dict(zip(nodes, eigenvector_power(a)[0].tolist()))
+
+
+def _scipy_subgraph(converted: tuple) -> dict:
+    nodes, a = converted
+    return dict(zip(nodes, subgraph_dense(a).tolist()))
+
+
+def _to_igraph(g: nx.Graph | CompactGraph) -> tuple:
+    import igraph
+
+    if not isinstance(g, CompactGraph):
+        g = CompactGraph.from_networkx(g)
+    return g.nodes(), igraph.Graph(n=g.number_of_nodes(), edges=g.edges().tolist())
+
+
+def _igraph_degree(converted: tuple) -> dict:
+    nodes, g = converted
+    n = len(nodes)
+    if n <= 1:
+        return {node: 1 for node in nodes}
+    return dict(zip(nodes, (np.array(g.degree(), dtype=float) / (n - 1)).tolist()))
+
+
+def _igraph_pagerank(converted: tuple) -> dict:
+    nodes, g = converted
+    return dict(zip(nodes, g.pagerank(damping=0.85)))
+
+
+def _igraph_eigenvector(converted: tuple) -> dict:
+    nodes, g = converted
+    x = np.array(g.eigenvector_centrality(scale=False))
+    # networkx normalises to unit length
+    return dict(zip(nodes, (x / (np.linalg.norm(x) or 1)).tolist()))
+
+
+def _igraph_betweenness(converted: tuple) -> dict:
+    nodes, g = converted
+    n = len(nodes)
+    scale = 2 / ((n - 1) * (n - 2)) if n > 2 else 1.0
+    return dict(zip(nodes, (np.array(g.betweenness()) * scale).tolist()))
+
+
+def _igraph_closeness(converted: tuple) -> dict:
+    nodes, g = converted
+    n = len(nodes)
+    # igraph normalises by the reachable nodes, networkx additionally scales
+    # by the fraction of nodes that are reachable (Wasserman and Faust)
+    components = g.connected_components()
+    reachable = np.array(components.sizes())[components.membership] - 1
+    closeness = np.nan_to_num(np.array(g.closeness(normalized=True), dtype=float))
+    if n > 1:
+        closeness *= reachable / (n - 1)
+    return dict(zip(nodes, closeness.tolist()))
+
+
+def _igraph_harmonic(converted: tuple) -> dict:
+    nodes, g = converted
+    return dict(zip(nodes, g.harmonic_centrality(normalized=False)))
+
+
+# backends that are not installed and were warned about
+_missing: set[str] = set()
+
+# the alternative backends, in no particular order
+BACKENDS = {
+    "scipy": Backend(
+        "scipy",
+        None,
+        csr_adjacency,
+        {
+            "pagerank": _scipy_pagerank,
+            "eigenvector": _scipy_eigenvector,
+            "subgraph": _scipy_subgraph,
+        },
+    ),
+    "igraph": Backend(
+        "igraph",
+        "igraph",
+        _to_igraph,
+        {
+            "degree": _igraph_degree,
+            "betweenness": _igraph_betweenness,
+            "closeness": _igraph_closeness,
+            "pagerank": _igraph_pagerank,
+            "eigenvector": _igraph_eigenvector,
+            "harmonic": _igraph_harmonic,
+        },
+    ),
+}
+
+
+def compute(backend: str, measure: str, g: nx.Graph | CompactGraph) -> dict:
+    """
+    compute a measure with a backend (a picklable entry point for worker processes)
+    """
+    return BACKENDS[backend].compute(measure, g)
+
+
+def choose_backends(
+    preference: tuple[str, ...], measures: tuple[str, ...]
+) -> dict[str, str]:
+    """
+    choose the backend of every measure, the first installed backend of the
+    preference that implements the measure
+
+    :param preference: backend names, `networkx` stands for the default implementation
+                       and ends the preference
+    :param measures: the measures to compute
+    :return: the backend per measure that is not computed by the default implementation
+    """
+    backends = []
+    for name in preference:
+        if name == DEFAULT_BACKEND:
+            break
+        if BACKENDS[name].available():
+            backends.append(BACKENDS[name])
+        elif name not in _missing:
+            logging.warning(f"centrality backend {name} is not installed, falling back")
+            _missing.add(name)
+
+    chosen = {}
+    for measure in measures:
+        for backend in backends:
+            if measure in backend.measures:
+                chosen[measure] = backend.name
+                break
+    return chosen
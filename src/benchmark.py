@@ -0,0 +1,253 @@
+import logging
+import random
+import statistics
+import time
+from typing import Callable
+
+import networkx as nx
+import numpy as np
+
+from src.backends import BACKENDS
+from src.centrality import Centralities, PATH_MEASURES, group_name, measure_groups
+from src.edgelist import EdgeList, apply_edge_removal_mask
+from src.methods import apply_edge_removal
+from src.networks import generate_barabasi, generate_er, generate_ws
+from src.paths import path_centralities
+from src.results import HOST, library_versions
+from src.utils import get_time
+
+GENERATORS = {
+    "ER": generate_er,
+    "Barabasi": generate_barabasi,
+    "WS": generate_ws,
+}
+# generated graphs of growing size and density, as (generator, parameters)
+LADDER = [
+    (generator, (nodes, *parameters))
+    for nodes in (250, 500, 1000)
+    for generator, parameters in [
+        ("ER", (0.02,)),
+        ("ER", (0.05,)),
+        ("Barabasi", (3,)),
+        ("Barabasi", (10,)),
+        ("WS", (10, 0.1)),
+        ("WS", (40, 0.1)),
+    ]
+]
+QUICK_LADDER = [("ER", (100, 0.05)), ("Barabasi", (100, 3)), ("WS", (100, 6, 0.1))]
+PERCENTAGES = (10, 50, 90)
+METHODS = range(0, 6)
+
+
+def graph_name(generator: str, parameters: tuple) -> str:
+    return "-".join(map(str, (generator, *parameters)))
+
+
+def time_call(function: Callable[[], object], repeat: int) -> dict[str, float]:
+    """
+    time repeated calls of a function
+
+    :return: the median and minimum duration in seconds
+    """
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+    return {"seconds": statistics.median(durations), "min": min(durations)}
+
+
+def benchmark_removal(
+    g: nx.Graph, percentages: tuple[int, ...], methods: range, repeat: int
+) -> list[dict]:
+    """
+    time every removal method on a graph, copying the graph (`apply_edge_removal`)
+    and masking an edge array (`apply_edge_removal_mask`)
+    """
+    edge_list = EdgeList.from_graph(g)
+    results = []
+    for method in methods:
+        for percentage in percentages:
+            num = int(percentage / 100 * g.number_of_edges())
+            for implementation, function in [
+                ("graph", lambda: apply_edge_removal(g, num, method)),
+                ("edge_array", lambda: apply_edge_removal_mask(edge_list, num, method)),
+            ]:
+                timing = time_call(function, repeat)
+                results.append(
+                    {
+                        "case": "removal",
+                        "method": method,
+                        "percentage": percentage,
+                        "implementation": implementation,
+                        **timing,
+                    }
+                )
+    return results
+
+
+def benchmark_measures(
+    g: nx.Graph, repeat: int, sparse: bool = False, backends: tuple[str, ...] = ()
+) -> list[dict]:
+    """
+    time the calls `Centralities.calc` makes, measures computed by one call
+    (e.g. the four shortest path measures) are timed together; the measures
+    of other backends are named `{measure}@{backend}` and include the
+    conversion of the graph
+    """
+    groups = measure_groups(g, sparse)
+    groups.append((PATH_MEASURES, path_centralities))
+    results = []
+    for measures, function in groups:
+        timing = time_call(lambda: function(g), repeat)
+        results.append({"case": "measure", "measure": group_name(measures), **timing})
+    for name in backends:
+        backend = BACKENDS[name]
+        if not backend.available():
+            logging.warning(f"not benchmarking backend {name}, it is not installed")
+            continue
+        for measure, function in backend.measures.items():
+            timing = time_call(lambda: function(backend.convert(g)), repeat)
+            results.append(
+                {"case": "measure", "measure": f"{measure}@{name}", **timing}
+            )
+    return results
+
+
+def run_benchmarks(
+    ladder: list[tuple[str, tuple]] = LADDER,
+    percentages: tuple[int, ...] = PERCENTAGES,
+    methods: range = METHODS,
+    repeat: int = 3,
+    sparse: bool = False,
+    cases: tuple[str, ...] = ("removal", "measure"),
+    backends: tuple[str, ...] = (),
+) -> dict:
+    """
+    time the removal methods and measures on a ladder of generated graphs
+
+    :param ladder: the graphs as pairs of generator name and parameters
+    :param percentages: the removal percentages
+    :param methods: the removal methods
+    :param repeat: the number of timed calls per case
+    :param sparse: time the sparse backend of pagerank and eigenvector centrality
+    :param cases: `removal` and/or `measure`
+    :param backends: also time the measures of these backends, see `src.backends`
+    :return: the environment (`meta`) and one record per timed case (`results`)
+    """
+    results = []
+    for generator, parameters in ladder:
+        # the same graphs and removals for every benchmark run
+        random.seed(0)
+        np.random.seed(0)
+        g = GENERATORS[generator](*parameters)
+        graph = {
+            "graph": graph_name(generator, parameters),
+            "nodes": g.number_of_nodes(),
+            "edges": g.number_of_edges(),
+        }
+        records = []
+        if "removal" in cases:
+            records += benchmark_removal(g, percentages, methods, repeat)
+        if "measure" in cases:
+            records += benchmark_measures(g, repeat, sparse, backends)
+        results += [{**graph, **record} for record in records]
+
+    return {
+        "meta": {
+            "host": HOST,
+            "time": get_time(),
+            "repeat": repeat,
+            "sparse": sparse,
+            "backends": list(backends),
+            "versions": library_versions(),
+        },
+        "results": results,
+    }
+
+
+def check_backends(
+    ladder: list[tuple[str, tuple]] = QUICK_LADDER, tol: float = 1.0e-02
+) -> list[dict]:
+    """
+    compare every measure of every installed backend with the default
+    implementation of `Centralities.calc` on generated graphs
+
+    :param ladder: the graphs as pairs of generator name and parameters
+    :param tol: the largest deviation, relative to the largest reference value, that is
+                consistent; iterative measures only converge to about 1e-6 per node
+    :return: one record per graph, backend and measure, with the largest
+             relative deviation (`error`) and whether it is within `tol` (`consistent`)
+    """
+    records = []
+    for generator, parameters in ladder:
+        random.seed(0)
+        np.random.seed(0)
+        g = GENERATORS[generator](*parameters)
+        expected = Centralities()
+        expected.calc(g)
+        for name, backend in BACKENDS.items():
+            if not backend.available():
+                logging.info(f"not checking backend {name}, it is not installed")
+                continue
+            for measure, function in backend.measures.items():
+                actual = function(backend.convert(g))
+                reference = getattr(expected, measure)
+                scale = max(map(abs, reference.values()), default=0.0) or 1.0
+                error = max(
+                    (abs(actual[node] - reference[node]) / scale for node in g),
+                    default=0.0,
+                )
+                records.append(
+                    {
+                        "graph": graph_name(generator, parameters),
+                        "backend": name,
+                        "measure": measure,
+                        "error": error,
+                        "consistent": error <= tol,
+                    }
+                )
+    return records
+
+
+def describe(record: dict) -> str:
+    """
+    a readable name of a benchmarked case
+    """
+    if record["case"] == "measure":
+        return f"{record['graph']} {record['measure']}"
+    return f"{record['graph']} method {record['method']} {record['percentage']}% {record['implementation']}"
+
+
+def _key(record: dict) -> tuple:
+    """
+    identify a case across benchmark runs
+    """
+    fields = ("case", "graph", "method", "percentage", "implementation", "measure")
+    return tuple(record.get(field) for field in fields)
+
+
+def compare(
+    current: dict, baseline: dict, threshold: float = 0.2, noise: float = 1.0e-03
+) -> list[dict]:
+    """
+    find the cases that got slower than in a baseline
+
+    :param current: the results of `run_benchmarks`
+    :param baseline: stored results of `run_benchmarks`
+    :param threshold: the relative slowdown of the median that counts as regression
+    :param noise: absolute slowdowns in seconds below this are ignored
+    :return: the regressed cases with their baseline time and slowdown `ratio`
+    """
+    baseline_seconds = {
+        _key(record): record["seconds"] for record in baseline["results"]
+    }
+    regressions = []
+    for record in current["results"]:
+        before = baseline_seconds.get(_key(record))
+        if before is None:
+            continue
+        after = record["seconds"]
+        if after > before * (1 + threshold) and after - before > noise:
+            regressions.append({**record, "baseline": before, "ratio": after / before})
+    return regressions
@@ -0,0 +1,207 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import zipfile
+from typing import Callable
+
+import networkx as nx
+import numpy as np
+
+from src.edgelist import EdgeList
+
+
+def file_hash(file: str) -> str:
+    """
+    sha256 of a file's content
+    """
+    h = hashlib.sha256()
+    with open(file, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def source_key(source: str, version: int, hash_content: bool = False) -> dict:
+    """
+    describe the state of a source file, a cache entry is only valid for an identical key
+
+    :param source: the source file
+    :param version: version of the loader that parses the source
+    :param hash_content: identify the content by its hash instead of size and modification time
+    """
+    stat = os.stat(source)
+    key = {"source": os.path.abspath(source), "version": version}
+    if hash_content:
+        key["sha256"] = file_hash(source)
+    else:
+        key["size"] = stat.st_size
+        key["mtime_ns"] = stat.st_mtime_ns
+    return key
+
+
+def cache_file(cache_dir: str, name: str) -> str:
+    """
+    the path of the cache entry for a name (e.g. a source path)
+    """
+    digest = hashlib.sha1(name.encode()).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{os.path.basename(name)}.{digest}.npz")
+
+
+def write_edge_list(file: str, edge_list: EdgeList, key: dict) -> bool:
+    """
+    atomically store an edge list and its key, labels must be all strings or all integers
+
+    :return: whether the entry was written
+    """
+    labels = np.asarray(edge_list.nodes)
+    if labels.dtype.kind not in "Ui":
+        logging.warning(f"not caching {key}: node labels are neither str nor int")
+        return False
+
+    directory = os.path.dirname(file) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(
+                f,
+                key=np.array(json.dumps(key, sort_keys=True)),
+                labels=labels,
+                edges=edge_list.edges,
+            )
+        os.replace(tmp, file)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return True
+
+
+def read_edge_list(file: str, key: dict) -> EdgeList | None:
+    """
+    read a cache entry
+
+    :return: the edge list, `None` if there is no valid entry for the key
+    """
+    if not os.path.isfile(file):
+        return None
+    try:
+        with np.load(file, allow_pickle=False) as data:
+            if json.loads(str(data["key"])) != key:
+                logging.info(f"cache entry {file} is stale")
+                return None
+            return EdgeList(data["labels"].tolist(), data["edges"])
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile) as e:
+        logging.warning(f"ignoring broken cache entry {file}: {e}")
+        return None
+
+
+def cached_edge_list(
+    source: str,
+    loader: Callable[[], nx.Graph],
+    cache_dir: str,
+    version: int,
+    hash_content: bool = False,
+) -> EdgeList:
+    """
+    load a parsed network from the cache as an edge list, without building a
+    networkx graph on a cache hit, see `cached_graph`
+    """
+    key = source_key(source, version, hash_content)
+    file = cache_file(cache_dir, key["source"])
+
+    edge_list = read_edge_list(file, key)
+    if edge_list is not None:
+        logging.info(
+            f"read {source} from cache with {edge_list.number_of_nodes()} nodes and {edge_list.number_of_edges()} edges"
+        )
+        return edge_list
+
+    edge_list = EdgeList.from_graph(loader())
+    if write_edge_list(file, edge_list, key):
+        logging.info(f"cached {source} in {file}")
+    return edge_list
+
+
+def cached_graph(
+    source: str,
+    loader: Callable[[], nx.Graph],
+    cache_dir: str,
+    version: int,
+    hash_content: bool = False,
+) -> nx.Graph:
+    """
+    load a parsed network from the cache, or parse it and store it in the cache
+
+    :param source: the file the network is parsed from
+    :param loader: parses the network
+    :param cache_dir: directory of the cache entries
+    :param version: version of the loader, entries of other versions are stale
+    :param hash_content: identify the source by its content hash instead of size and modification time
+    :return: the graph
+    """
+    key = source_key(source, version, hash_content)
+    file = cache_file(cache_dir, key["source"])
+
+    edge_list = read_edge_list(file, key)
+    if edge_list is not None:
+        g = edge_list.to_graph()
+        logging.info(
+            f"read {source} from cache with {g.number_of_nodes()} nodes and {g.number_of_edges()} edges"
+        )
+        return g
+
+    g = loader()
+    if write_edge_list(file, EdgeList.from_graph(g), key):
+        logging.info(f"cached {source} in {file}")
+    return g
+
+
+def generated_file(cache_dir: str, key: dict) -> str:
+    """
+    the path of the cache entry of a generated network
+    """
+    return cache_file(cache_dir, f"{key['network']}--seed-{key['seed']}")
+
+
+def base_file(file: str, extension: str) -> str:
+    """
+    the path of the base centralities stored next to the cache entry of a network,
+    they record how every measure was computed and are only reused for runs
+    computing it the same way (see `centrality.reusable`)
+
+    :param file: the cache entry of the network
+    :param extension: the extension of the centrality file, `json` or `cent`
+    """
+    return f"{file[: -len('.npz')]}.base.{extension}"
+
+
+def cached_generated(
+    key: dict, generate: Callable[[], nx.Graph], cache_dir: str
+) -> EdgeList:
+    """
+    load a generated network from the cache, or generate it and store it in
+    the cache; base centralities stored next to a replaced entry are deleted
+
+    :param key: identifies the network, its generator, parameters and seed
+    :param generate: generates the network, reproducibly for the key
+    :param cache_dir: directory of the cache entries
+    :return: the edge list, the same on a cache hit and miss
+    """
+    file = generated_file(cache_dir, key)
+
+    edge_list = read_edge_list(file, key)
+    if edge_list is not None:
+        logging.info(
+            f"read {key['network']} (seed {key['seed']}) from cache with {edge_list.number_of_nodes()} nodes and {edge_list.number_of_edges()} edges"
+        )
+        return edge_list
+
+    edge_list = EdgeList.from_graph(generate())
+    if write_edge_list(file, edge_list, key):
+        logging.info(f"cached {key['network']} (seed {key['seed']}) in {file}")
+        for extension in ("json", "cent"):
+            if os.path.isfile(base_file(file, extension)):
+                os.unlink(base_file(file, extension))
+    return edge_list
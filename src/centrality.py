@@ -1,58 +1,586 @@
 import json
+import logging
+import math
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Callable
+
 import networkx as nx
 
+from src import backends, spectral
+from src.backends import DEFAULT_BACKEND, choose_backends
+from src.columnar import is_columnar, read_columns, write_columns
+from src.graph import CompactGraph
+from src.paths import (
+    adjacency,
+    finalize,
+    merge,
+    path_centralities,
+    pivot_error,
+    sample_pivots,
+    sweep,
+)
+from src.spans import span
+from src.spectral import spectral_centralities
+
+# all measures, in the order they are stored and reported
+MEASURES = (
+    "degree",
+    "betweenness",
+    "closeness",
+    "pagerank",
+    "eigenvector",
+    "harmonic",
+    "subgraph",
+    "load",
+)
+
+# number of source chunks handed to every worker for the path based measures,
+# more chunks balance the load better but cost more transfers
+CHUNKS_PER_WORKER = 4
+
+
+def _networkx(g: nx.Graph | CompactGraph) -> nx.Graph:
+    """
+    the networkx graph for measures that need one
+    """
+    return g.to_networkx() if isinstance(g, CompactGraph) else g
+
+
+def degree_centrality(g: nx.Graph | CompactGraph) -> dict:
+    if not isinstance(g, CompactGraph):
+        return nx.degree_centrality(g)
+    n = g.number_of_nodes()
+    if n <= 1:
+        return {node: 1 for node in g.nodes()}
+    return dict(zip(g.nodes(), (g.degree / (n - 1)).tolist()))
+
+
+def pagerank(g: nx.Graph | CompactGraph, nstart: dict | None = None) -> dict:
+    return nx.pagerank(_networkx(g), nstart=nstart)
+
+
+def eigenvector_centrality(
+    g: nx.Graph | CompactGraph, nstart: dict | None = None
+) -> dict:
+    return nx.eigenvector_centrality(_networkx(g), max_iter=1000, nstart=nstart)
+
+
+def subgraph_centrality(g: nx.Graph | CompactGraph) -> dict:
+    if isinstance(g, CompactGraph):
+        return spectral.subgraph_centrality(g)
+    return nx.subgraph_centrality(g)
+
+
+# measures that are computed by a single call each
+SINGLE_MEASURES = {
+    "degree": degree_centrality,
+    "pagerank": pagerank,
+    "eigenvector": eigenvector_centrality,
+    "subgraph": subgraph_centrality,
+}
+# measures that share a single shortest path traversal, see `src.paths`
+PATH_MEASURES = ("betweenness", "load", "closeness", "harmonic")
+# measures that share a sparse adjacency matrix, see `src.spectral`
+SPECTRAL_MEASURES = ("pagerank", "eigenvector")
+# measures that iterate towards a solution and can be warm started
+ITERATIVE_MEASURES = ("pagerank", "eigenvector")
+# information yielded by the calls alongside the measures, see `measure_groups`
+PSEUDO_MEASURES = ("iterations", "subgraph_error")
+
+
+def provenance(
+    measure: str,
+    subgraph_tol: float | None = None,
+    chosen: dict[str, str] | None = None,
+    sparse: bool = False,
+    tol: float = 1.0e-06,
+) -> dict:
+    """
+    describe how a measure is computed, stored with saved centralities to
+    tell whether they may be reused, see `reusable`
+
+    :param measure: the measure
+    :param subgraph_tol: the relative error subgraph centrality is estimated with, exact if `None`
+    :param chosen: the backend computing a measure instead of the default implementation
+    :param sparse: pagerank and eigenvector centrality are computed on a sparse matrix
+    :param tol: the convergence tolerance of the sparse matrix implementation
+    """
+    record = {"backend": (chosen or {}).get(measure, DEFAULT_BACKEND)}
+    if record["backend"] != DEFAULT_BACKEND:
+        return record
+    if measure == "subgraph" and subgraph_tol is not None:
+        record["subgraph_tol"] = subgraph_tol
+    if measure in SPECTRAL_MEASURES and sparse:
+        record["sparse"] = True
+        record["tol"] = tol
+    return record
+
+
+def reusable(stored: dict | None, requested: dict) -> bool:
+    """
+    whether a measure computed as described by `stored` may stand in for one
+    computed as described by `requested`, i.e. is at least as accurate
+
+    :param stored: the provenance of the stored measure, files without one are
+                   exact values of the default implementation
+    :param requested: the provenance of the measure to compute, see `provenance`
+    """
+    stored = stored or {}
+    # backends agree within their convergence tolerance only, see `benchmark.check_backends`
+    if stored.get("backend", DEFAULT_BACKEND) != requested["backend"]:
+        return False
+    if stored.get("sparse", False) != requested.get("sparse", False):
+        return False
+    if stored.get("tol", 0.0) > requested.get("tol", math.inf):
+        return False
+    # the error bound reached by estimated subgraph centrality, `None` if exact
+    bound = stored.get("subgraph_error", stored.get("subgraph_tol"))
+    return bound is None or bound <= requested.get("subgraph_tol", 0.0)
+
+
+def group_name(measures: tuple[str, ...]) -> str:
+    """
+    the name of measures computed by one call, e.g. `betweenness+load+closeness+harmonic`
+    """
+    return "+".join(
+        measure
+        for measure in measures
+        if measure is not None and measure not in PSEUDO_MEASURES
+    )
+
+
+def _single(function: Callable[[nx.Graph], dict], g: nx.Graph) -> tuple[dict]:
+    return (function(g),)
+
+
+def _converted(
+    functions: tuple[Callable[[nx.Graph], dict], ...], g: CompactGraph
+) -> tuple:
+    """
+    call functions of a networkx graph on a compact graph converted only once for all
+    """
+    g = _networkx(g)
+    return tuple(function(g) for function in functions)
+
+
+def _start_vector(values: dict, g: nx.Graph) -> dict:
+    return {node: values.get(node, 0.0) for node in g.nodes()}
+
+
+def measure_groups(
+    g: nx.Graph,
+    sparse: bool = False,
+    tol: float = 1.0e-06,
+    warm_start: "Centralities | None" = None,
+    measures: tuple[str, ...] = MEASURES,
+    subgraph_tol: float | None = None,
+    chosen: dict[str, str] | None = None,
+) -> list[tuple[tuple[str, ...], Callable[[nx.Graph], tuple]]]:
+    """
+    list the measures that are not derived from shortest paths, grouped by
+    the calls that compute them together
+
+    the spectral group additionally yields the number of iterations, which
+    is listed as pseudo measure `iterations`, and estimated subgraph
+    centrality its error bound, listed as pseudo measure `subgraph_error`
+
+    :param g: the graph the measures will be computed for
+    :param sparse: use the sparse matrix backend for pagerank and eigenvector centrality
+    :param tol: convergence tolerance of the sparse backend
+    :param warm_start: centralities of a similar graph to start iterative measures from
+    :param measures: only list the groups computing any of these measures
+    :param subgraph_tol: if given, estimate subgraph centrality by Lanczos quadrature
+                         with this relative error instead of a dense eigendecomposition
+    :param chosen: the backend computing a measure instead of the default
+                   implementation, see `backends.choose_backends`
+    :return: pairs of measure names and the (picklable) function computing them
+    """
+    groups = []
+    for measure, backend in (chosen or {}).items():
+        if measure in measures:
+            groups.append(
+                (
+                    (measure,),
+                    partial(_single, partial(backends.compute, backend, measure)),
+                )
+            )
+    measures = tuple(m for m in measures if m not in (chosen or {}))
+
+    starts = {}
+    if warm_start is not None:
+        for measure in ITERATIVE_MEASURES:
+            # the warm start may lack measures it was not computed for
+            if measure in measures and getattr(warm_start, measure) is not None:
+                starts[measure] = getattr(warm_start, measure)
+
+    # pagerank and eigenvector centrality of a compact graph share one networkx copy
+    converted = {}
+    for measure, function in SINGLE_MEASURES.items():
+        if measure not in measures or (sparse and measure in SPECTRAL_MEASURES):
+            continue
+        if measure == "subgraph" and subgraph_tol is not None:
+            groups.append(
+                (
+                    ("subgraph", "subgraph_error"),
+                    partial(spectral.subgraph_lanczos, tol=subgraph_tol),
+                )
+            )
+            continue
+        if measure in starts:
+            function = partial(function, nstart=_start_vector(starts[measure], g))
+        if isinstance(g, CompactGraph) and measure in SPECTRAL_MEASURES:
+            converted[measure] = function
+            continue
+        groups.append(((measure,), partial(_single, function)))
+    if converted:
+        groups.append(
+            (tuple(converted), partial(_converted, tuple(converted.values())))
+        )
+    spectral_measures = tuple(m for m in SPECTRAL_MEASURES if m in measures)
+    if sparse and spectral_measures:
+        nstart = None
+        if starts:
+            nstart = tuple(starts.get(measure) for measure in SPECTRAL_MEASURES)
+        groups.append(
+            (
+                SPECTRAL_MEASURES + ("iterations",),
+                partial(
+                    spectral_centralities,
+                    tol=tol,
+                    nstart=nstart,
+                    measures=spectral_measures,
+                ),
+            )
+        )
+    return groups
+
+
+# graph and adjacency of the current pool worker, see `_init_worker`
+_worker_graph = None
+_worker_adjacency = None
+
+
+def _init_worker(g: nx.Graph):
+    global _worker_graph, _worker_adjacency
+    _worker_graph = g
+    _worker_adjacency = adjacency(g)
+
+
+def _worker_measure(
+    measures: tuple[str, ...], function: Callable[[nx.Graph], tuple]
+) -> tuple:
+    with span(group_name(measures)):
+        return function(_worker_graph)
+
+
+def _worker_sweep(
+    sources: range, pivots: set[int] | None, distances: bool = True
+) -> tuple:
+    _, indptr, indices = _worker_adjacency
+    with span(group_name(PATH_MEASURES), sources=[sources.start, sources.stop]):
+        return sweep(indptr, indices, sources, pivots, distances)
+
 
 class Centralities:
+    """
+    the centralities of a graph, every measure is an attribute mapping nodes
+    to values, `None` for measures that are not computed
+
+    measures can be restricted to a subset (see `calc`), and computed lazily,
+    i.e. on first access of the attribute and then kept
+    """
+
     def __init__(self):
         self.g_copy = None
-        self.degree = None
-        self.betweenness = None
-        self.closeness = None
-        self.pagerank = None
-        self.eigenvector = None
-        self.harmonic = None
-        self.subgraph = None
-        self.load = None
-
-    def setup(self, in_file: str):
-        with open(in_file, "r") as f:
-            data = json.loads(f.read())
-
-            self.degree = data["degree_centrality"]
-            self.betweenness = data["betweenness_centrality"]
-            self.closeness = data["closeness_centrality"]
-            self.pagerank = data["pagerank_centrality"]
-            self.eigenvector = data["eigenvector_centrality"]
-            self.harmonic = data["harmonic_centrality"]
-            self.subgraph = data["subgraph_centrality"]
-            self.load = data["load_centrality"]
-
-    def calc(self, g: nx.Graph):
+        # the measures that are computed, or computed on first access
+        self.measures: tuple[str, ...] = MEASURES
+        # pivot count, error bound and confidence of approximated betweenness and load
+        self.approximation = None
+        # number of iterations the iterative measures took, if known
+        self.iterations: dict[str, int] = {}
+        # relative error bound and Lanczos steps of estimated subgraph centrality
+        self.subgraph_error = None
+        # how every measure is computed, see `provenance`
+        self.provenance: dict[str, dict] = {}
+        # groups of measures that are computed on first access, and how
+        self._pending: list[tuple[tuple[str, ...], Callable[[nx.Graph], tuple]]] = []
+        self._workers = 1
+        self._pivots = None
+        self._distances = True
+        # the pending group of shortest path measures, see `calc`
+        self._paths = None
+
+    def __getattr__(self, name: str):
+        # only called for attributes that are not set, i.e. measures that are
+        # not computed yet
+        if name not in MEASURES:
+            raise AttributeError(
+                f"'{type(self).__name__}' object has no attribute '{name}'"
+            )
+        if name not in self.__dict__.get("measures", ()):
+            return None
+        for group in self._pending:
+            if name in group[0]:
+                self._compute([group])
+                break
+        return self.__dict__.get(name)
+
+    def _reset(self, measures: tuple[str, ...]):
+        for measure in MEASURES:
+            self.__dict__.pop(measure, None)
+        self.measures = tuple(measure for measure in MEASURES if measure in measures)
+        self.approximation = None
+        self.iterations = {}
+        self.subgraph_error = None
+        self.provenance = {}
+        self._pending = []
+
+    def setup(self, in_file: str, nodes: list | None = None):
+        """
+        read centralities from a JSON or columnar file, columnar files are
+        memory mapped and every measure is only read on first access
+
+        :param in_file: the file written by `save`, with all or some measures
+        :param nodes: the node labels of the graph, restores labels that are
+                      not strings from the keys of a JSON file
+        """
+        if is_columnar(in_file):
+            _, data, meta = read_columns(in_file)
+        else:
+            with open(in_file, "r") as f:
+                data = json.loads(f.read())
+            meta = data
+            if nodes is not None:
+                for measure in MEASURES:
+                    values = data.get(f"{measure}_centrality")
+                    if values is not None:
+                        data[f"{measure}_centrality"] = {
+                            node: values[str(node)] for node in nodes
+                        }
+
+        self._reset(tuple(m for m in MEASURES if f"{m}_centrality" in data))
+        for measure in self.measures:
+            setattr(self, measure, data[f"{measure}_centrality"])
+        self.approximation = meta.get("approximation")
+        self.iterations = meta.get("iterations", {})
+        self.subgraph_error = meta.get("subgraph_error")
+        self.provenance = meta.get("provenance", {})
+
+    def calc(
+        self,
+        g: nx.Graph | CompactGraph,
+        workers: int = 1,
+        sparse: bool = False,
+        tol: float = 1.0e-06,
+        error: float | None = None,
+        confidence: float = 0.95,
+        warm_start: "Centralities | None" = None,
+        measures: tuple[str, ...] = MEASURES,
+        lazy: bool = False,
+        subgraph_tol: float | None = None,
+        backends: tuple[str, ...] = (DEFAULT_BACKEND,),
+    ):
+        """
+        calculate the centralities of a graph
+
+        :param g: the graph
+        :param workers: number of worker processes, `1` computes everything in this process
+        :param sparse: compute pagerank and eigenvector centrality on a sparse adjacency matrix
+        :param tol: convergence tolerance of the sparse backend
+        :param error: if given, estimate betweenness and load from sampled pivots with this absolute error
+        :param confidence: probability that the estimates are within the error
+        :param warm_start: centralities of a similar graph (e.g. the base graph of a shrunk graph)
+                           to start pagerank and eigenvector centrality from
+        :param measures: the measures to calculate, the others stay `None`
+        :param lazy: calculate every measure on first access instead of now,
+                     measures computed by one call are calculated together
+        :param subgraph_tol: if given, estimate subgraph centrality with this relative error
+                             (see `spectral.subgraph_lanczos`), the bound reached is kept
+                             in `subgraph_error`
+        :param backends: the preferred backends (see `src.backends`), every measure is
+                         computed by the first installed backend implementing it or else
+                         by the default implementation; sampled betweenness and load
+                         always use the default implementation
+        """
+        self._reset(measures)
         self.g_copy = g
+        self._workers = workers
+        chosen = choose_backends(
+            backends,
+            tuple(
+                measure
+                for measure in self.measures
+                if error is None or measure not in ("betweenness", "load")
+            ),
+        )
+        self._pending = measure_groups(
+            self.g_copy, sparse, tol, warm_start, self.measures, subgraph_tol, chosen
+        )
+        self.provenance = {
+            measure: provenance(measure, subgraph_tol, chosen, sparse, tol)
+            for measure in self.measures
+        }
 
-        self.degree = nx.degree_centrality(self.g_copy)
-        self.betweenness = nx.betweenness_centrality(self.g_copy)
-        self.closeness = nx.closeness_centrality(self.g_copy)
-        self.pagerank = nx.pagerank(self.g_copy)
-        self.eigenvector = nx.eigenvector_centrality(self.g_copy, max_iter=1000)
-        self.harmonic = nx.harmonic_centrality(self.g_copy)
-        self.subgraph = nx.subgraph_centrality(self.g_copy)
-        self.load = nx.load_centrality(self.g_copy)
+        self._pivots = None
+        self._paths = None
+        paths = tuple(
+            measure if measure in self.measures and measure not in chosen else None
+            for measure in PATH_MEASURES
+        )
+        if any(paths):
+            if error is not None:
+                n = self.g_copy.number_of_nodes()
+                self._pivots = sample_pivots(n, error, confidence)
+                if self._pivots is not None:
+                    self.approximation = {
+                        "pivots": len(self._pivots),
+                        "error": pivot_error(n, len(self._pivots), confidence),
+                        "confidence": confidence,
+                    }
+                else:
+                    logging.info(
+                        f"sampling pivots for error {error} needs all {n} nodes, "
+                        f"calculating exact betweenness and load"
+                    )
+            # without closeness and harmonic only the pivots need a traversal
+            self._distances = paths[2] is not None or paths[3] is not None
+            # betweenness, load, closeness and harmonic all derive from the same
+            # shortest paths, so compute them in a single traversal
+            self._paths = (
+                paths,
+                partial(
+                    path_centralities,
+                    pivots=self._pivots,
+                    distances=self._distances,
+                ),
+            )
+            self._pending.append(self._paths)
 
-    def save(self, out_file):
-        with open(out_file, "w") as file1:
-            file1.write(
-                json.dumps(
-                    {
-                        "degree_centrality": self.degree,
-                        "betweenness_centrality": self.betweenness,
-                        "closeness_centrality": self.closeness,
-                        "pagerank_centrality": self.pagerank,
-                        "eigenvector_centrality": self.eigenvector,
-                        "harmonic_centrality": self.harmonic,
-                        "subgraph_centrality": self.subgraph,
-                        "load_centrality": self.load,
-                    },
-                    indent=0,
+        if not lazy:
+            self._compute(list(self._pending))
+
+    def _compute(self, groups: list):
+        """
+        compute pending groups of measures, in a pool if there are several workers
+        """
+        for group in groups:
+            self._pending.remove(group)
+        if self.g_copy is None:
+            # the graph is gone, the measures stay `None`
+            return
+
+        if self._workers > 1:
+            self._calc_parallel(self._workers, groups, self._pivots)
+            return
+
+        for measures, function in groups:
+            with span(group_name(measures)):
+                self._assign(measures, function(self.g_copy))
+
+    def _calc_parallel(self, workers: int, groups: list, pivots: set[int] | None):
+        """
+        spread the measures over a pool of processes, the shortest path sweep
+        is additionally split into chunks of source nodes
+        """
+        paths = any(group is self._paths for group in groups)
+        groups = [group for group in groups if group is not self._paths]
+        nodes = list(self.g_copy.nodes())
+        n = len(nodes)
+        chunk = max(1, math.ceil(n / (workers * CHUNKS_PER_WORKER)))
+
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(self.g_copy,)
+        ) as executor:
+            # submit the other measures first, they can't be split
+            single = [
+                (measures, executor.submit(_worker_measure, measures, function))
+                for measures, function in groups
+            ]
+            sweeps = []
+            for start in range(0, n, chunk) if paths else []:
+                sources = range(start, min(start + chunk, n))
+                chunk_pivots = (
+                    None if pivots is None else {v for v in sources if v in pivots}
                 )
+                if not self._distances and chunk_pivots == set():
+                    continue
+                sweeps.append(
+                    executor.submit(
+                        _worker_sweep, sources, chunk_pivots, self._distances
+                    )
+                )
+
+            for measures, future in single:
+                self._assign(measures, future.result())
+            # reduce in submission order to keep the result deterministic
+            partials = [future.result() for future in sweeps]
+
+        if paths:
+            self._assign(
+                self._paths[0], finalize(nodes, *merge(partials), pivots=pivots)
             )
+
+    def _assign(self, measures: tuple[str, ...], values: tuple[dict, ...]):
+        for measure, value in zip(measures, values):
+            if measure == "iterations":
+                self.iterations.update(value)
+            elif measure == "subgraph_error":
+                self.subgraph_error = value
+                self.provenance["subgraph"]["subgraph_error"] = value["error"]
+            elif measure is not None and measure in self.measures:
+                setattr(self, measure, value)
+
+    def save(
+        self,
+        out_file: str,
+        binary: bool = False,
+        float32: bool = False,
+        compress: bool = False,
+    ):
+        """
+        write the computed measures to a file, pending measures are computed first
+
+        :param out_file: the output file
+        :param binary: write a columnar binary file (a node table and one array per measure) instead of JSON
+        :param float32: quantize the values of a binary file to single precision
+        :param compress: compress the columns of a binary file
+        """
+        meta = {}
+        if self.approximation is not None:
+            meta["approximation"] = self.approximation
+        if self.iterations:
+            meta["iterations"] = self.iterations
+        if self.subgraph_error is not None:
+            meta["subgraph_error"] = self.subgraph_error
+        meta["provenance"] = {
+            measure: self.provenance.get(measure, {}) for measure in self.measures
+        }
+
+        if binary:
+            nodes = (
+                list(getattr(self, self.measures[0]).keys()) if self.measures else []
+            )
+            columns = {
+                f"{measure}_centrality": [
+                    getattr(self, measure)[node] for node in nodes
+                ]
+                for measure in self.measures
+            }
+            write_columns(
+                out_file,
+                nodes,
+                columns,
+                meta,
+                dtype="float32" if float32 else "float64",
+                compress=compress,
+            )
+            return
+
+        data = {
+            f"{measure}_centrality": dict(getattr(self, measure))
+            for measure in self.measures
+        }
+        data.update(meta)
+        with open(out_file, "w") as file1:
+            file1.write(json.dumps(data, indent=0))
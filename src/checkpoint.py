@@ -0,0 +1,80 @@
+import hashlib
+import json
+import logging
+import os
+import secrets
+
+# the fields identifying a unit of work
+KEY = ("network", "method", "percentage", "iteration")
+
+
+def unit_seed(seed: int | None, *key) -> int:
+    """
+    the seed of a unit of work, derived from the seed of the sweep and the
+    unit's key so that a resumed sweep repeats the unit exactly
+
+    :param seed: the seed of the sweep, a random seed is drawn if `None`
+    :param key: JSON serialisable values identifying the unit
+    :return: a 32 bit seed
+    """
+    if seed is None:
+        return secrets.randbits(32)
+    digest = hashlib.sha256(json.dumps([seed, *key]).encode()).digest()
+    return int.from_bytes(digest[:4], "little")
+
+
+class Manifest:
+    """
+    the completed units of a sweep, stored as an append only JSON lines file
+
+    every line is appended with a single write and synced to disk before the
+    unit counts as completed, so a killed job loses at most the units in
+    flight; a torn last line is ignored (and its unit run again)
+    """
+
+    def __init__(self, file: str):
+        self.file = file
+        self.completed: set[tuple] = set()
+        if not os.path.isfile(file):
+            return
+
+        with open(file, "rb") as f:
+            content = f.read()
+        for number, line in enumerate(content.splitlines(), 1):
+            try:
+                entry = json.loads(line)
+                self.completed.add(tuple(entry[field] for field in KEY))
+            except (ValueError, KeyError, TypeError) as e:
+                logging.warning(f"ignoring line {number} of manifest {file}: {e}")
+        if content and not content.endswith(b"\n"):
+            # terminate a torn line, so the next entry starts on a line of its own
+            self._append(b"\n")
+
+    def __len__(self) -> int:
+        return len(self.completed)
+
+    def _append(self, data: bytes):
+        fd = os.open(self.file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, data)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def done(self, network: str, method: int, percentage: int, iteration: int) -> bool:
+        """
+        whether a unit is completed
+        """
+        return (network, method, percentage, iteration) in self.completed
+
+    def record(
+        self, network: str, method: int, percentage: int, iteration: int, **info
+    ):
+        """
+        mark a unit as completed, after its results were written
+
+        :param info: additional JSON serialisable information, e.g. the unit's seed
+        """
+        entry = dict(zip(KEY, (network, method, percentage, iteration)), **info)
+        self._append(f"{json.dumps(entry)}\n".encode())
+        self.completed.add((network, method, percentage, iteration))
@@ -0,0 +1,145 @@
+import json
+import struct
+import zlib
+from collections.abc import Mapping
+from typing import Callable, Hashable, Iterator
+
+import numpy as np
+
+# file layout: magic, header length (little endian uint64), JSON header,
+# padding to ALIGNMENT, then one (optionally zlib compressed) column per measure
+MAGIC = b"CENTCOL1"
+ALIGNMENT = 64
+
+
+class Column(Mapping):
+    """
+    a read only `{node: value}` view on a column of a columnar file, the
+    values are only read (or decompressed) on first access
+    """
+
+    def __init__(self, index: dict[Hashable, int], load: Callable[[], np.ndarray]):
+        self.index = index
+        self._load = load
+        self._values: np.ndarray | None = None
+
+    @property
+    def values_array(self) -> np.ndarray:
+        """
+        the values as an array in the order of the file's node table
+        """
+        if self._values is None:
+            self._values = self._load()
+        return self._values
+
+    def __getitem__(self, node: Hashable) -> float:
+        return float(self.values_array[self.index[node]])
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(self.index)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+
+def is_columnar(file: str) -> bool:
+    with open(file, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def write_columns(
+    file: str,
+    nodes: list,
+    columns: dict[str, np.ndarray],
+    meta: dict | None = None,
+    dtype: str = "float64",
+    compress: bool = False,
+):
+    """
+    write a table of node labels and one float column per measure
+
+    :param file: the output file
+    :param nodes: the node labels, shared by all columns
+    :param columns: the values per column, in node order
+    :param meta: additional JSON serialisable information
+    :param dtype: `float64` or `float32` to quantize the values
+    :param compress: zlib compress every column, which prevents memory mapping
+    """
+    blobs = {}
+    for name, values in columns.items():
+        blob = np.asarray(values, dtype=np.dtype(dtype).newbyteorder("<")).tobytes()
+        blobs[name] = zlib.compress(blob) if compress else blob
+
+    layout = {}
+    offset = 0
+    for name, blob in blobs.items():
+        layout[name] = {"offset": offset, "size": len(blob)}
+        offset += len(blob) + (-len(blob)) % ALIGNMENT
+    header = json.dumps(
+        {
+            "nodes": nodes,
+            "dtype": dtype,
+            "compressed": compress,
+            "columns": layout,
+            "meta": meta or {},
+        }
+    ).encode()
+
+    start = len(MAGIC) + 8 + len(header)
+    start += (-start) % ALIGNMENT
+    with open(file, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        for name, blob in blobs.items():
+            f.seek(start + layout[name]["offset"])
+            f.write(blob)
+
+
+def read_columns(file: str) -> tuple[list, dict[str, Column], dict]:
+    """
+    open a columnar file, uncompressed columns are memory mapped
+
+    :param file: the file
+    :return: the node labels, a lazy view per column and the additional information
+    """
+    with open(file, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{file} is not a columnar centrality file")
+        (length,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(length))
+    start = len(MAGIC) + 8 + length
+    start += (-start) % ALIGNMENT
+
+    nodes = header["nodes"]
+    index = {node: i for i, node in enumerate(nodes)}
+    dtype = np.dtype(header["dtype"]).newbyteorder("<")
+
+    def loader(offset: int, size: int) -> Callable[[], np.ndarray]:
+        if header["compressed"]:
+
+            def load() -> np.ndarray:
+                with open(file, "rb") as f:
+                    f.seek(start + offset)
+                    return np.frombuffer(zlib.decompress(f.read(size)), dtype=dtype)
+
+        else:
+
+            def load() -> np.ndarray:
+                if size == 0:
+                    return np.zeros(0, dtype=dtype)
+                return np.memmap(
+                    file,
+                    dtype=dtype,
+                    mode="r",
+                    offset=start + offset,
+                    shape=(len(nodes),),
+                )
+
+        return load
+
+    columns = {
+        name: Column(index, loader(spec["offset"], spec["size"]))
+        for name, spec in header["columns"].items()
+    }
+    return nodes, columns, header["meta"]
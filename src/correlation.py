@@ -1,49 +1,220 @@
 import networkx as nx
 import numpy as np
-from scipy.stats import spearmanr
+from scipy.stats import kendalltau, rankdata
 
-from src.centrality import Centralities
+from src.centrality import MEASURES, Centralities
 from src.utils import get_time
 
 
-class Correlations:
-    def __init__(self, base: Centralities, mod: Centralities, g: nx.Graph):
-        b_degrees = np.array([base.degree[node] for node in g.nodes()])
-        m_degrees = np.array([mod.degree[node] for node in mod.g_copy.nodes()])
+def centrality_matrix(
+    centralities: Centralities, nodes: list, measures: tuple[str, ...] = MEASURES
+) -> np.ndarray:
+    """
+    arrange centralities as a matrix with one row per node and one column per measure
 
-        b_betweenness = np.array([base.betweenness[node] for node in g.nodes()])
-        m_betweenness = np.array([mod.betweenness[node] for node in mod.g_copy.nodes()])
+    :param centralities: the centralities
+    :param nodes: the nodes, in row order
+    :param measures: the measures, in column order
+    :return: the nodes × measures matrix
+    """
+    matrix = np.empty((len(nodes), len(measures)))
+    for j, measure in enumerate(measures):
+        values = getattr(centralities, measure)
+        matrix[:, j] = np.fromiter((values[node] for node in nodes), float, len(nodes))
+    return matrix
 
-        b_closeness = np.array([base.closeness[node] for node in g.nodes()])
-        m_closeness = np.array([mod.closeness[node] for node in mod.g_copy.nodes()])
 
-        b_pagerank = np.array([base.pagerank[node] for node in g.nodes()])
-        m_pagerank = np.array([mod.pagerank[node] for node in mod.g_copy.nodes()])
+def shared_measures(*centralities: Centralities) -> tuple[str, ...]:
+    """
+    the measures computed for all centralities
+    """
+    return tuple(
+        measure
+        for measure in MEASURES
+        if all(measure in c.measures for c in centralities)
+    )
 
-        b_eigenvector = np.array([base.eigenvector[node] for node in g.nodes()])
-        m_eigenvector = np.array([mod.eigenvector[node] for node in mod.g_copy.nodes()])
 
-        b_harmonic = np.array([base.harmonic[node] for node in g.nodes()])
-        m_harmonic = np.array([mod.harmonic[node] for node in mod.g_copy.nodes()])
+class CorrelationEngine:
+    """
+    correlate the centralities of perturbed graphs with those of the base graph
 
-        b_subgraph = np.array([base.subgraph[node] for node in g.nodes()])
-        m_subgraph = np.array([mod.subgraph[node] for node in mod.g_copy.nodes()])
+    the base matrix is ranked once, perturbed matrices are ranked and
+    correlated with it in batches; all matrices use the same fixed node order
+    """
 
-        b_load = np.array([base.load[node] for node in g.nodes()])
-        m_load = np.array([mod.load[node] for node in mod.g_copy.nodes()])
+    def __init__(
+        self, base: Centralities, nodes: list, measures: tuple[str, ...] = MEASURES
+    ):
+        self.nodes = nodes
+        self.measures = measures
+        self.base = centrality_matrix(base, nodes, measures)
+        self.base_ranks = self._centered_ranks(self.base[np.newaxis])[0]
 
-        # Calculate the rank correlation scores
-        self.degree = spearmanr(b_degrees, m_degrees).correlation
-        self.betweenness = spearmanr(b_betweenness, m_betweenness).correlation
-        self.closeness = spearmanr(b_closeness, m_closeness).correlation
-        self.pagerank = spearmanr(b_pagerank, m_pagerank).correlation
-        self.eigenvector = spearmanr(b_eigenvector, m_eigenvector).correlation
-        self.harmonic = spearmanr(b_harmonic, m_harmonic).correlation
-        self.subgraph = spearmanr(b_subgraph, m_subgraph).correlation
-        self.load = spearmanr(b_load, m_load).correlation
+    @staticmethod
+    def _centered_ranks(matrices: np.ndarray) -> np.ndarray:
+        """
+        average ranks along the node axis of a (batch × nodes × measures) array, minus their mean
+        """
+        ranks = rankdata(matrices, axis=1)
+        return ranks - ranks.mean(axis=1, keepdims=True)
 
-    def save(self, out_file: str, network: str, percentage: int, biased_method: int):
-        with open(out_file, "a") as out:
-            out.write(
-                f"{get_time()},{network},{percentage},{self.degree},{self.betweenness},{self.closeness},{self.pagerank},{self.eigenvector},{self.harmonic},{self.subgraph},{self.load},{biased_method}\n"
+    def matrices(self, mods: list[Centralities]) -> np.ndarray:
+        """
+        the (batch × nodes × measures) array of perturbed centralities
+        """
+        return np.stack(
+            [centrality_matrix(mod, self.nodes, self.measures) for mod in mods]
+        )
+
+    def spearman(self, matrices: np.ndarray) -> np.ndarray:
+        """
+        Spearman's rank correlation (with average ranks for ties, as `scipy.stats.spearmanr`)
+
+        :param matrices: the (batch × nodes × measures) perturbed centralities
+        :return: the (batch × measures) correlations, NaN for constant columns
+        """
+        ranks = self._centered_ranks(matrices)
+        covariance = (ranks * self.base_ranks).sum(axis=1)
+        norms = np.sqrt((ranks**2).sum(axis=1) * (self.base_ranks**2).sum(axis=0))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.clip(covariance / norms, -1.0, 1.0)
+
+    def kendall(self, matrices: np.ndarray) -> np.ndarray:
+        """
+        Kendall's tau-b
+
+        unlike the other statistics this is not vectorized: it calls
+        `scipy.stats.kendalltau` per perturbed graph and measure, whose
+        O(n log n) merge sort beats counting the O(n²) node pairs in numpy
+
+        :param matrices: the (batch × nodes × measures) perturbed centralities
+        :return: the (batch × measures) correlations
+        """
+        result = np.empty((matrices.shape[0], matrices.shape[2]))
+        for b in range(matrices.shape[0]):
+            for j in range(matrices.shape[2]):
+                result[b, j] = kendalltau(self.base[:, j], matrices[b, :, j]).statistic
+        return result
+
+    def top_k_overlap(self, matrices: np.ndarray, k: int) -> np.ndarray:
+        """
+        the fraction of the k most central base nodes that are also among the
+        k most central nodes of the perturbed graph (ties are broken arbitrarily)
+
+        :param matrices: the (batch × nodes × measures) perturbed centralities
+        :param k: the number of top nodes
+        :return: the (batch × measures) overlaps
+        """
+        k = min(k, len(self.nodes))
+        n = len(self.nodes)
+        base_top = np.zeros((n, len(self.measures)), dtype=bool)
+        np.put_along_axis(
+            base_top, np.argpartition(-self.base, k - 1, axis=0)[:k], True, axis=0
+        )
+        top = np.argpartition(-matrices, k - 1, axis=1)[:, :k]
+        hits = np.take_along_axis(
+            np.broadcast_to(base_top, matrices.shape), top, axis=1
+        )
+        return hits.sum(axis=1) / k
+
+    def correlate(
+        self, mods: list[Centralities], kendall: bool = False, top_k: int | None = None
+    ) -> dict[str, np.ndarray]:
+        """
+        correlate a batch of perturbed centralities with the base centralities
+
+        :param mods: the perturbed centralities
+        :param kendall: also compute Kendall's tau
+        :param top_k: also compute the overlap of the top k nodes, at least 1
+        :return: (batch × measures) arrays keyed by statistic (`spearman`, `kendall`, `top{k}`)
+        """
+        if top_k is not None and top_k < 1:
+            raise ValueError(f"top_k must be at least 1, got {top_k}")
+        matrices = self.matrices(mods)
+        statistics = {"spearman": self.spearman(matrices)}
+        if kendall:
+            statistics["kendall"] = self.kendall(matrices)
+        if top_k is not None:
+            statistics[f"top{top_k}"] = self.top_k_overlap(matrices, top_k)
+        return statistics
+
+
+class Correlations:
+    def __init__(
+        self,
+        base: Centralities,
+        mod: Centralities,
+        g: nx.Graph,
+        engine: CorrelationEngine | None = None,
+        kendall: bool = False,
+        top_k: int | None = None,
+    ):
+        """
+        correlate the centralities of a perturbed graph with those of its base graph `g`
+
+        :param engine: an engine for `base` that is reused across iterations, created on the
+                       fly for the measures of both centralities if `None`
+        :param kendall: also compute Kendall's tau
+        :param top_k: also compute the overlap of the top k nodes
+        """
+        if engine is None:
+            engine = CorrelationEngine(
+                base, list(g.nodes()), shared_measures(base, mod)
+            )
+        statistics = engine.correlate([mod], kendall, top_k)
+        self._set(
+            engine, {statistic: values[0] for statistic, values in statistics.items()}
+        )
+
+    @classmethod
+    def batch(
+        cls,
+        engine: CorrelationEngine,
+        mods: list[Centralities],
+        kendall: bool = False,
+        top_k: int | None = None,
+    ) -> list["Correlations"]:
+        """
+        correlate the centralities of several perturbed graphs in one batch
+
+        :param engine: an engine for the base centralities
+        :param mods: the perturbed centralities
+        :param kendall: also compute Kendall's tau
+        :param top_k: also compute the overlap of the top k nodes
+        :return: the correlations of each perturbed graph, in order
+        """
+        statistics = engine.correlate(mods, kendall, top_k)
+        batch = []
+        for b in range(len(mods)):
+            correlations = cls.__new__(cls)
+            correlations._set(
+                engine,
+                {statistic: values[b] for statistic, values in statistics.items()},
             )
+            batch.append(correlations)
+        return batch
+
+    def _set(self, engine: CorrelationEngine, statistics: dict[str, np.ndarray]):
+        """
+        store the statistics of one perturbed graph, NaN for measures that are not computed
+        """
+        columns = [MEASURES.index(measure) for measure in engine.measures]
+        self.statistics = {}
+        for statistic, values in statistics.items():
+            self.statistics[statistic] = np.full(len(MEASURES), np.nan)
+            self.statistics[statistic][columns] = values
+        for measure, value in zip(MEASURES, self.statistics["spearman"]):
+            setattr(self, measure, float(value))
+
+    def save(
+        self,
+        out_file: str,
+        network: str,
+        percentage: int,
+        biased_method: int,
+        statistic: str = "spearman",
+    ):
+        values = ",".join(str(float(value)) for value in self.statistics[statistic])
+        with open(out_file, "a") as out:
+            out.write(f"{get_time()},{network},{percentage},{values},{biased_method}\n")
@@ -0,0 +1,359 @@
+import logging
+import random
+import sys
+from typing import Callable
+
+import networkx as nx
+import numpy as np
+import scipy.sparse as sp
+
+from src.sampling import (
+    DegreeRankSampler,
+    WeightedSampler,
+    sample_without_replacement,
+)
+from src.spectral import pagerank_power
+from src.utils import degree_probability_lin
+
+
+class EdgeList:
+    """
+    a graph as a table of node labels and an integer array of edges, which
+    can cheaply be shrunk by masking edges instead of copying the graph
+    """
+
+    def __init__(self, nodes: list, edges: np.ndarray):
+        self.nodes = nodes
+        self.edges = np.asarray(edges, dtype=np.int32).reshape(-1, 2)
+
+    @classmethod
+    def from_graph(cls, g: nx.Graph) -> "EdgeList":
+        nodes = list(g.nodes())
+        index = {node: i for i, node in enumerate(nodes)}
+        edges = np.fromiter(
+            (index[node] for edge in g.edges() for node in edge),
+            dtype=np.int32,
+            count=2 * g.number_of_edges(),
+        )
+        return cls(nodes, edges)
+
+    def number_of_nodes(self) -> int:
+        return len(self.nodes)
+
+    def number_of_edges(self) -> int:
+        return len(self.edges)
+
+    def degrees(self, mask: np.ndarray | None = None) -> np.ndarray:
+        """
+        the node degrees, a self-loop counts twice (as in networkx)
+
+        :param mask: the edges to keep, all if `None`
+        """
+        edges = self.edges if mask is None else self.edges[mask]
+        return np.bincount(edges.ravel(), minlength=len(self.nodes))
+
+    def adjacency(self, mask: np.ndarray | None = None) -> sp.csr_array:
+        """
+        the sparse adjacency matrix, a self-loop is a single 1 on the diagonal
+
+        :param mask: the edges to keep, all if `None`
+        """
+        edges = self.edges if mask is None else self.edges[mask]
+        loops = edges[:, 0] == edges[:, 1]
+        rows = np.concatenate([edges[:, 0], edges[~loops, 1]])
+        cols = np.concatenate([edges[:, 1], edges[~loops, 0]])
+        n = len(self.nodes)
+        return sp.csr_array(
+            (np.ones(len(rows)), (rows, cols)), shape=(n, n), dtype=float
+        )
+
+    def to_graph(self, mask: np.ndarray | None = None) -> nx.Graph:
+        """
+        build a networkx graph with all nodes (in the original order) and the kept edges
+
+        :param mask: the edges to keep, all if `None`
+        """
+        edges = self.edges if mask is None else self.edges[mask]
+        g = nx.Graph()
+        g.add_nodes_from(self.nodes)
+        labels = self.nodes
+        g.add_edges_from((labels[u], labels[v]) for u, v in edges.tolist())
+        return g
+
+
+class LiveIncidence:
+    """
+    the edges incident to every node that are still present, supporting
+    O(1) removal of an edge and O(1) uniform choice of an incident edge
+
+    every node owns a slice of `slots`, whose first `count[node]` entries
+    are its live edges; removed edges are swapped behind them
+    """
+
+    def __init__(self, edge_list: EdgeList):
+        n = edge_list.number_of_nodes()
+        m = edge_list.number_of_edges()
+        u = edge_list.edges[:, 0]
+        v = edge_list.edges[:, 1]
+        loops = u == v
+
+        # a self-loop is listed once, like in `nx.Graph.neighbors`
+        owners = np.concatenate([u, v[~loops]])
+        edge_ids = np.concatenate([np.arange(m), np.arange(m)[~loops]])
+        order = np.argsort(owners, kind="stable")
+        positions = np.empty(len(order), dtype=np.int64)
+        positions[order] = np.arange(len(order))
+
+        count = np.bincount(owners, minlength=n)
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(count, out=indptr[1:])
+        position_v = positions[:m].copy()
+        position_v[~loops] = positions[m:]
+
+        self.u = u.tolist()
+        self.v = v.tolist()
+        self.slots = edge_ids[order].tolist()
+        self.indptr = indptr.tolist()
+        self.count = count.tolist()
+        self.position_u = positions[:m].tolist()
+        self.position_v = position_v.tolist()
+
+    def edges_of(self, node: int) -> list[int]:
+        start = self.indptr[node]
+        return self.slots[start : start + self.count[node]]
+
+    def random_edge(self, node: int) -> int:
+        """
+        a uniformly chosen live edge of a node, the node must have one
+        """
+        return self.slots[self.indptr[node] + random.randrange(self.count[node])]
+
+    def other(self, edge: int, node: int) -> int:
+        """
+        the end point of an edge that is not `node`
+        """
+        return self.v[edge] if self.u[edge] == node else self.u[edge]
+
+    def remove(self, edge: int):
+        self._unlink(edge, self.u[edge])
+        if self.u[edge] != self.v[edge]:
+            self._unlink(edge, self.v[edge])
+
+    def _position(self, edge: int, node: int) -> int:
+        return self.position_u[edge] if self.u[edge] == node else self.position_v[edge]
+
+    def _set_position(self, edge: int, node: int, position: int):
+        if self.u[edge] == node:
+            self.position_u[edge] = position
+        else:
+            self.position_v[edge] = position
+
+    def _unlink(self, edge: int, node: int):
+        position = self._position(edge, node)
+        self.count[node] -= 1
+        last = self.indptr[node] + self.count[node]
+        moved = self.slots[last]
+        self.slots[position] = moved
+        self.slots[last] = edge
+        self._set_position(moved, node, position)
+        self._set_position(edge, node, last)
+
+
+def removal_order_random(edge_list: EdgeList, num_edges_to_remove: int) -> np.ndarray:
+    """
+    randomly remove a couple of edges, see `edge_removal_random`
+
+    :return: the removed edges, in removal order
+    """
+    return sample_without_replacement(edge_list.number_of_edges(), num_edges_to_remove)
+
+
+def _removal_order_sampled(
+    edge_list: EdgeList,
+    num_edges_to_remove: int,
+    sampler: WeightedSampler | DegreeRankSampler,
+    on_removal: Callable[[int, int], None],
+) -> np.ndarray:
+    """
+    repeatedly draw a node from the sampler and remove one of its edges
+    (chosen uniformly), `on_removal` gets the two end points to update the sampler
+    """
+    incidence = LiveIncidence(edge_list)
+    order = []
+    remaining = edge_list.number_of_edges()
+
+    while num_edges_to_remove > 0 and remaining > 0:
+        selected_node = sampler.sample()
+        if incidence.count[selected_node] > 0:
+            edge = incidence.random_edge(selected_node)
+            incidence.remove(edge)
+            order.append(edge)
+            remaining -= 1
+            on_removal(selected_node, incidence.other(edge, selected_node))
+            num_edges_to_remove -= 1
+        else:
+            # only weight based samplers keep nodes that ran out of edges
+            sampler.update(selected_node, 0)
+    return np.array(order, dtype=np.int64)
+
+
+def removal_order_1(
+    edge_list: EdgeList,
+    num_edges_to_remove: int,
+    degree_probability: Callable[[int], float] = degree_probability_lin,
+) -> np.ndarray:
+    """
+    edges linked to *highly* connected nodes are more likely to be removed, see `edge_removal_1`
+
+    :return: the removed edges, in removal order
+    """
+    degrees = edge_list.degrees().tolist()
+    nodes = [node for node, degree in enumerate(degrees) if degree > 0]
+    sampler = WeightedSampler(nodes, [degree_probability(degrees[n]) for n in nodes])
+
+    def on_removal(u: int, v: int):
+        degrees[u] -= 1
+        degrees[v] -= 1
+        for node in (u, v):
+            degree = degrees[node]
+            sampler.update(node, degree_probability(degree) if degree > 0 else 0)
+
+    return _removal_order_sampled(edge_list, num_edges_to_remove, sampler, on_removal)
+
+
+def removal_order_2(edge_list: EdgeList, num_edges_to_remove: int) -> np.ndarray:
+    """
+    edges linked to *lowly* connected nodes are more likely to be removed, see `edge_removal_2`
+
+    :return: the removed edges, in removal order
+    """
+    degrees = edge_list.degrees().tolist()
+    degree_max = max(degrees, default=0)
+    nodes = [node for node, degree in enumerate(degrees) if degree > 0]
+    sampler = WeightedSampler(nodes, [1 + degree_max - degrees[n] for n in nodes])
+
+    def on_removal(u: int, v: int):
+        sampler.add(u, 1)
+        sampler.add(v, 1)
+
+    return _removal_order_sampled(edge_list, num_edges_to_remove, sampler, on_removal)
+
+
+def removal_order_3(edge_list: EdgeList, num_edges_to_remove: int) -> np.ndarray:
+    """
+    edges linked to both lowly and highly connected nodes are more likely to be removed, see `edge_removal_3`
+
+    :return: the removed edges, in removal order
+    """
+    sampler = DegreeRankSampler(dict(enumerate(edge_list.degrees().tolist())))
+
+    def on_removal(u: int, v: int):
+        sampler.decrement(u)
+        sampler.decrement(v)
+
+    return _removal_order_sampled(edge_list, num_edges_to_remove, sampler, on_removal)
+
+
+def removal_order_4(edge_list: EdgeList, num_edges_to_remove: int) -> np.ndarray:
+    """
+    random numbers assigned to nodes determine the probability of edge removal, see `edge_removal_4`
+
+    unlike methods 0 and 5 the edges can't be drawn in one batch: the
+    neighbour is drawn among the edges the node has left, so the probability
+    of an edge changes with every removal
+
+    :return: the removed edges, in removal order
+    """
+    n = edge_list.number_of_nodes()
+    node_random_numbers = [random.random() for _ in range(n)]
+    sampler = WeightedSampler(range(n), node_random_numbers)
+    incidence = LiveIncidence(edge_list)
+    order = []
+    remaining = edge_list.number_of_edges()
+
+    while num_edges_to_remove > 0 and remaining > 0:
+        selected_node = sampler.sample()
+        edges = incidence.edges_of(selected_node)
+        if len(edges) > 0:
+            edge = random.choices(
+                edges,
+                weights=[
+                    node_random_numbers[incidence.other(e, selected_node)]
+                    for e in edges
+                ],
+            )[0]
+            incidence.remove(edge)
+            order.append(edge)
+            remaining -= 1
+            num_edges_to_remove -= 1
+        else:
+            sampler.update(selected_node, 0)
+    return np.array(order, dtype=np.int64)
+
+
+def removal_order_5(edge_list: EdgeList, num_edges_to_remove: int) -> np.ndarray:
+    """
+    edges are removed according to the pagerank of the adjacent nodes, see `edge_removal_5`
+
+    :return: the removed edges, in removal order
+    """
+    pr, _ = pagerank_power(edge_list.adjacency())
+    weights = pr[edge_list.edges[:, 0]] + pr[edge_list.edges[:, 1]]
+    return sample_without_replacement(
+        edge_list.number_of_edges(), num_edges_to_remove, weights
+    )
+
+
+def removal_order(
+    edge_list: EdgeList, num_edges_to_remove: int, method: int
+) -> np.ndarray:
+    """
+    the edges a method removes, in removal order
+
+    all methods remove edges one after another, so the first k edges of an
+    order for n > k edges are distributed like an order for k edges; one
+    order thus serves all smaller numbers of removed edges (nested removals)
+
+    :param edge_list: the graph
+    :param num_edges_to_remove: the number of edges to remove
+    :param method: the removal method, see `apply_edge_removal`
+    :return: the indices of the removed edges
+    """
+    if num_edges_to_remove <= 0:
+        return np.zeros(0, dtype=np.int64)
+    match method:
+        case 0:
+            return removal_order_random(edge_list, num_edges_to_remove)
+        case 1:
+            return removal_order_1(
+                edge_list, num_edges_to_remove, degree_probability_lin
+            )
+        case 2:
+            return removal_order_2(edge_list, num_edges_to_remove)
+        case 3:
+            return removal_order_3(edge_list, num_edges_to_remove)
+        case 4:
+            return removal_order_4(edge_list, num_edges_to_remove)
+        case 5:
+            return removal_order_5(edge_list, num_edges_to_remove)
+        case _:
+            logging.error(f"unknown edge removal method {method}")
+            sys.exit(1)
+
+
+def keep_mask(edge_list: EdgeList, removed: np.ndarray) -> np.ndarray:
+    """
+    the mask of edges to keep after removing some edges
+    """
+    keep = np.ones(edge_list.number_of_edges(), dtype=bool)
+    keep[removed] = False
+    return keep
+
+
+def apply_edge_removal_mask(
+    edge_list: EdgeList, num_edges_to_remove: int, method: int
+) -> np.ndarray:
+    """
+    like `apply_edge_removal`, but returns the mask of edges to keep instead of a shrunk copy
+    """
+    return keep_mask(edge_list, removal_order(edge_list, num_edges_to_remove, method))
@@ -0,0 +1,107 @@
+import networkx as nx
+import numpy as np
+import scipy.sparse as sp
+
+
+class CompactGraph:
+    """
+    an undirected graph as CSR arrays over int32 node ids and one table of
+    node labels, a fraction of the size of a networkx graph
+
+    a self-loop is listed once among the neighbours of its node (as in
+    `nx.Graph.neighbors`), but counts twice for its degree (as in `nx.Graph.degree`)
+    """
+
+    def __init__(self, labels: list, edges: np.ndarray):
+        """
+        :param labels: the node labels, node `i` is `labels[i]`
+        :param edges: the (m × 2) array of node ids of the edges, without duplicates
+        """
+        edges = np.asarray(edges, dtype=np.int32).reshape(-1, 2)
+        n = len(labels)
+        u = edges[:, 0]
+        v = edges[:, 1]
+        loops = u == v
+        rows = np.concatenate([u, v[~loops]])
+        cols = np.concatenate([v, u[~loops]])
+        order = np.argsort(rows, kind="stable")
+
+        self.labels = labels
+        self.indices = cols[order]
+        self.indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n), out=self.indptr[1:])
+        self.degree = np.bincount(edges.ravel(), minlength=n)
+        self.m = len(edges)
+        self._index: dict | None = None
+
+    @classmethod
+    def from_edge_list(
+        cls, edge_list, mask: np.ndarray | None = None
+    ) -> "CompactGraph":
+        """
+        the graph of an `EdgeList`, sharing its label table
+
+        :param mask: the edges to keep, all if `None`
+        """
+        edges = edge_list.edges if mask is None else edge_list.edges[mask]
+        return cls(edge_list.nodes, edges)
+
+    @classmethod
+    def from_networkx(cls, g: nx.Graph) -> "CompactGraph":
+        labels = list(g.nodes())
+        index = {node: i for i, node in enumerate(labels)}
+        edges = np.fromiter(
+            (index[node] for edge in g.edges() for node in edge),
+            dtype=np.int32,
+            count=2 * g.number_of_edges(),
+        )
+        return cls(labels, edges)
+
+    def nodes(self) -> list:
+        """
+        the node labels in id order, like `nx.Graph.nodes`
+        """
+        return self.labels
+
+    def number_of_nodes(self) -> int:
+        return len(self.labels)
+
+    def number_of_edges(self) -> int:
+        return self.m
+
+    def index(self) -> dict:
+        """
+        the id of every node label
+        """
+        if self._index is None:
+            self._index = {node: i for i, node in enumerate(self.labels)}
+        return self._index
+
+    def edges(self) -> np.ndarray:
+        """
+        the (m × 2) array of edges, every edge as (smaller id, larger id)
+        """
+        rows = np.repeat(
+            np.arange(len(self.labels), dtype=np.int32), np.diff(self.indptr)
+        )
+        upper = rows <= self.indices
+        return np.stack([rows[upper], self.indices[upper]], axis=1)
+
+    def csr(self) -> sp.csr_array:
+        """
+        the sparse adjacency matrix, a self-loop is a single 1 on the diagonal
+        """
+        n = len(self.labels)
+        return sp.csr_array(
+            (np.ones(len(self.indices)), self.indices, self.indptr), shape=(n, n)
+        )
+
+    def to_networkx(self) -> nx.Graph:
+        """
+        build a networkx graph, for algorithms that need one
+        """
+        g = nx.Graph()
+        g.add_nodes_from(self.labels)
+        labels = self.labels
+        g.add_edges_from((labels[u], labels[v]) for u, v in self.edges().tolist())
+        return g
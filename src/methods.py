@@ -6,6 +6,11 @@ import logging
 import sys
 import numpy as np
 
+from src.sampling import (
+    DegreeRankSampler,
+    WeightedSampler,
+    sample_without_replacement,
+)
 from src.utils import (
     degree_probability_lin,
     degree_probability_exp,
@@ -18,10 +23,9 @@ def edge_removal_random(g: nx.Graph, num_edges_to_remove: int) -> nx.Graph:
     randomly remove a couple of edges from the graph
     """
     g_copy = g.copy()
-    edges_to_remove = random.sample(
-        list(g_copy.edges()), min(num_edges_to_remove, g_copy.number_of_edges())
-    )
-    g_copy.remove_edges_from(edges_to_remove)
+    all_edges = list(g_copy.edges())
+    edge_indices = sample_without_replacement(len(all_edges), num_edges_to_remove)
+    g_copy.remove_edges_from(all_edges[i] for i in edge_indices)
     return g_copy
 
 
@@ -37,7 +41,9 @@ def edge_removal_1_degree_probabilities(
 
 
 def edge_removal_1(
-    g: nx.Graph, num_edges_to_remove: int, degree_probability: Callable[[int], float]
+    g: nx.Graph,
+    num_edges_to_remove: int,
+    degree_probability: Callable[[int], float] = degree_probability_lin,
 ) -> nx.Graph:
     """
     biased edge removal approach #1:
@@ -49,25 +55,27 @@ def edge_removal_1(
     degree_probabilities = edge_removal_1_degree_probabilities(
         g_copy, degree_probability
     )
+    sampler = WeightedSampler(
+        degree_probabilities.keys(), degree_probabilities.values()
+    )
 
     # Select edges to remove based on biased probabilities
     while num_edges_to_remove > 0 and g_copy.number_of_edges() > 0:
-        selected_node = random.choices(
-            list(degree_probabilities.keys()),
-            weights=list(degree_probabilities.values()),
-        )[0]
+        selected_node = sampler.sample()
         neighbor_nodes = list(g_copy.neighbors(selected_node))
         if len(neighbor_nodes) > 0:
             selected_neighbor = random.choice(neighbor_nodes)
 
             # Remove the edge from the copy of the graph
             g_copy.remove_edge(selected_node, selected_neighbor)
-            degree_probabilities = edge_removal_1_degree_probabilities(
-                g_copy, degree_probability
-            )
+
+            # only the degrees of the two end points changed
+            for node in (selected_node, selected_neighbor):
+                degree = g_copy.degree(node)
+                sampler.update(node, degree_probability(degree) if degree > 0 else 0)
             num_edges_to_remove -= 1
         else:
-            degree_probabilities[selected_node] = 0
+            sampler.update(selected_node, 0)
     return g_copy
 
 
@@ -86,26 +94,26 @@ def edge_removal_2(g: nx.Graph, num_edges_to_remove: int) -> nx.Graph:
         for node, degree in node_degrees.items()
         if degree > 0
     }
+    sampler = WeightedSampler(
+        degree_probabilities.keys(), degree_probabilities.values()
+    )
 
     # Select edges to remove based on biased probabilities
     while num_edges_to_remove > 0 and g_copy.number_of_edges() > 0:
-        selected_node = random.choices(
-            list(degree_probabilities.keys()),
-            weights=list(degree_probabilities.values()),
-        )[0]
+        selected_node = sampler.sample()
         neighbor_nodes = list(g_copy.neighbors(selected_node))
         if len(neighbor_nodes) > 0:
             selected_neighbor = random.choice(neighbor_nodes)
 
             # Update the degree probabilities after removing the edge
-            degree_probabilities[selected_node] += 1
-            degree_probabilities[selected_neighbor] += 1
+            sampler.add(selected_node, 1)
+            sampler.add(selected_neighbor, 1)
 
             # Remove the edge from the copy of the graph
             g_copy.remove_edge(selected_node, selected_neighbor)
             num_edges_to_remove -= 1
         else:
-            degree_probabilities[selected_node] = 0
+            sampler.update(selected_node, 0)
     return g_copy
 
 
@@ -132,25 +140,20 @@ def edge_removal_3(g: nx.Graph, num_edges_to_remove: int) -> nx.Graph:
     edges linked to both lowly and highly connected nodes are more likely to be removed
     """
     g_copy = g.copy()
-    degree_probabilities = edge_removal_3_degree_probabilities(g_copy)
+    # draws like `edge_removal_3_degree_probabilities` on the current graph,
+    # but only moves the two end points of a removed edge in the ranking
+    sampler = DegreeRankSampler(dict(nx.degree(g_copy)))
 
     while num_edges_to_remove > 0 and g_copy.number_of_edges() > 0:
-        selected_node = random.choices(
-            list(degree_probabilities.keys()),
-            weights=list(degree_probabilities.values()),
-        )[0]
+        selected_node = sampler.sample()
         neighbor_nodes = list(g_copy.neighbors(selected_node))
-        if len(neighbor_nodes) > 0:
-            selected_neighbor = random.choice(neighbor_nodes)
-
-            # not live-updating the probabilities, as it's too hard to relatively adjust sorting etc..
+        selected_neighbor = random.choice(neighbor_nodes)
 
-            # Remove the edge from the copy of the graph
-            g_copy.remove_edge(selected_node, selected_neighbor)
-            degree_probabilities = edge_removal_3_degree_probabilities(g_copy)
-            num_edges_to_remove -= 1
-        else:
-            degree_probabilities[selected_node] = 0
+        # Remove the edge from the copy of the graph
+        g_copy.remove_edge(selected_node, selected_neighbor)
+        sampler.decrement(selected_node)
+        sampler.decrement(selected_neighbor)
+        num_edges_to_remove -= 1
     return g_copy
 
 
@@ -163,12 +166,10 @@ def edge_removal_4(g: nx.Graph, num_edges_to_remove: int) -> nx.Graph:
 
     # Assign random numbers to each node
     node_random_numbers = {node: random.random() for node in g_copy.nodes()}
+    sampler = WeightedSampler(node_random_numbers.keys(), node_random_numbers.values())
 
     while num_edges_to_remove > 0 and g_copy.number_of_edges() > 0:
-        selected_node = random.choices(
-            list(node_random_numbers.keys()),
-            weights=list(node_random_numbers.values()),
-        )[0]
+        selected_node = sampler.sample()
         neighbor_nodes = list(g_copy.neighbors(selected_node))
         if len(neighbor_nodes) > 0:
             selected_neighbor = random.choices(
@@ -178,7 +179,7 @@ def edge_removal_4(g: nx.Graph, num_edges_to_remove: int) -> nx.Graph:
             g_copy.remove_edge(selected_node, selected_neighbor)
             num_edges_to_remove -= 1
         else:
-            del node_random_numbers[selected_node]
+            sampler.update(selected_node, 0)
 
     return g_copy
 
@@ -192,14 +193,11 @@ def edge_removal_5(g: nx.Graph, num_edges_to_remove: int) -> nx.Graph:
     all_edges = list(g_copy.edges())
 
     pr = nx.pagerank(g_copy)
-    probabilities = np.array([pr[u] + pr[v] for u, v in all_edges], dtype=float)
-    probabilities /= probabilities.sum()
-
-    edge_indices = np.random.choice(
-        len(all_edges),
-        size=min(g_copy.number_of_edges(), num_edges_to_remove),
-        replace=False,
-        p=probabilities,
+    weights = np.array([pr[u] + pr[v] for u, v in all_edges], dtype=float)
+
+    # distributed like np.random.choice(..., replace=False, p=weights / weights.sum())
+    edge_indices = sample_without_replacement(
+        len(all_edges), num_edges_to_remove, weights
     )
 
     for i in edge_indices:
@@ -1,40 +1,124 @@
 import pandas as pd
 import networkx as nx
+import numpy as np
 import logging
 import sys
+from functools import partial
 
+from src.cache import cached_edge_list, cached_generated, cached_graph
+from src.edgelist import EdgeList
 
-def read_string_db() -> nx.Graph:
-    df1 = pd.read_csv("STRING-4932.protein.links.v11.5.txt", delimiter="\t")
+# bump whenever the loaders change the graphs they produce, invalidates cached networks
+LOADER_VERSION = 3
 
-    df1[["protein1", "protein2", "combined_score"]] = df1[
-        "protein1 protein2 combined_score"
-    ].str.split(" ", expand=True)
-    df1["protein1"] = df1["protein1"].str.replace("4932.", "", regex=False)
-    df1["protein2"] = df1["protein2"].str.replace("4932.", "", regex=False)
 
-    df1 = df1.drop("protein1 protein2 combined_score", axis=1)
+class UniqueEdges:
+    """
+    collect undirected edges between node labels chunk by chunk, keeping only
+    the first occurrence of every edge regardless of its direction
 
-    # Drop duplicates by considering the direction of the edge
-    df1["sorted_nodes"] = df1.apply(
-        lambda row: tuple(sorted([row["protein1"], row["protein2"]])), axis=1
-    )
-    df1 = df1.drop_duplicates(subset=["sorted_nodes"], keep="first").drop(
-        columns=["sorted_nodes"]
-    )
-    df1 = df1.sort_values(by="combined_score", ascending=False)
+    the memory is bounded by the kept edges and labels, every chunk is only
+    needed while it is added
+    """
 
-    # Convert the 'score' column to a numeric type
-    df1["combined_score"] = pd.to_numeric(df1["combined_score"])
+    def __init__(self, strip: str | None = None):
+        """
+        :param strip: a substring to remove from all labels, e.g. an organism prefix;
+                      labels that only differed in the stripped part are merged
+        """
+        self.strip = strip
+        # the id of every label, in the order of first occurrence
+        self.index: dict = {}
+        # the sorted keys of the kept edges
+        self.seen = np.zeros(0, dtype=np.int64)
+        self.chunks: list[np.ndarray] = []
+
+    def add(self, protein1: pd.Series, protein2: pd.Series):
+        """
+        add the edges of a chunk
+
+        :param protein1: the labels of the first end points
+        :param protein2: the labels of the second end points
+        """
+        n = len(protein1)
+        codes, labels = pd.factorize(
+            pd.concat([protein1, protein2], ignore_index=True), sort=False
+        )
+        if self.strip:
+            # strip the (few) distinct labels of the chunk instead of every row
+            labels = labels.str.replace(self.strip, "", regex=False)
+        ids = np.fromiter(
+            (self.index.setdefault(label, len(self.index)) for label in labels),
+            dtype=np.int64,
+            count=len(labels),
+        )
+        # factorize codes missing labels as -1, drop the rows lacking an end point
+        present = (codes[:n] >= 0) & (codes[n:] >= 0)
+        if not present.all():
+            logging.warning(
+                f"dropping {n - int(present.sum())} edges with a missing end point"
+            )
+        source, target = ids[codes[:n][present]], ids[codes[n:][present]]
+
+        keys = (np.minimum(source, target) << 32) | np.maximum(source, target)
+        keys, first = np.unique(keys, return_index=True)
+        new = ~np.isin(keys, self.seen, assume_unique=True)
+        self.seen = np.union1d(self.seen, keys[new])
+        first = np.sort(first[new])
+        self.chunks.append(np.stack([source[first], target[first]], axis=1))
+
+    def to_graph(self) -> nx.Graph:
+        """
+        build the graph of the kept edges, in the order they were first added
+        """
+        g = nx.Graph()
+        labels = np.asarray(list(self.index), dtype=object)
+        for edges in self.chunks:
+            g.add_edges_from(zip(labels[edges[:, 0]], labels[edges[:, 1]]))
+        return g
+
+
+def graph_from_columns(
+    protein1: pd.Series, protein2: pd.Series, strip: str | None = None
+) -> nx.Graph:
+    """
+    build an undirected graph from two columns of node labels, keeping only
+    the first occurrence of every edge regardless of its direction
 
-    # Filter the dataframe to include only scores above a certain threshold
-    threshold = 150
-    original_df = df1[df1["combined_score"] > threshold]
+    :param protein1: the labels of the first end points
+    :param protein2: the labels of the second end points
+    :param strip: a substring to remove from all labels, e.g. an organism prefix
+    :return: the graph
+    """
+    edges = UniqueEdges(strip)
+    edges.add(protein1, protein2)
+    return edges.to_graph()
 
-    g = nx.Graph()
 
-    for index, row in original_df.iterrows():
-        g.add_edge(row["protein1"], row["protein2"])
+def read_string_db(
+    file: str = "STRING-4932.protein.links.v11.5.txt",
+    threshold: int = 150,
+    chunksize: int = 1 << 20,
+) -> nx.Graph:
+    """
+    read the STRING links file in chunks, filtering every chunk on its
+    score and deduplicating its edges before the next one is read
+
+    :param threshold: keep the links with a combined score above it
+    :param chunksize: the number of lines per chunk
+    """
+    edges = UniqueEdges(strip="4932.")
+    with pd.read_csv(
+        file,
+        sep=" ",
+        dtype={"protein1": str, "protein2": str, "combined_score": np.int64},
+        engine="c",
+        chunksize=chunksize,
+    ) as chunks:
+        for df in chunks:
+            df = df[df["combined_score"] > threshold]
+            edges.add(df["protein1"], df["protein2"])
+    g = edges.to_graph()
 
     logging.info(
         f"read STRING db with {g.number_of_nodes()} nodes and {g.number_of_edges()} edges"
@@ -42,9 +126,11 @@ def read_string_db() -> nx.Graph:
     return g
 
 
-def read_biogrid_db() -> nx.Graph:
+def read_biogrid_db(
+    file: str = "BIOGRID-ORGANISM-Saccharomyces_cerevisiae_S288c-4.4.215.tab3.csv",
+) -> nx.Graph:
     df = pd.read_csv(
-        "BIOGRID-ORGANISM-Saccharomyces_cerevisiae_S288c-4.4.215.tab3.csv",
+        file,
         usecols=[
             "Systematic Name Interactor A",
             "Systematic Name Interactor B",
@@ -56,19 +142,8 @@ def read_biogrid_db() -> nx.Graph:
         }
     )
 
-    # Drop duplicates by considering the direction of the edge
-    df["sorted_nodes"] = df.apply(
-        lambda row: tuple(sorted([row["protein1"], row["protein2"]])), axis=1
-    )
-    df1 = df.drop_duplicates(subset=["sorted_nodes"], keep="first").drop(
-        columns=["sorted_nodes"]
-    )
-
     # Creation of network for Biogrid
-    g = nx.Graph()
-
-    for index, row in df1.iterrows():
-        g.add_edge(row["protein1"], row["protein2"])
+    g = graph_from_columns(df["protein1"], df["protein2"])
 
     logging.info(
         f"read BIOGRID db with {g.number_of_nodes()} nodes and {g.number_of_edges()} edges"
@@ -78,10 +153,7 @@ def read_biogrid_db() -> nx.Graph:
 
 def read_csv(file: str) -> nx.Graph:
     df = pd.read_csv(file)
-    g = nx.Graph()
-
-    for index, row in df.iterrows():
-        g.add_edge(row["protein1"], row["protein2"])
+    g = graph_from_columns(df["protein1"], df["protein2"])
 
     logging.info(
         f"read network from {file} with {g.number_of_nodes()} nodes and {g.number_of_edges()} edges"
@@ -89,74 +161,158 @@ def read_csv(file: str) -> nx.Graph:
     return g
 
 
-def generate_er(nodes: int, edge_probability: float) -> nx.Graph:
+def generate_er(
+    nodes: int, edge_probability: float, seed: int | None = None
+) -> nx.Graph:
     """
     generate a Erdős-Rényi network
+
+    :param seed: the seed of the generator, the global random state if `None`
     """
-    g = nx.erdos_renyi_graph(nodes, edge_probability)
+    g = nx.erdos_renyi_graph(nodes, edge_probability, seed=seed)
     logging.info(
         f"generated Erdős-Rényi network with {g.number_of_nodes()} nodes and {g.number_of_edges()} edges"
     )
     return g
 
 
-def generate_barabasi(nodes: int, edges: int) -> nx.Graph:
+def generate_barabasi(nodes: int, edges: int, seed: int | None = None) -> nx.Graph:
     """
     generate a Barabási-Albert network
+
+    :param seed: the seed of the generator, the global random state if `None`
     """
-    g = nx.barabasi_albert_graph(nodes, edges)
+    g = nx.barabasi_albert_graph(nodes, edges, seed=seed)
     logging.info(
         f"generated Barabási-Albert network with {g.number_of_nodes()} nodes and {g.number_of_edges()} edges"
     )
     return g
 
 
-def generate_ws(nodes: int, joins: int, rewiring_probability: float) -> nx.Graph:
+def generate_ws(
+    nodes: int, joins: int, rewiring_probability: float, seed: int | None = None
+) -> nx.Graph:
     """
     generate a Watts-Strogatz network
+
+    :param seed: the seed of the generator, the global random state if `None`
     """
-    g = nx.watts_strogatz_graph(nodes, joins, rewiring_probability)
+    g = nx.watts_strogatz_graph(nodes, joins, rewiring_probability, seed=seed)
     logging.info(
         f"generated Watts-Strogatz network with {g.number_of_nodes()} nodes and {g.number_of_edges()} edges"
     )
     return g
 
 
-def get_graph(network: str) -> tuple[nx.Graph, bool]:
-    if network == "STRING-4932.protein.links.v11.5.txt":
-        return read_string_db(), False
-    if network == "BIOGRID-ORGANISM-Saccharomyces_cerevisiae_S288c-4.4.215.tab3.csv":
-        return read_biogrid_db(), False
-
-    if network == "iMM904-gemtracted-MetabolicNetwork.csv":
-        return read_csv(network), False
-    if network == "iMM904-gemtracted-ReactionNetwork.csv":
-        return read_csv(network), False
-    if network == "CPDB_Yeast_PPI.csv":
-        return read_csv(network), False
-    if network == "YeastGRNNetwork.csv":
-        return read_csv(network), False
-
-    if network == "ER-1000-0.1":
-        return generate_er(1000, 0.1), True
-    if network == "ER-1000-0.2":
-        return generate_er(1000, 0.2), True
-    if network == "ER-1000-0.5":
-        return generate_er(1000, 0.5), True
-
-    if network == "Barabasi-1000-50":
-        return generate_barabasi(1000, 50), True
-    if network == "Barabasi-1000-100":
-        return generate_barabasi(1000, 100), True
-    if network == "Barabasi-1000-500":
-        return generate_barabasi(1000, 500), True
-
-    if network == "WS-1000-100-0.01":
-        return generate_ws(1000, 100, 0.1), True
-    if network == "WS-1000-200-0.01":
-        return generate_ws(1000, 200, 0.1), True
-    if network == "WS-1000-500-0.01":
-        return generate_ws(1000, 500, 0.1), True
+# the generated networks, as generator and parameters
+GENERATED = {
+    "ER-1000-0.1": (generate_er, (1000, 0.1)),
+    "ER-1000-0.2": (generate_er, (1000, 0.2)),
+    "ER-1000-0.5": (generate_er, (1000, 0.5)),
+    "Barabasi-1000-50": (generate_barabasi, (1000, 50)),
+    "Barabasi-1000-100": (generate_barabasi, (1000, 100)),
+    "Barabasi-1000-500": (generate_barabasi, (1000, 500)),
+    "WS-1000-100-0.01": (generate_ws, (1000, 100, 0.1)),
+    "WS-1000-200-0.01": (generate_ws, (1000, 200, 0.1)),
+    "WS-1000-500-0.01": (generate_ws, (1000, 500, 0.1)),
+}
+
+
+def generated_key(network: str, seed: int) -> dict:
+    """
+    identify a generated network in the cache, by its generator, parameters and seed
+    """
+    generator, parameters = GENERATED[network]
+    return {
+        "network": network,
+        "generator": generator.__name__,
+        "parameters": list(parameters),
+        "seed": seed,
+        "version": LOADER_VERSION,
+        "networkx": nx.__version__,
+    }
+
+
+def _loaders(network: str) -> dict:
+    """
+    the parsers of the network files
+    """
+    return {
+        "STRING-4932.protein.links.v11.5.txt": read_string_db,
+        "BIOGRID-ORGANISM-Saccharomyces_cerevisiae_S288c-4.4.215.tab3.csv": read_biogrid_db,
+        "iMM904-gemtracted-MetabolicNetwork.csv": partial(read_csv, network),
+        "iMM904-gemtracted-ReactionNetwork.csv": partial(read_csv, network),
+        "CPDB_Yeast_PPI.csv": partial(read_csv, network),
+        "YeastGRNNetwork.csv": partial(read_csv, network),
+    }
+
+
+def get_graph(
+    network: str,
+    cache_dir: str | None = None,
+    hash_content: bool = False,
+    seed: int | None = None,
+) -> tuple[nx.Graph, bool]:
+    """
+    read or generate a network
+
+    :param network: the name of the network
+    :param cache_dir: cache parsed network files in this directory, no caching if `None`
+    :param hash_content: identify cached files by their content hash instead of size and modification time
+    :param seed: the seed of a generated network, generated networks are
+                 only cached (by generator, parameters and seed) with a seed
+    :return: the graph and whether it is randomly generated
+    """
+    loaders = _loaders(network)
+    if network in loaders:
+        if cache_dir is None:
+            return loaders[network](), False
+        return (
+            cached_graph(
+                network, loaders[network], cache_dir, LOADER_VERSION, hash_content
+            ),
+            False,
+        )
+
+    if network in GENERATED:
+        if seed is None or cache_dir is None:
+            generator, parameters = GENERATED[network]
+            return generator(*parameters, seed=seed), True
+        # the same graph whether it is generated or read from the cache
+        edge_list, _ = get_edge_list(network, cache_dir, hash_content, seed)
+        return edge_list.to_graph(), True
 
     logging.error(f"do not understand network {network}")
     sys.exit(1)
+
+
+def get_edge_list(
+    network: str,
+    cache_dir: str | None = None,
+    hash_content: bool = False,
+    seed: int | None = None,
+) -> tuple[EdgeList, bool]:
+    """
+    read or generate a network as an edge list, cached network files are
+    read without building a networkx graph, see `get_graph`
+
+    :return: the edge list and whether it is randomly generated
+    """
+    loaders = _loaders(network)
+    if network in loaders and cache_dir is not None:
+        return (
+            cached_edge_list(
+                network, loaders[network], cache_dir, LOADER_VERSION, hash_content
+            ),
+            False,
+        )
+
+    if network in GENERATED:
+        generator, parameters = GENERATED[network]
+        generate = partial(generator, *parameters, seed=seed)
+        if seed is None or cache_dir is None:
+            return EdgeList.from_graph(generate()), True
+        return cached_generated(generated_key(network, seed), generate, cache_dir), True
+
+    g, network_random = get_graph(network, cache_dir, hash_content)
+    return EdgeList.from_graph(g), network_random
@@ -0,0 +1,252 @@
+import math
+import random
+
+import networkx as nx
+
+from src.graph import CompactGraph
+
+
+def adjacency(g: nx.Graph | CompactGraph) -> tuple[list, list[int], list[int]]:
+    """
+    translate a graph into an integer indexed adjacency (CSR layout)
+
+    :param g: the graph
+    :return: the node labels, the index pointers and the neighbour indices
+    """
+    if isinstance(g, CompactGraph):
+        return g.nodes(), g.indptr.tolist(), g.indices.tolist()
+    nodes = list(g.nodes())
+    index = {node: i for i, node in enumerate(nodes)}
+    indptr = [0]
+    indices = []
+    for node in nodes:
+        indices.extend(index[neighbor] for neighbor in g.neighbors(node))
+        indptr.append(len(indices))
+    return nodes, indptr, indices
+
+
+def sweep(
+    indptr: list[int],
+    indices: list[int],
+    sources,
+    pivots: set[int] | None = None,
+    distances: bool = True,
+) -> tuple[list[float], list[float], list[float], list[float]]:
+    """
+    run a single BFS per source node and collect the contributions of these
+    sources to betweenness, load, closeness and harmonic centrality
+
+    the returned values are raw (not yet rescaled) sums, so sweeps over
+    disjoint sets of sources can simply be added up
+
+    :param indptr: index pointers of the CSR adjacency
+    :param indices: neighbour indices of the CSR adjacency
+    :param sources: the source node indices to process
+    :param pivots: if given, only these sources contribute to betweenness and load,
+                   all other sources just run a plain BFS for closeness and harmonic
+    :param distances: compute closeness and harmonic centrality, without them
+                      only the pivots are swept and both stay zero
+    :return: raw betweenness, load, closeness and harmonic values
+    """
+    n = len(indptr) - 1
+    betweenness = [0.0] * n
+    load = [0.0] * n
+    closeness = [0.0] * n
+    harmonic = [0.0] * n
+
+    for s in sources:
+        if pivots is not None and not distances and s not in pivots:
+            continue
+        dist = [-1] * n
+        dist[s] = 0
+        order = [s]
+        i = 0
+
+        if pivots is not None and s not in pivots:
+            # plain breadth first search, just the distances
+            while i < len(order):
+                v = order[i]
+                i += 1
+                dv = dist[v] + 1
+                for w in indices[indptr[v] : indptr[v + 1]]:
+                    if dist[w] < 0:
+                        dist[w] = dv
+                        order.append(w)
+            pred = None
+        else:
+            # breadth first search counting shortest paths
+            sigma = [0.0] * n
+            sigma[s] = 1.0
+            pred = {s: []}
+            while i < len(order):
+                v = order[i]
+                i += 1
+                dv = dist[v] + 1
+                sv = sigma[v]
+                for w in indices[indptr[v] : indptr[v + 1]]:
+                    dw = dist[w]
+                    if dw < 0:
+                        dist[w] = dv
+                        sigma[w] = sv
+                        pred[w] = [v]
+                        order.append(w)
+                    elif dw == dv:
+                        sigma[w] += sv
+                        pred[w].append(v)
+
+        # closeness and harmonic only need the distances
+        if distances:
+            reached = len(order)
+            total_distance = 0
+            inverse_distance = 0.0
+            for v in order[1:]:
+                total_distance += dist[v]
+                inverse_distance += 1 / dist[v]
+            if total_distance > 0 and n > 1:
+                closeness[s] = (reached - 1.0) / total_distance
+                closeness[s] *= (reached - 1.0) / (n - 1)
+            harmonic[s] = inverse_distance
+
+        if pred is None:
+            continue
+
+        # betweenness (Brandes) and load (Newman) share the backward pass
+        delta = dict.fromkeys(order, 0.0)
+        between = dict.fromkeys(order, 1.0)
+        for w in reversed(order):
+            if w == s:
+                continue
+            coeff = (1.0 + delta[w]) / sigma[w]
+            preds = pred[w]
+            share = between[w] / len(preds)
+            for v in preds:
+                delta[v] += sigma[v] * coeff
+                if v != s:
+                    between[v] += share
+            betweenness[w] += delta[w]
+            load[w] += between[w] - 1
+
+    return betweenness, load, closeness, harmonic
+
+
+def rescale(values: list[float], n: int, pivots: set[int] | None = None) -> list[float]:
+    """
+    normalise raw betweenness or load values like networkx does
+
+    with sampled pivots the pivots themselves can't lie on their own paths,
+    so they are extrapolated from one sample less (as in networkx)
+
+    :param values: the raw values
+    :param n: the number of nodes in the graph
+    :param pivots: the sampled source nodes, `None` if all nodes were sources
+    :return: the normalised values
+    """
+    if n <= 2:
+        return values
+    if pivots is None:
+        scale = 1 / ((n - 1) * (n - 2))
+        return [value * scale for value in values]
+    k = len(pivots)
+    scale_pivot = 1 / ((k - 1) * (n - 2)) if k > 1 else math.nan
+    scale_other = 1 / (k * (n - 2))
+    return [
+        value * (scale_pivot if v in pivots else scale_other)
+        for v, value in enumerate(values)
+    ]
+
+
+def pivot_count(n: int, error: float, confidence: float) -> int:
+    """
+    number of pivots needed so that, with the given confidence, no normalised
+    betweenness or load value deviates by more than `error`
+
+    every pivot contributes a value in [0, 1] to the normalised estimate, so
+    Hoeffding's inequality with a union bound over all nodes gives
+    k >= ln(2n / (1 - confidence)) / (2 error^2)
+
+    :param n: the number of nodes in the graph
+    :param error: the targeted absolute error
+    :param confidence: the probability that the error bound holds
+    :return: the number of pivots, at most `n`
+    """
+    if error <= 0:
+        raise ValueError(f"the pivot error must be positive, not {error}")
+    if not 0 < confidence < 1:
+        raise ValueError(f"the confidence must lie in (0, 1), not {confidence}")
+    if n == 0:
+        return 0
+    k = math.ceil(math.log(2 * n / (1 - confidence)) / (2 * error**2))
+    return min(n, k)
+
+
+def pivot_error(n: int, k: int, confidence: float) -> float:
+    """
+    the error bound that holds with the given confidence when sampling `k`
+    out of `n` nodes as pivots, the inverse of `pivot_count`
+
+    :return: the absolute error bound, `0` if all nodes are pivots
+    """
+    if k >= n:
+        return 0.0
+    return math.sqrt(math.log(2 * n / (1 - confidence)) / (2 * k))
+
+
+def sample_pivots(n: int, error: float, confidence: float) -> set[int] | None:
+    """
+    sample the pivots for the given error and confidence
+
+    :return: the sampled node indices, `None` if all nodes are needed anyway
+    """
+    k = pivot_count(n, error, confidence)
+    if k >= n:
+        return None
+    return set(random.sample(range(n), k))
+
+
+def merge(partials: list[tuple]) -> tuple[list[float], ...]:
+    """
+    add up the raw results of sweeps over disjoint sets of sources
+
+    :param partials: the results of several calls to `sweep`
+    :return: the summed raw betweenness, load, closeness and harmonic values
+    """
+    return tuple(
+        [sum(values) for values in zip(*measure)] for measure in zip(*partials)
+    )
+
+
+def finalize(
+    nodes: list, betweenness, load, closeness, harmonic, pivots: set[int] | None = None
+) -> tuple[dict, dict, dict, dict]:
+    """
+    turn raw sweep results into centrality dicts keyed by node
+
+    :param nodes: the node labels in index order
+    :param pivots: the pivots of an approximate sweep
+    :return: betweenness, load, closeness and harmonic centrality keyed by node
+    """
+    n = len(nodes)
+    return (
+        dict(zip(nodes, rescale(betweenness, n, pivots))),
+        dict(zip(nodes, rescale(load, n, pivots))),
+        dict(zip(nodes, closeness)),
+        dict(zip(nodes, harmonic)),
+    )
+
+
+def path_centralities(
+    g: nx.Graph | CompactGraph, pivots: set[int] | None = None, distances: bool = True
+) -> tuple[dict, dict, dict, dict]:
+    """
+    compute betweenness, load, closeness and harmonic centrality with just
+    one shortest path traversal per node
+
+    :param g: the graph
+    :param pivots: indices of the nodes (in `g.nodes()` order) to estimate
+                   betweenness and load from, `None` for exact values
+    :param distances: compute closeness and harmonic centrality, see `sweep`
+    :return: betweenness, load, closeness and harmonic centrality keyed by node
+    """
+    nodes, indptr, indices = adjacency(g)
+    raw = sweep(indptr, indices, range(len(nodes)), pivots, distances)
+    return finalize(nodes, *raw, pivots=pivots)
@@ -0,0 +1,246 @@
+import json
+import os
+import platform
+import sqlite3
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+import scipy
+
+from src.centrality import MEASURES
+from src.correlation import Correlations
+from src.utils import get_time
+
+HOST = os.uname()[1]
+
+
+def output_prefix(out_dir: str, network: str, percentage: int, method: int) -> str:
+    """
+    the common prefix of the output files of a run on this host
+    """
+    return f"{out_dir}/{network}--{percentage}--method-{method}--{HOST}"
+
+
+def library_versions() -> dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "networkx": nx.__version__,
+        "numpy": np.__version__,
+        "scipy": scipy.__version__,
+        "pandas": pd.__version__,
+    }
+
+
+class CsvSink:
+    """
+    append the correlations of every iteration to one CSV file per network,
+    percentage, method and host (and statistic other than Spearman)
+    """
+
+    # rows are appended as they come
+    batch_size = 1
+
+    def __init__(self, out_dir: str):
+        self.out_dir = out_dir
+
+    def open_run(self, metadata: dict):
+        pass
+
+    def write(
+        self,
+        correlations: Correlations,
+        network: str,
+        percentage: int,
+        method: int,
+        iteration: int,
+        seed: int | None = None,
+    ):
+        out_file = output_prefix(self.out_dir, network, percentage, method)
+        correlations.save(f"{out_file}.csv", network, percentage, method)
+        for statistic in correlations.statistics:
+            if statistic != "spearman":
+                correlations.save(
+                    f"{out_file}--{statistic}.csv",
+                    network,
+                    percentage,
+                    method,
+                    statistic,
+                )
+
+    def flush(self):
+        pass
+
+    def close_run(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class SqliteSink:
+    """
+    store the correlations in an SQLite database, with one row per iteration
+    and statistic, and the metadata of every run (host, seed, options,
+    library versions, start and end) in an indexed table
+
+    the database is in WAL mode, so concurrent jobs can write to it while
+    others read; rows are inserted in batches of `batch_size`
+    """
+
+    def __init__(self, database: str, batch_size: int = 64):
+        self.database = database
+        self.batch_size = batch_size
+        self.run_id: int | None = None
+        self.rows: list[tuple] = []
+
+        os.makedirs(os.path.dirname(database) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(database, timeout=60)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        measures = ", ".join(f"{measure} REAL" for measure in MEASURES)
+        with self.connection:
+            self.connection.executescript(f"""
+                CREATE TABLE IF NOT EXISTS runs (
+                    id INTEGER PRIMARY KEY,
+                    host TEXT NOT NULL,
+                    started TEXT NOT NULL,
+                    finished TEXT,
+                    seed INTEGER,
+                    versions TEXT,
+                    metadata TEXT
+                );
+                CREATE INDEX IF NOT EXISTS runs_host ON runs (host, started);
+                CREATE TABLE IF NOT EXISTS correlations (
+                    run INTEGER NOT NULL REFERENCES runs (id),
+                    time TEXT NOT NULL,
+                    network TEXT NOT NULL,
+                    percentage INTEGER NOT NULL,
+                    method INTEGER NOT NULL,
+                    iteration INTEGER NOT NULL,
+                    seed INTEGER,
+                    statistic TEXT NOT NULL,
+                    {measures}
+                );
+                CREATE INDEX IF NOT EXISTS correlations_grid
+                    ON correlations (network, method, percentage, statistic);
+                CREATE INDEX IF NOT EXISTS correlations_run ON correlations (run);
+                """)
+
+    def open_run(self, metadata: dict):
+        """
+        register a run, all rows written until `close_run` belong to it
+
+        :param metadata: JSON serialisable description of the run, its `seed` gets a column of its own
+        """
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO runs (host, started, seed, versions, metadata) VALUES (?, ?, ?, ?, ?)",
+                (
+                    HOST,
+                    get_time(),
+                    metadata.get("seed"),
+                    json.dumps(library_versions()),
+                    json.dumps(metadata),
+                ),
+            )
+        self.run_id = cursor.lastrowid
+
+    def write(
+        self,
+        correlations: Correlations,
+        network: str,
+        percentage: int,
+        method: int,
+        iteration: int,
+        seed: int | None = None,
+    ):
+        if self.run_id is None:
+            self.open_run({})
+        time = get_time()
+        for statistic, values in correlations.statistics.items():
+            self.rows.append(
+                (
+                    self.run_id,
+                    time,
+                    network,
+                    percentage,
+                    method,
+                    iteration,
+                    seed,
+                    statistic,
+                    *map(float, values),
+                )
+            )
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        insert the buffered rows in one transaction
+        """
+        if not self.rows:
+            return
+        placeholders = ", ".join("?" * (8 + len(MEASURES)))
+        with self.connection:
+            self.connection.executemany(
+                f"INSERT INTO correlations VALUES ({placeholders})", self.rows
+            )
+        self.rows = []
+
+    def close_run(self):
+        self.flush()
+        if self.run_id is not None:
+            with self.connection:
+                self.connection.execute(
+                    "UPDATE runs SET finished = ? WHERE id = ?",
+                    (get_time(), self.run_id),
+                )
+        self.run_id = None
+
+    def close(self):
+        self.close_run()
+        self.connection.close()
+
+
+def query_results(
+    database: str,
+    network: str | None = None,
+    method: int | None = None,
+    percentage: int | None = None,
+    statistic: str = "spearman",
+    host: str | None = None,
+) -> pd.DataFrame:
+    """
+    read correlations from a database written by `SqliteSink`
+
+    :param database: the database file
+    :param network: only this network, all if `None`
+    :param method: only this removal method, all if `None`
+    :param percentage: only this removal percentage, all if `None`
+    :param statistic: the correlation statistic, e.g. `spearman`, `kendall` or `top10`
+    :param host: only runs on this host, all if `None`
+    :return: one row per iteration, with the run's host
+    """
+    conditions = ["c.statistic = ?"]
+    parameters: list = [statistic]
+    for column, value in [
+        ("c.network", network),
+        ("c.method", method),
+        ("c.percentage", percentage),
+        ("r.host", host),
+    ]:
+        if value is not None:
+            conditions.append(f"{column} = ?")
+            parameters.append(value)
+
+    connection = sqlite3.connect(database, timeout=60)
+    try:
+        return pd.read_sql_query(
+            "SELECT c.*, r.host FROM correlations c JOIN runs r ON c.run = r.id "
+            f"WHERE {' AND '.join(conditions)} ORDER BY c.rowid",
+            connection,
+            params=parameters,
+        )
+    finally:
+        connection.close()
@@ -0,0 +1,241 @@
+import math
+import random
+from typing import Hashable, Iterable
+
+import numpy as np
+
+
+class WeightedSampler:
+    """
+    draw keys with probabilities proportional to their weights, where the
+    weights may change between draws
+
+    the weights are stored in a complete binary sum tree, so drawing a key
+    and updating a weight both cost O(log n); every inner node is recomputed
+    from its children on update, so the sums do not drift over many updates
+    """
+
+    def __init__(self, keys: Iterable[Hashable], weights: Iterable[float]):
+        self.keys = list(keys)
+        self.index = {key: i for i, key in enumerate(self.keys)}
+        self.size = 1
+        while self.size < len(self.keys):
+            self.size *= 2
+
+        self.tree = [0.0] * (2 * self.size)
+        for i, weight in enumerate(weights):
+            self.tree[self.size + i] = weight
+        for i in range(self.size - 1, 0, -1):
+            self.tree[i] = self.tree[2 * i] + self.tree[2 * i + 1]
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def total(self) -> float:
+        """
+        the sum of all weights
+        """
+        return self.tree[1]
+
+    def weight(self, key: Hashable) -> float:
+        return self.tree[self.size + self.index[key]]
+
+    def update(self, key: Hashable, weight: float):
+        """
+        set the weight of a key
+
+        :param key: the key
+        :param weight: the new (non-negative) weight
+        """
+        i = self.size + self.index[key]
+        self.tree[i] = weight
+        i //= 2
+        while i > 0:
+            self.tree[i] = self.tree[2 * i] + self.tree[2 * i + 1]
+            i //= 2
+
+    def add(self, key: Hashable, delta: float):
+        """
+        change the weight of a key by some amount
+        """
+        self.update(key, self.weight(key) + delta)
+
+    def sample(self) -> Hashable:
+        """
+        draw a key, the probability of every key is its weight divided by the total weight
+
+        :return: the drawn key
+        """
+        if self.tree[1] <= 0:
+            raise ValueError("cannot sample from an empty sampler")
+        r = random.random() * self.tree[1]
+        i = 1
+        while i < self.size:
+            left = self.tree[2 * i]
+            # rounding may leave r just above the left sum, never descend into an empty subtree
+            if (r < left or self.tree[2 * i + 1] <= 0) and left > 0:
+                i = 2 * i
+            else:
+                r -= left
+                i = 2 * i + 1
+        return self.keys[i - self.size]
+
+
+class DegreeRankSampler:
+    """
+    draw nodes by their rank in a degree ordering, as `edge_removal_3` does:
+    all nodes with a degree > 0 are sorted by degree (ties in random order) and
+    the node at rank idx gets the weight 1 + |idx + 0.5 - m / 2|, where m is the
+    number of such nodes
+
+    as ties are shuffled anew for every draw, all nodes of one degree share the
+    weights of the ranks that degree occupies; so a draw picks a rank, looks up
+    the degree occupying it and picks a node of that degree uniformly
+
+    nodes are kept in one bucket per degree and the bucket sizes in a Fenwick
+    tree, so decrementing a degree and drawing a node both cost O(log n)
+    """
+
+    def __init__(self, degrees: dict[Hashable, int]):
+        self.degree = dict(degrees)
+        self.max_degree = max(self.degree.values(), default=0)
+        self.buckets: list[list[Hashable]] = [[] for _ in range(self.max_degree + 1)]
+        self.position: dict[Hashable, int] = {}
+        self.counts = [0] * (self.max_degree + 1)
+        self.m = 0
+
+        for node, degree in self.degree.items():
+            if degree > 0:
+                self._insert(node, degree)
+
+    def _insert(self, node: Hashable, degree: int):
+        bucket = self.buckets[degree]
+        self.position[node] = len(bucket)
+        bucket.append(node)
+        self._count(degree, 1)
+
+    def _delete(self, node: Hashable, degree: int):
+        bucket = self.buckets[degree]
+        i = self.position.pop(node)
+        last = bucket.pop()
+        if last != node:
+            bucket[i] = last
+            self.position[last] = i
+        self._count(degree, -1)
+
+    def _count(self, degree: int, delta: int):
+        """
+        add `delta` nodes with `degree` to the Fenwick tree
+        """
+        self.m += delta
+        while degree <= self.max_degree:
+            self.counts[degree] += delta
+            degree += degree & -degree
+
+    def _nodes_up_to(self, degree: int) -> int:
+        """
+        number of ranked nodes with a degree <= `degree`
+        """
+        n = 0
+        while degree > 0:
+            n += self.counts[degree]
+            degree -= degree & -degree
+        return n
+
+    def _degree_at(self, rank: int) -> int:
+        """
+        the degree occupying `rank` in the ordering, i.e. the smallest degree
+        with more than `rank` nodes of at most that degree
+        """
+        degree = 0
+        step = 1
+        while step * 2 <= self.max_degree:
+            step *= 2
+        while step > 0:
+            if degree + step <= self.max_degree and self.counts[degree + step] <= rank:
+                degree += step
+                rank -= self.counts[degree]
+            step //= 2
+        return degree + 1
+
+    def _rank_weights(self, p: int) -> float:
+        """
+        the summed weights of the ranks 0 .. p-1
+        """
+        c = self.m / 2
+        # ranks below the center have weight 1 + c - .5 - idx, the others 1 + idx + .5 - c
+        k = min(p, math.floor(c + 0.5))
+        below = k * (c - 0.5) - k * (k - 1) / 2
+        above = (p * (p - 1) - k * (k - 1)) / 2 + (p - k) * (0.5 - c)
+        return p + below + above
+
+    def __len__(self) -> int:
+        return self.m
+
+    def decrement(self, node: Hashable):
+        """
+        lower the degree of a node by one, e.g. after removing one of its edges
+        """
+        degree = self.degree[node]
+        self._delete(node, degree)
+        self.degree[node] = degree - 1
+        if degree > 1:
+            self._insert(node, degree - 1)
+
+    def probability(self, node: Hashable) -> float:
+        """
+        the probability to draw a node
+        """
+        degree = self.degree[node]
+        if degree <= 0:
+            return 0.0
+        start = self._nodes_up_to(degree - 1)
+        end = self._nodes_up_to(degree)
+        weights = self._rank_weights(end) - self._rank_weights(start)
+        return weights / (end - start) / self._rank_weights(self.m)
+
+    def sample(self) -> Hashable:
+        """
+        draw a node with a degree > 0
+
+        :return: the drawn node
+        """
+        if self.m == 0:
+            raise ValueError("cannot sample from an empty sampler")
+        r = random.random() * self._rank_weights(self.m)
+        # find the rank whose weight interval contains r
+        low, high = 0, self.m - 1
+        while low < high:
+            mid = (low + high + 1) // 2
+            if self._rank_weights(mid) <= r:
+                low = mid
+            else:
+                high = mid - 1
+        return random.choice(self.buckets[self._degree_at(low)])
+
+
+def sample_without_replacement(
+    n: int, k: int, weights: np.ndarray | None = None
+) -> np.ndarray:
+    """
+    draw k of n indices without replacement in one vectorised pass
+    (Efraimidis and Spirakis): every index gets the key `log(u) / weight` for
+    a uniform `u`, the k largest keys in descending order are distributed
+    like k successive weighted draws (as `np.random.choice(n, k, replace=False, p=...)`),
+    so every prefix of the result is such a draw as well
+
+    :param n: the number of indices
+    :param k: the number of indices to draw, at most n are drawn
+    :param weights: the n non-negative weights, uniform if `None`; indices of
+                    weight zero only come after all others
+    :return: the drawn indices, in draw order
+    """
+    k = min(k, n)
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    with np.errstate(divide="ignore"):
+        keys = np.log(np.random.random(n))
+        if weights is not None:
+            keys /= weights
+    top = np.argpartition(-keys, k - 1)[:k] if k < n else np.arange(n)
+    return top[np.argsort(-keys[top], kind="stable")].astype(np.int64)
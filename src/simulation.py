@@ -0,0 +1,607 @@
+import logging
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable
+
+import networkx as nx
+import numpy as np
+
+from src.backends import DEFAULT_BACKEND, choose_backends
+from src.cache import base_file, generated_file
+from src.centrality import MEASURES, Centralities, provenance, reusable
+from src.checkpoint import Manifest, unit_seed
+from src.correlation import CorrelationEngine, Correlations
+from src.edgelist import EdgeList, apply_edge_removal_mask, keep_mask, removal_order
+from src.methods import apply_edge_removal
+from src.graph import CompactGraph
+from src.networks import generated_key, get_edge_list, get_graph
+from src.results import HOST, CsvSink, SqliteSink, output_prefix
+from src.spans import span
+from src.utils import get_time
+
+OUT_DIR = "processed"
+
+
+def shrink(
+    edge_list: EdgeList, keep: np.ndarray, compact: bool
+) -> nx.Graph | CompactGraph:
+    """
+    build the graph of the kept edges
+
+    :param compact: build a `CompactGraph` instead of a networkx graph
+    """
+    if compact:
+        return CompactGraph.from_edge_list(edge_list, keep)
+    return edge_list.to_graph(keep)
+
+
+def shrunk_centralities(
+    g: nx.Graph | CompactGraph,
+    base: Centralities,
+    edge_list: EdgeList | None,
+    num_edges_to_remove: int,
+    method: int,
+    calc_options: dict,
+    warm_start: bool = False,
+) -> Centralities:
+    """
+    remove edges from a graph and calculate the centralities of the shrunk graph
+
+    :param g: the base graph, shrunk graphs of a `CompactGraph` are compact as well
+    :param base: the centralities of the base graph
+    :param edge_list: the edge array of `g` to remove edges by masking, copy the graph if `None`
+                      (required for a `CompactGraph`)
+    :param num_edges_to_remove: the number of edges to remove
+    :param method: the removal method
+    :param calc_options: keyword arguments of `Centralities.calc`
+    :param warm_start: start the iterative measures from the base centralities
+    :return: the centralities, without the shrunk graph
+    """
+    with span("removal", method=method, edges=num_edges_to_remove) as removal:
+        if edge_list is not None:
+            keep = apply_edge_removal_mask(edge_list, num_edges_to_remove, method)
+            g_copy = shrink(edge_list, keep, isinstance(g, CompactGraph))
+        else:
+            g_copy = apply_edge_removal(g, num_edges_to_remove, method)
+    logging.info(f"  got shrunk graph took {removal['seconds']} s")
+
+    centralities = Centralities()
+    with span("centralities", edges=num_edges_to_remove) as calc:
+        centralities.calc(
+            g_copy, warm_start=base if warm_start else None, **calc_options
+        )
+    if centralities.iterations:
+        logging.info(f"  iterations {centralities.iterations}")
+    logging.info(f"  calculated centralities took {calc['seconds']} s")
+    # don't keep (or send back to the scheduler) the shrunk graph
+    centralities.g_copy = None
+    return centralities
+
+
+def nested_centralities(
+    g: nx.Graph | CompactGraph,
+    base: Centralities,
+    edge_list: EdgeList,
+    nums_edges_to_remove: list[int],
+    method: int,
+    calc_options: dict,
+    warm_start: bool = False,
+    in_place: bool = True,
+) -> list[Centralities]:
+    """
+    draw one removal order and calculate the centralities after removing
+    each number of edges, i.e. after removing a prefix of the order
+
+    :param g: the base graph
+    :param base: the centralities of the base graph
+    :param edge_list: the edge array of `g`
+    :param nums_edges_to_remove: the numbers of edges to remove
+    :param method: the removal method
+    :param calc_options: keyword arguments of `Centralities.calc`
+    :param warm_start: start the iterative measures from the base centralities
+    :param in_place: remove the edges from one copy of the graph between the
+                     checkpoints, instead of building every shrunk graph from
+                     the edge array (never for a `CompactGraph`)
+    :return: the centralities per number of removed edges, without the shrunk graphs
+    """
+    with span("removal", method=method, edges=max(nums_edges_to_remove)) as removal:
+        order = removal_order(edge_list, max(nums_edges_to_remove), method)
+    logging.info(
+        f"  got removal order of {len(order)} edges took {removal['seconds']} s"
+    )
+
+    compact = isinstance(g, CompactGraph)
+    in_place = in_place and not compact
+    g_copy = g.copy() if in_place else None
+    labels = edge_list.nodes
+    removed = 0
+    results = {}
+    for num in sorted(set(nums_edges_to_remove)):
+        with span("shrink", edges=num):
+            if in_place:
+                edges = edge_list.edges[order[removed:num]].tolist()
+                g_copy.remove_edges_from((labels[u], labels[v]) for u, v in edges)
+                removed = num
+                shrunk = g_copy
+            else:
+                shrunk = shrink(edge_list, keep_mask(edge_list, order[:num]), compact)
+
+        centralities = Centralities()
+        with span("centralities", edges=num) as calc:
+            centralities.calc(
+                shrunk, warm_start=base if warm_start else None, **calc_options
+            )
+        centralities.g_copy = None
+        results[num] = centralities
+        logging.info(
+            f"  calculated centralities without {num} edges took {calc['seconds']} s"
+        )
+    return [results[num] for num in nums_edges_to_remove]
+
+
+# base graph and options of the current process, see `_set_state`
+_state = None
+
+
+def _set_state(
+    g: nx.Graph | CompactGraph,
+    base: Centralities,
+    edge_list: EdgeList | None,
+    calc_options: dict,
+    warm_start: bool,
+    in_place: bool,
+):
+    global _state
+    _state = (g, base, edge_list, calc_options, warm_start, in_place)
+
+
+def _compute(unit: tuple[int, list[int], bool, int, int]) -> list[Centralities]:
+    """
+    compute one iteration for the numbers of edges to remove, nested or one by one
+    """
+    g, base, edge_list, calc_options, warm_start, in_place = _state
+    method, nums_edges_to_remove, nested, seed, iteration = unit
+    random.seed(seed)
+    np.random.seed(seed)
+    with span("iteration", method=method, iteration=iteration, seed=seed):
+        if nested:
+            return nested_centralities(
+                g,
+                base,
+                edge_list,
+                nums_edges_to_remove,
+                method,
+                calc_options,
+                warm_start,
+                in_place,
+            )
+        return [
+            shrunk_centralities(
+                g, base, edge_list, num, method, calc_options, warm_start
+            )
+            for num in nums_edges_to_remove
+        ]
+
+
+def centrality_file(out_file: str, extension: str) -> str:
+    """
+    a new file for the centralities of an iteration, iterations finishing
+    within the same second get a counter
+    """
+    time = get_time()
+    file = f"{out_file}--{time}.{extension}"
+    k = 1
+    while os.path.exists(file):
+        file = f"{out_file}--{time}-{k}.{extension}"
+        k += 1
+    return file
+
+
+class Simulation:
+    """
+    run the iterations of a grid of networks, removal methods and percentages
+
+    every network and its base centralities are loaded once for the whole grid;
+    the iterations are computed by a pool of processes, while the results are
+    saved and correlated by the scheduler in the layout of single runs
+    """
+
+    def __init__(
+        self,
+        calc_options: dict | None = None,
+        save_options: dict | None = None,
+        warm_start: bool = False,
+        edge_array: bool = False,
+        kendall: bool = False,
+        top_k: int | None = None,
+        cache_dir: str | None = None,
+        cache_hash: bool = False,
+        processes: int = 1,
+        nested: bool = False,
+        seed: int | None = None,
+        manifest: Manifest | None = None,
+        sink: CsvSink | SqliteSink | None = None,
+        out_dir: str = OUT_DIR,
+        compact: bool = False,
+        network_seed: int | None = None,
+    ):
+        """
+        :param calc_options: keyword arguments of `Centralities.calc` for the shrunk graphs,
+                             its `measures` are also calculated for the base graphs and correlated
+        :param save_options: keyword arguments of `Centralities.save`
+        :param warm_start: start the iterative measures of shrunk graphs from the base centralities
+        :param edge_array: remove edges by masking an edge array instead of copying the graph
+        :param kendall: also store Kendall's tau
+        :param top_k: also store the overlap of the top k nodes
+        :param cache_dir: cache parsed network files in this directory, no caching if `None`
+        :param cache_hash: identify cached network files by their content hash
+        :param processes: number of processes running iterations, `1` runs them in this process
+        :param nested: remove the edges of all percentages of an iteration in one
+                       order, so every percentage removes a prefix of it; the
+                       graph is shrunk in place unless `edge_array` is set
+        :param seed: derive the seeds of all iterations from this seed, random seeds if `None`
+        :param manifest: skip the iterations completed in this manifest and record completed ones
+        :param sink: stores the correlations, CSV files in `out_dir` if `None`
+        :param out_dir: the output directory
+        :param compact: hold the graphs as `CompactGraph`s instead of networkx
+                        graphs, implies `edge_array`
+        :param network_seed: the seed of generated networks; with a `cache_dir`
+                             the networks and their base centralities are
+                             cached by generator, parameters and seed
+        """
+        self.calc_options = calc_options or {}
+        self.measures = tuple(self.calc_options.get("measures", MEASURES))
+        self.save_options = save_options or {}
+        self.extension = "cent" if self.save_options.get("binary") else "json"
+        self.warm_start = warm_start
+        self.edge_array = edge_array or compact
+        self.kendall = kendall
+        self.top_k = top_k
+        self.cache_dir = cache_dir
+        self.cache_hash = cache_hash
+        self.processes = processes
+        self.nested = nested
+        self.seed = seed
+        self.manifest = manifest
+        self.sink = CsvSink(out_dir) if sink is None else sink
+        self.out_dir = out_dir
+        self.compact = compact
+        self.network_seed = network_seed
+
+    def base(
+        self, network: str, label: str
+    ) -> tuple[nx.Graph | CompactGraph, Centralities]:
+        """
+        load a network and read or calculate its base centralities
+
+        :param network: the name of the network
+        :param label: describes the runs sharing the base centralities of a random network
+        :return: the graph and its base centralities
+        """
+        with span("load", network=network):
+            if self.compact:
+                edge_list, network_random = get_edge_list(
+                    network, self.cache_dir, self.cache_hash, self.network_seed
+                )
+                g = CompactGraph.from_edge_list(edge_list)
+            else:
+                g, network_random = get_graph(
+                    network, self.cache_dir, self.cache_hash, self.network_seed
+                )
+
+        base_centrality_file = f"{self.out_dir}/{network}--{0}.{self.extension}"
+        if network_random and self.network_seed is not None and self.cache_dir:
+            # a seeded network is reproducible, its base centrality is cached with it
+            base_centrality_file = base_file(
+                generated_file(
+                    self.cache_dir, generated_key(network, self.network_seed)
+                ),
+                self.extension,
+            )
+            network_random = False
+        base_centrality = Centralities()
+        missing = self.measures
+        if os.path.isfile(base_centrality_file):
+            logging.info(f"reading base centrality from file {base_centrality_file}")
+            with span("base", network=network):
+                base_centrality.setup(base_centrality_file, nodes=g.nodes())
+            # measures computed differently (e.g. less accurately) than
+            # requested are computed again
+            subgraph_tol = self.calc_options.get("subgraph_tol")
+            chosen = choose_backends(
+                self.calc_options.get("backends", (DEFAULT_BACKEND,)), self.measures
+            )
+            missing = tuple(
+                measure
+                for measure in self.measures
+                if measure not in base_centrality.measures
+                or not reusable(
+                    base_centrality.provenance.get(measure),
+                    provenance(
+                        measure,
+                        subgraph_tol,
+                        chosen,
+                        self.calc_options.get("sparse", False),
+                        self.calc_options.get("tol", 1.0e-06),
+                    ),
+                )
+            )
+            if not missing:
+                return g, base_centrality
+            logging.info(f"calculating base centrality of {', '.join(missing)}")
+        else:
+            logging.info(f"calculating base centrality")
+
+        calculated = Centralities()
+        # the base centrality is exact (up to estimated subgraph centrality), it
+        # is cached and shared by all runs computing their measures the same way
+        with span("base", network=network):
+            calculated.calc(
+                # compact graphs are never modified
+                g if self.compact else g.copy(),
+                workers=self.calc_options.get("workers", 1),
+                sparse=self.calc_options.get("sparse", False),
+                tol=self.calc_options.get("tol", 1.0e-06),
+                measures=missing,
+                # a dense eigendecomposition may not fit, keep the estimate and its bound
+                subgraph_tol=self.calc_options.get("subgraph_tol"),
+                backends=self.calc_options.get("backends", (DEFAULT_BACKEND,)),
+            )
+        calculated.g_copy = None
+        if os.path.isfile(base_centrality_file):
+            # complete the measures read from the file, and replace the file
+            # (its columns may be memory mapped) instead of overwriting it
+            for measure in missing:
+                setattr(base_centrality, measure, getattr(calculated, measure))
+                base_centrality.provenance[measure] = calculated.provenance[measure]
+            if "subgraph" in missing:
+                base_centrality.subgraph_error = calculated.subgraph_error
+            base_centrality.measures = tuple(
+                measure
+                for measure in MEASURES
+                if measure in base_centrality.measures or measure in missing
+            )
+            base_centrality.iterations.update(calculated.iterations)
+            base_centrality.save(f"{base_centrality_file}.tmp", **self.save_options)
+            os.replace(f"{base_centrality_file}.tmp", base_centrality_file)
+            logging.info(f"writing base centrality to file {base_centrality_file}")
+            return g, base_centrality
+
+        base_centrality = calculated
+        base_centrality.g_copy = None
+        if network_random:
+            tmp_base_centrality_file = (
+                f"{base_centrality_file}--basefor--{label}--{HOST}--{get_time()}"
+            )
+            base_centrality.save(tmp_base_centrality_file, **self.save_options)
+            logging.info(
+                f"writing temporary base centrality to file {tmp_base_centrality_file}"
+            )
+        else:
+            base_centrality.save(base_centrality_file, **self.save_options)
+            logging.info(f"writing base centrality to file {base_centrality_file}")
+        return g, base_centrality
+
+    def sweep(
+        self,
+        networks: list[str],
+        methods: list[int],
+        percentages: list[int],
+        iterations: int,
+    ):
+        """
+        run `iterations` iterations for every combination of network, method and percentage
+
+        :param networks: the names of the networks
+        :param methods: the removal methods
+        :param percentages: the removal percentages
+        :param iterations: the number of iterations per combination
+        """
+        if not os.path.isdir(self.out_dir):
+            logging.info(f"creating output dir '{self.out_dir}' as it does not exist")
+            os.mkdir(self.out_dir)
+
+        self.sink.open_run(
+            {
+                "networks": networks,
+                "methods": methods,
+                "percentages": percentages,
+                "iterations": iterations,
+                "seed": self.seed,
+                "network_seed": self.network_seed,
+                "nested": self.nested,
+                "edge_array": self.edge_array,
+                "compact": self.compact,
+                "warm_start": self.warm_start,
+                "calc_options": self.calc_options,
+                "save_options": self.save_options,
+            }
+        )
+        label = (
+            f"{'_'.join(map(str, percentages))}--method-{'_'.join(map(str, methods))}"
+        )
+        for network in networks:
+            g, base_centrality = self.base(network, label)
+            m = g.number_of_edges()
+            runs = [
+                (method, percentage, int(percentage / 100 * m))
+                for method in methods
+                for percentage in percentages
+            ]
+            for method, percentage, num_edges_to_remove in runs:
+                logging.info(
+                    f"will run {iterations} iterations on {network} while removing {percentage}% "
+                    f"({num_edges_to_remove}) edges using method {method}"
+                )
+            self._run(network, g, base_centrality, runs, iterations)
+        self.sink.close_run()
+
+    def _run(
+        self,
+        network: str,
+        g: nx.Graph | CompactGraph,
+        base_centrality: Centralities,
+        runs: list[tuple[int, int, int]],
+        iterations: int,
+    ):
+        """
+        compute the iterations of all runs on one network and record them in run order
+        """
+        # nested removals draw their orders from the edge array
+        if self.compact:
+            edge_list = EdgeList(g.nodes(), g.edges())
+        elif self.edge_array or self.nested:
+            edge_list = EdgeList.from_graph(g)
+        else:
+            edge_list = None
+        # rank the base centralities once for all iterations
+        engine = CorrelationEngine(base_centrality, list(g.nodes()), self.measures)
+
+        if self.nested:
+            # one removal order per method and iteration serves all percentages
+            groups = [
+                [run for run in runs if run[0] == method]
+                for method in dict.fromkeys(method for method, _, _ in runs)
+            ]
+        else:
+            groups = [[run] for run in runs]
+        units = []
+        for group in groups:
+            method = group[0][0]
+            percentages = [percentage for _, percentage, _ in group]
+            for iteration in range(iterations):
+                pending = [
+                    run
+                    for run in group
+                    if self.manifest is None
+                    or not self.manifest.done(network, method, run[1], iteration)
+                ]
+                if pending:
+                    seed = unit_seed(self.seed, network, method, percentages, iteration)
+                    units.append((group, iteration, seed, pending))
+        skipped = len(groups) * iterations - len(units)
+        if skipped > 0:
+            logging.info(f"skipping {skipped} completed iterations on {network}")
+        tasks = [
+            (group[0][0], [num for _, _, num in group], self.nested, seed, iteration)
+            for group, iteration, seed, _ in units
+        ]
+
+        state = (
+            g,
+            base_centrality,
+            edge_list,
+            self.calc_options,
+            self.warm_start,
+            not self.edge_array,
+        )
+        if self.processes > 1:
+            with ProcessPoolExecutor(
+                max_workers=self.processes, initializer=_set_state, initargs=state
+            ) as executor:
+                self._record_all(network, units, executor.map(_compute, tasks), engine)
+            return
+
+        _set_state(*state)
+        self._record_all(network, units, map(_compute, tasks), engine)
+
+    def _record_all(
+        self,
+        network: str,
+        units: list[tuple[list, int, int, list]],
+        results: Iterable[list[Centralities]],
+        engine: CorrelationEngine,
+    ):
+        """
+        record the results of the pending runs of the units in unit order
+
+        the centralities of every iteration are saved as they arrive, the
+        iterations of a group of runs are correlated in one batch once the
+        group is complete; completed runs only enter the manifest once the
+        sink flushed their rows, so an interrupted job never skips a run
+        whose rows are lost
+        """
+        group, completed = None, []
+        for (unit_group, iteration, seed, pending), centralities in zip(units, results):
+            if unit_group is not group:
+                self._correlate(network, completed, engine)
+                group, completed = unit_group, []
+            for run, current in zip(unit_group, centralities):
+                if run not in pending:
+                    continue
+                method, percentage, _ = run
+                self._save(network, method, percentage, iteration, current)
+                completed.append((method, percentage, iteration, seed, current))
+        self._correlate(network, completed, engine)
+
+    def _save(
+        self,
+        network: str,
+        method: int,
+        percentage: int,
+        iteration: int,
+        current_centrality: Centralities,
+    ):
+        """
+        save the centralities of an iteration
+        """
+        out_file = output_prefix(self.out_dir, network, percentage, method)
+        with span(
+            "save", method=method, percentage=percentage, iteration=iteration
+        ) as save:
+            current_centrality.save(
+                centrality_file(out_file, self.extension), **self.save_options
+            )
+        logging.info(
+            f"{network} method {method} {percentage}% iteration {iteration} saved "
+            f"took {save['seconds']} s"
+        )
+
+    def _correlate(
+        self,
+        network: str,
+        completed: list[tuple[int, int, int, int, Centralities]],
+        engine: CorrelationEngine,
+    ):
+        """
+        correlate the completed iterations of each run with the base centralities
+        in one batch, write them to the sink and record them in the manifest
+        """
+        runs = {}
+        for method, percentage, iteration, seed, current in completed:
+            runs.setdefault((method, percentage), []).append((iteration, seed, current))
+        for (method, percentage), iterations in runs.items():
+            with span(
+                "correlation",
+                method=method,
+                percentage=percentage,
+                iterations=len(iterations),
+            ) as correlation:
+                batch = Correlations.batch(
+                    engine,
+                    [current for _, _, current in iterations],
+                    kendall=self.kendall,
+                    top_k=self.top_k,
+                )
+                for (iteration, seed, _), correlations in zip(iterations, batch):
+                    self.sink.write(
+                        correlations, network, percentage, method, iteration, seed
+                    )
+            logging.info(
+                f"{network} method {method} {percentage}% {len(iterations)} iterations "
+                f"correlated took {correlation['seconds']} s"
+            )
+        self.sink.flush()
+        if self.manifest is None:
+            return
+        for method, percentage, iteration, seed, _ in completed:
+            self.manifest.record(
+                network,
+                method,
+                percentage,
+                iteration,
+                seed=seed,
+                host=HOST,
+                time=get_time(),
+            )
@@ -0,0 +1,141 @@
+import cProfile
+import itertools
+import json
+import logging
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Iterable, Iterator
+
+
+class Tracer:
+    """
+    nested timing spans, e.g. of an iteration and its removal, measures, save
+    and correlation, written as one JSON line per finished span
+
+    chosen stages can additionally be run under cProfile (stats are dumped to
+    `{file}--{name}--{pid}-{n}.prof`) or tracemalloc (the peak is stored with the span)
+    """
+
+    def __init__(
+        self,
+        file: str | None = None,
+        profile: Iterable[str] = (),
+        trace_memory: Iterable[str] = (),
+    ):
+        """
+        :param file: the JSON lines file, spans are only timed if `None`
+        :param profile: names of the spans to profile with cProfile
+        :param trace_memory: names of the spans to trace the peak memory of
+        """
+        self.file = file
+        self.profile = set(profile)
+        self.trace_memory = set(trace_memory)
+        self.stack: list[dict] = []
+        self.ids = itertools.count()
+        self.profiling = False
+        # the peak memory of every open traced span before its nested spans reset it
+        self.peaks: list[int] = []
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[dict]:
+        """
+        time a block, spans opened inside the block are its children
+
+        :param name: the stage, e.g. `removal` or `betweenness+load+closeness+harmonic`
+        :param attributes: JSON serialisable information stored with the span
+        :return: the record of the span, its `seconds` are set when the block is left
+        """
+        pid = os.getpid()
+        parent = self.stack[-1] if self.stack else None
+        record = {
+            "name": name,
+            "id": f"{pid}-{next(self.ids)}",
+            "parent": None if parent is None else parent["id"],
+            "path": name if parent is None else f"{parent['path']}/{name}",
+            "pid": pid,
+            "start": time.time(),
+            **attributes,
+        }
+
+        profiler = None
+        if name in self.profile and not self.profiling:
+            profiler = cProfile.Profile()
+            self.profiling = True
+        tracing = name in self.trace_memory
+        started_tracing = tracing and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        elif tracing:
+            peak = tracemalloc.get_traced_memory()[1]
+            self.peaks = [max(outer, peak) for outer in self.peaks]
+            tracemalloc.reset_peak()
+        if tracing:
+            self.peaks.append(0)
+
+        self.stack.append(record)
+        start = time.perf_counter()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield record
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            record["seconds"] = time.perf_counter() - start
+            self.stack.pop()
+            if tracing:
+                record["peak_bytes"] = max(
+                    self.peaks.pop(), tracemalloc.get_traced_memory()[1]
+                )
+                if started_tracing:
+                    tracemalloc.stop()
+            if profiler is not None:
+                self.profiling = False
+                if self.file is not None:
+                    record["profile"] = f"{self.file}--{name}--{record['id']}.prof"
+                    profiler.dump_stats(record["profile"])
+            self._write(record)
+
+    def _write(self, record: dict):
+        if self.file is None:
+            return
+        logging.debug(f"span {record['path']} took {record['seconds']} s")
+        # a single append per line, so pool workers can share the file
+        fd = os.open(self.file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, f"{json.dumps(record)}\n".encode())
+        finally:
+            os.close(fd)
+
+
+# the tracer used by `span`, only timing until `configure` is called
+TRACER = Tracer()
+
+
+def configure(
+    file: str | None,
+    profile: Iterable[str] = (),
+    trace_memory: Iterable[str] = (),
+):
+    """
+    replace the tracer of `span`, see `Tracer`; forked worker processes inherit it
+    """
+    global TRACER
+    TRACER = Tracer(file, profile, trace_memory)
+
+
+def span(name: str, **attributes):
+    """
+    a span of the configured tracer, see `Tracer.span`
+    """
+    return TRACER.span(name, **attributes)
+
+
+def read_spans(file: str) -> list[dict]:
+    """
+    read the spans written to a file
+    """
+    with open(file, "r") as f:
+        return [json.loads(line) for line in f if line.strip()]
@@ -0,0 +1,314 @@
+import logging
+
+import networkx as nx
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import ArpackNoConvergence, eigsh
+
+from src.graph import CompactGraph
+
+
+def csr_adjacency(g: nx.Graph | CompactGraph) -> tuple[list, sp.csr_array]:
+    """
+    build the sparse adjacency matrix of a graph
+
+    :param g: the graph
+    :return: the node labels in matrix order and the adjacency matrix
+    """
+    if isinstance(g, CompactGraph):
+        return g.nodes(), g.csr()
+    nodes = list(g.nodes())
+    return nodes, nx.to_scipy_sparse_array(g, nodelist=nodes, dtype=float, format="csr")
+
+
+def start_vector(nstart: np.ndarray | None, n: int) -> np.ndarray:
+    """
+    normalise a start vector to sum up to one, uniform if there is none
+    """
+    if nstart is None or nstart.sum() <= 0:
+        return np.repeat(1.0 / n, n)
+    return nstart / nstart.sum()
+
+
+def pagerank_power(
+    a: sp.csr_array,
+    alpha: float = 0.85,
+    tol: float = 1.0e-06,
+    max_iter: int = 100,
+    nstart: np.ndarray | None = None,
+) -> tuple[np.ndarray, int]:
+    """
+    pagerank by power iteration over the sparse adjacency matrix, following
+    the networkx implementation (uniform teleport, dangling nodes jump uniformly)
+
+    :param a: the adjacency matrix
+    :param alpha: the damping factor
+    :param tol: convergence tolerance per node
+    :param max_iter: maximum number of iterations
+    :param nstart: start vector, e.g. the pagerank of a similar graph
+    :return: the pagerank vector and the number of iterations it took
+    """
+    n = a.shape[0]
+    if n == 0:
+        return np.zeros(0), 0
+
+    out_degree = np.asarray(a.sum(axis=1)).ravel()
+    dangling = out_degree == 0
+    scale = np.zeros(n)
+    scale[~dangling] = 1.0 / out_degree[~dangling]
+    transition = (sp.diags_array(scale) @ a).T.tocsr()
+
+    teleport = np.repeat(1.0 / n, n)
+    x = start_vector(nstart, n)
+    for iteration in range(1, max_iter + 1):
+        x_last = x
+        x = alpha * (transition @ x_last + x_last[dangling].sum() * teleport)
+        x += (1 - alpha) * teleport
+        if np.abs(x - x_last).sum() < n * tol:
+            return x, iteration
+    raise nx.PowerIterationFailedConvergence(max_iter)
+
+
+def eigenvector_power(
+    a: sp.csr_array,
+    tol: float = 1.0e-06,
+    max_iter: int = 1000,
+    nstart: np.ndarray | None = None,
+) -> tuple[np.ndarray, int]:
+    """
+    eigenvector centrality by power iteration on (A + I), following the
+    networkx implementation; falls back to ARPACK if the iteration does not
+    converge
+
+    :param a: the (symmetric) adjacency matrix
+    :param tol: convergence tolerance per node
+    :param max_iter: maximum number of power iterations
+    :param nstart: start vector, e.g. the eigenvector of a similar graph
+    :return: the L2 normalised eigenvector and the number of iterations it took
+    """
+    n = a.shape[0]
+    if n == 0:
+        raise nx.NetworkXPointlessConcept(
+            "cannot compute centrality for the null graph"
+        )
+
+    x = start_vector(nstart, n)
+    for iteration in range(1, max_iter + 1):
+        x_last = x
+        x = x_last + a @ x_last
+        x /= np.linalg.norm(x) or 1
+        if np.abs(x - x_last).sum() < n * tol:
+            return x, iteration
+
+    logging.warning(
+        f"eigenvector power iteration did not converge in {max_iter} iterations, using ARPACK"
+    )
+    return eigenvector_arpack(a, tol), max_iter
+
+
+def eigenvector_arpack(a: sp.csr_array, tol: float = 1.0e-06) -> np.ndarray:
+    """
+    eigenvector centrality as the leading eigenvector computed by ARPACK
+
+    :param a: the (symmetric) adjacency matrix
+    :param tol: relative accuracy of the eigenpair
+    :return: the L2 normalised, non-negative eigenvector
+    """
+    try:
+        _, vectors = eigsh(a, k=1, which="LA", tol=tol, v0=np.ones(a.shape[0]))
+    except ArpackNoConvergence as e:
+        raise nx.PowerIterationFailedConvergence(a.shape[0]) from e
+    x = vectors[:, 0]
+    if x.sum() < 0:
+        x = -x
+    x[x < 0] = 0.0
+    return x / (np.linalg.norm(x) or 1)
+
+
+def subgraph_dense(a: sp.csr_array) -> np.ndarray:
+    """
+    subgraph centrality from the full eigendecomposition of the adjacency
+    matrix, as `nx.subgraph_centrality`
+
+    :param a: the adjacency matrix
+    :return: the diagonal of exp(A)
+    """
+    a = a.toarray()
+    a[a != 0] = 1
+    w, v = np.linalg.eigh(a)
+    return (v**2) @ np.exp(w)
+
+
+def subgraph_centrality(g: nx.Graph | CompactGraph) -> dict:
+    """
+    subgraph centrality as `nx.subgraph_centrality` but without a networkx graph
+    """
+    nodes, a = csr_adjacency(g)
+    return dict(zip(nodes, subgraph_dense(a).tolist()))
+
+
+def spectrum_bound(a: sp.csr_array) -> float:
+    """
+    an upper bound of the largest eigenvalue of a non-negative symmetric
+    matrix, the largest `sqrt(r_i r_j)` over its non-zero entries with row sums `r`
+    """
+    if a.nnz == 0:
+        return 0.0
+    rows = np.asarray(a.sum(axis=1)).ravel()
+    coo = a.tocoo()
+    return float(np.sqrt(rows[coo.row] * rows[coo.col]).max())
+
+
+def _quadrature(
+    alphas: np.ndarray, betas: np.ndarray, z: float
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    the Gauss and Gauss-Radau rules for `e_1^T exp(T) e_1` of a batch of
+    Lanczos tridiagonal matrices `T`
+
+    :param alphas: the (batch × k) diagonals
+    :param betas: the (batch × k) off-diagonals, the last ones extend `T` by a row
+    :param z: the prescribed node of the Radau rule, at least the largest eigenvalue
+    :return: the Gauss (lower bound) and Radau (upper bound) rules per matrix
+    """
+    b, k = alphas.shape
+    t = np.zeros((b, k + 1, k + 1))
+    diagonal = np.arange(k)
+    t[:, diagonal, diagonal] = alphas
+    t[:, diagonal[:-1], diagonal[1:]] = betas[:, :-1]
+    t[:, diagonal[1:], diagonal[:-1]] = betas[:, :-1]
+
+    # the last diagonal entry that makes z an eigenvalue of the extended matrix
+    rhs = np.zeros((b, k, 1))
+    rhs[:, -1, 0] = betas[:, -1] ** 2
+    delta = np.linalg.solve(t[:, :k, :k] - z * np.eye(k), rhs)[:, -1, 0]
+    t[:, k, k] = z + delta
+    t[:, k - 1, k] = t[:, k, k - 1] = betas[:, -1]
+
+    rules = []
+    for matrices in [t[:, :k, :k], t]:
+        values, vectors = np.linalg.eigh(matrices)
+        rules.append((vectors[:, 0, :] ** 2 * np.exp(values)).sum(axis=1))
+    return rules[0], rules[1]
+
+
+def subgraph_lanczos(
+    g: nx.Graph | CompactGraph,
+    tol: float = 1.0e-06,
+    batch: int = 256,
+    max_steps: int = 500,
+    check: int = 5,
+) -> tuple[dict, dict]:
+    """
+    estimate subgraph centrality, the diagonal of exp(A), by Gauss quadrature
+    over Lanczos processes started from the nodes (a batch of nodes at a
+    time), in O(batch n) memory instead of the dense eigendecomposition of
+    `nx.subgraph_centrality`
+
+    Gauss rules bound the diagonal from below and Gauss-Radau rules with a
+    node at an upper bound of the spectrum from above (in exact arithmetic),
+    the estimate of a node is their mean
+
+    :param g: the graph
+    :param tol: the relative error bound every node has to reach, i.e. half
+                the distance of the bounds relative to the estimate
+    :param batch: the number of nodes iterated together
+    :param max_steps: the maximum number of Lanczos steps per node
+    :param check: evaluate the quadrature rules every `check` steps
+    :return: subgraph centrality keyed by node, and the largest relative
+             error bound (`error`) and number of Lanczos steps (`steps`) reached
+    """
+    nodes, a = csr_adjacency(g)
+    a.data[:] = 1
+    n = len(nodes)
+    z = spectrum_bound(a) * (1 + 1.0e-09) + 1.0e-09
+
+    estimates = np.ones(n)
+    errors = np.zeros(n)
+    steps = 0
+    for start in range(0, n, batch):
+        columns = np.arange(start, min(start + batch, n))
+        b = len(columns)
+        q = np.zeros((n, b))
+        q[columns, np.arange(b)] = 1.0
+        q_last = np.zeros((n, b))
+        beta = np.zeros(b)
+        alphas, betas = [], []
+        active = np.ones(b, dtype=bool)
+        for step in range(1, max_steps + 1):
+            w = a @ q
+            alpha = (q * w).sum(axis=0)
+            w -= alpha * q + beta * q_last
+            beta = np.linalg.norm(w, axis=0)
+            # an exhausted Krylov space makes the Gauss rule exact, its
+            # process just continues with zeros
+            exhausted = beta <= 1.0e-10 * np.maximum(np.abs(alpha), 1)
+            beta[exhausted] = 0.0
+            alphas.append(alpha)
+            betas.append(beta)
+            q_last = q
+            q = np.divide(w, beta, out=np.zeros_like(w), where=~exhausted)
+
+            if step % check != 0 and step != max_steps and not exhausted.all():
+                continue
+            gauss, radau = _quadrature(
+                np.array(alphas).T[active], np.array(betas).T[active], z
+            )
+            error = np.maximum(radau - gauss, 0) / (radau + gauss)
+            done = (error <= tol) | exhausted[active] | (step == max_steps)
+            finished = np.flatnonzero(active)[done]
+            estimates[columns[finished]] = ((gauss + radau) / 2)[done]
+            errors[columns[finished]] = np.where(exhausted[finished], 0.0, error[done])
+            active[finished] = False
+            steps = max(steps, step)
+            if not active.any():
+                break
+
+    if errors.size and errors.max() > tol:
+        logging.warning(
+            f"subgraph centrality reached a relative error of {errors.max()} "
+            f"instead of {tol} in {max_steps} Lanczos steps"
+        )
+    return dict(zip(nodes, estimates.tolist())), {
+        "error": float(errors.max()) if errors.size else 0.0,
+        "steps": steps,
+    }
+
+
+def spectral_centralities(
+    g: nx.Graph | CompactGraph,
+    tol: float = 1.0e-06,
+    nstart: tuple[dict | None, dict | None] | None = None,
+    measures: tuple[str, ...] = ("pagerank", "eigenvector"),
+) -> tuple[dict | None, dict | None, dict[str, int]]:
+    """
+    compute pagerank and eigenvector centrality on a single sparse adjacency
+
+    :param g: the graph
+    :param tol: convergence tolerance of the iterations
+    :param nstart: pagerank and eigenvector centrality to start the iterations from
+    :param measures: the measures to compute, `pagerank` and/or `eigenvector`
+    :return: pagerank and eigenvector centrality keyed by node (`None` if not
+             computed), and the number of iterations each of them took
+    """
+    nodes, a = csr_adjacency(g)
+    starts = [None, None]
+    if nstart is not None:
+        starts = [
+            (
+                None
+                if values is None
+                else np.array([values.get(node, 0.0) for node in nodes])
+            )
+            for values in nstart
+        ]
+    results = [None, None]
+    iterations = {}
+    for i, (measure, power) in enumerate(
+        [("pagerank", pagerank_power), ("eigenvector", eigenvector_power)]
+    ):
+        if measure not in measures:
+            continue
+        values, iterations[measure] = power(a, tol=tol, nstart=starts[i])
+        results[i] = dict(zip(nodes, values.tolist()))
+    return results[0], results[1], iterations
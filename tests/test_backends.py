@@ -0,0 +1,105 @@
+import unittest
+import networkx as nx
+
+from src.backends import BACKENDS, choose_backends
+from src.benchmark import check_backends
+from src.centrality import MEASURES, Centralities, provenance, reusable
+from src.networks import generate_barabasi
+
+
+class TestBackends(unittest.TestCase):
+    def test_choose_backends(self):
+        """
+        Test that measures fall back along the preference to the default implementation
+        """
+        chosen = choose_backends(("scipy", "networkx", "igraph"), MEASURES)
+        self.assertEqual(
+            chosen,
+            {"pagerank": "scipy", "eigenvector": "scipy", "subgraph": "scipy"},
+        )
+        self.assertEqual(choose_backends(("networkx", "scipy"), MEASURES), {})
+
+        chosen = choose_backends(("igraph", "scipy"), MEASURES)
+        if BACKENDS["igraph"].available():
+            self.assertEqual(chosen["pagerank"], "igraph")
+            self.assertEqual(chosen["betweenness"], "igraph")
+        else:
+            self.assertEqual(chosen["pagerank"], "scipy")
+            self.assertNotIn("betweenness", chosen)
+        self.assertNotIn("load", chosen)
+
+    def test_provenance(self):
+        """
+        Test that measures of one backend never stand in for those of another
+        """
+        chosen = choose_backends(("scipy",), MEASURES)
+        scipy = provenance("pagerank", chosen=chosen)
+        self.assertEqual(scipy, {"backend": "scipy"})
+        self.assertTrue(reusable(scipy, scipy))
+        self.assertFalse(reusable(scipy, provenance("pagerank")))
+        self.assertFalse(reusable(None, scipy))
+        self.assertTrue(reusable(None, provenance("degree", chosen=chosen)))
+
+    def test_conversion_cache(self):
+        """
+        Test that conversions are reused until the graph changes
+        """
+        backend = BACKENDS["scipy"]
+        g = nx.path_graph(10)
+        converted = backend.converted(g)
+        self.assertIs(backend.converted(g), converted)
+        g.remove_edge(0, 1)
+        self.assertIsNot(backend.converted(g), converted)
+        self.assertEqual(backend.converted(g)[1].nnz, 16)
+
+    def assertMatchesDefault(self, backend: str):
+        g = generate_barabasi(100, 3)
+        expected = Centralities()
+        expected.calc(g)
+        for workers in [1, 2]:
+            c = Centralities()
+            c.calc(g, workers=workers, backends=(backend,))
+            for measure in MEASURES:
+                for node in g.nodes():
+                    self.assertAlmostEqual(
+                        getattr(c, measure)[node],
+                        getattr(expected, measure)[node],
+                        delta=1.0e-04,
+                        msg=measure,
+                    )
+
+    def assertConsistent(self, backend: str):
+        records = [
+            record for record in check_backends() if record["backend"] == backend
+        ]
+        self.assertEqual(
+            {record["measure"] for record in records}, set(BACKENDS[backend].measures)
+        )
+        for record in records:
+            self.assertTrue(record["consistent"], record)
+
+    def test_calc(self):
+        """
+        Test that measures computed by the scipy backend match the default implementation
+        """
+        self.assertMatchesDefault("scipy")
+
+    @unittest.skipUnless(BACKENDS["igraph"].available(), "igraph is not installed")
+    def test_calc_igraph(self):
+        """
+        Test that measures computed by the igraph backend match the default implementation
+        """
+        self.assertMatchesDefault("igraph")
+
+    def test_check_backends(self):
+        """
+        Test that the scipy backend is consistent on the generated graphs
+        """
+        self.assertConsistent("scipy")
+
+    @unittest.skipUnless(BACKENDS["igraph"].available(), "igraph is not installed")
+    def test_check_igraph(self):
+        """
+        Test that the igraph backend is consistent on the generated graphs
+        """
+        self.assertConsistent("igraph")
@@ -0,0 +1,34 @@
+import unittest
+
+from src.benchmark import QUICK_LADDER, compare, run_benchmarks
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_run_benchmarks(self):
+        results = run_benchmarks(
+            QUICK_LADDER[:1], percentages=(10,), methods=range(0, 2), repeat=1
+        )
+        removal = [r for r in results["results"] if r["case"] == "removal"]
+        measures = {r["measure"] for r in results["results"] if r["case"] == "measure"}
+        # two methods, both implementations
+        self.assertEqual(len(removal), 4)
+        self.assertIn("betweenness+load+closeness+harmonic", measures)
+        self.assertIn("subgraph", measures)
+        self.assertTrue(all(r["seconds"] >= r["min"] > 0 for r in results["results"]))
+
+    def test_compare(self):
+        record = {"case": "measure", "graph": "ER-100-0.05", "measure": "degree"}
+        baseline = {"results": [{**record, "seconds": 1.0}]}
+        self.assertEqual(
+            compare({"results": [{**record, "seconds": 1.1}]}, baseline), []
+        )
+        (regression,) = compare({"results": [{**record, "seconds": 1.5}]}, baseline)
+        self.assertAlmostEqual(regression["ratio"], 1.5)
+        # below the noise floor
+        baseline = {"results": [{**record, "seconds": 1.0e-04}]}
+        self.assertEqual(
+            compare({"results": [{**record, "seconds": 5.0e-04}]}, baseline), []
+        )
+        # unknown cases are no regressions
+        other = {**record, "graph": "ER-200-0.05", "seconds": 9.0}
+        self.assertEqual(compare({"results": [other]}, baseline), [])
@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+import networkx as nx
+
+from src.cache import (
+    base_file,
+    cache_file,
+    cached_generated,
+    cached_graph,
+    generated_file,
+    source_key,
+)
+from src.networks import generate_ws, read_csv
+
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp.name, "network.csv")
+        self.cache_dir = os.path.join(self.tmp.name, "cache")
+        with open(self.source, "w") as f:
+            f.write("protein1,protein2\na,b\nb,c\nc,c\nd,a\n")
+        self.loads = 0
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def loader(self) -> nx.Graph:
+        self.loads += 1
+        return read_csv(self.source)
+
+    def test_cached_graph(self):
+        """
+        Test that a cached network is identical to the parsed one and not parsed again
+        """
+        g = cached_graph(self.source, self.loader, self.cache_dir, 1)
+        cached = cached_graph(self.source, self.loader, self.cache_dir, 1)
+        self.assertEqual(self.loads, 1)
+        self.assertEqual(list(cached.nodes()), list(g.nodes()))
+        self.assertTrue(nx.utils.graphs_equal(g, cached))
+
+        cached = cached_graph(self.source, self.loader, self.cache_dir, 1, True)
+        cached = cached_graph(self.source, self.loader, self.cache_dir, 1, True)
+        self.assertEqual(self.loads, 2)
+        self.assertTrue(nx.utils.graphs_equal(g, cached))
+
+    def test_stale_entries(self):
+        """
+        Test that changed sources, new loader versions and broken entries are parsed again
+        """
+        cached_graph(self.source, self.loader, self.cache_dir, 1)
+        cached_graph(self.source, self.loader, self.cache_dir, 2)
+        self.assertEqual(self.loads, 2)
+
+        with open(self.source, "a") as f:
+            f.write("e,f\n")
+        g = cached_graph(self.source, self.loader, self.cache_dir, 2)
+        self.assertEqual(self.loads, 3)
+        self.assertEqual(g.number_of_nodes(), 6)
+
+        file = cache_file(self.cache_dir, source_key(self.source, 2)["source"])
+        with open(file, "wb") as f:
+            f.write(b"broken")
+        g = cached_graph(self.source, self.loader, self.cache_dir, 2)
+        self.assertEqual(self.loads, 4)
+        self.assertEqual(g.number_of_nodes(), 6)
+        cached_graph(self.source, self.loader, self.cache_dir, 2)
+        self.assertEqual(self.loads, 4)
+
+    def test_cached_generated(self):
+        """
+        Test that generated networks are cached by their key and replace stale base centralities
+        """
+
+        def generate():
+            self.loads += 1
+            return generate_ws(50, 4, 0.2, seed=3)
+
+        key = {"network": "WS-50-4-0.2", "seed": 3, "version": 1}
+        edge_list = cached_generated(key, generate, self.cache_dir)
+        cached = cached_generated(key, generate, self.cache_dir)
+        self.assertEqual(self.loads, 1)
+        self.assertEqual(cached.nodes, edge_list.nodes)
+        self.assertTrue((cached.edges == edge_list.edges).all())
+
+        base = base_file(generated_file(self.cache_dir, key), "json")
+        open(base, "w").close()
+        cached_generated({**key, "version": 2}, generate, self.cache_dir)
+        self.assertEqual(self.loads, 2)
+        self.assertFalse(os.path.exists(base))
@@ -0,0 +1,260 @@
+import random
+import tempfile
+import unittest
+from collections import Counter
+
+import networkx as nx
+
+from src.centrality import MEASURES, Centralities, provenance, reusable
+from src.networks import generate_barabasi
+
+
+class TestCentrality(unittest.TestCase):
+    def test_parallel_matches_serial(self):
+        """
+        Test that the process pool produces the same centralities as the serial calculation
+        """
+        g = generate_barabasi(200, 3)
+        serial = Centralities()
+        serial.calc(g)
+        parallel = Centralities()
+        parallel.calc(g, workers=3)
+
+        for measure in [
+            "degree",
+            "betweenness",
+            "closeness",
+            "pagerank",
+            "eigenvector",
+            "harmonic",
+            "subgraph",
+            "load",
+        ]:
+            expected = getattr(serial, measure)
+            actual = getattr(parallel, measure)
+            self.assertEqual(expected.keys(), actual.keys())
+            for node in expected:
+                self.assertAlmostEqual(expected[node], actual[node], places=12)
+
+    def test_sparse_matches_networkx(self):
+        """
+        Test that the sparse backend gives the same pagerank and eigenvector centrality
+        """
+        g = generate_barabasi(200, 3)
+        expected = Centralities()
+        expected.calc(g)
+        actual = Centralities()
+        actual.calc(g, workers=2, sparse=True)
+
+        for measure in ["pagerank", "eigenvector"]:
+            for node in g.nodes():
+                self.assertAlmostEqual(
+                    getattr(expected, measure)[node],
+                    getattr(actual, measure)[node],
+                    places=10,
+                )
+
+    def test_approximation(self):
+        """
+        Test that approximated centralities record their pivots and error
+        """
+        g = generate_barabasi(500, 3)
+        c = Centralities()
+        c.calc(g, workers=2, error=0.2)
+        self.assertEqual(c.approximation["pivots"], 124)
+        self.assertLessEqual(c.approximation["error"], 0.2)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            c.save(f"{tmp}/c.json")
+            loaded = Centralities()
+            loaded.setup(f"{tmp}/c.json")
+        self.assertEqual(loaded.approximation, c.approximation)
+
+        c.calc(g)
+        self.assertIsNone(c.approximation)
+
+        # the pivot sweep without closeness and harmonic, and the exact fallback
+        for workers in [1, 2]:
+            paths = Centralities()
+            random.seed(0)
+            paths.calc(g, workers=workers, error=0.2, measures=("betweenness",))
+            self.assertEqual(paths.approximation["pivots"], 124)
+            self.assertIsNone(paths.closeness)
+        random.seed(0)
+        c.calc(g, workers=2, error=0.2)
+        for node in g:
+            self.assertAlmostEqual(paths.betweenness[node], c.betweenness[node])
+        with self.assertLogs(level="INFO") as logs:
+            c.calc(g, error=0.01, measures=("betweenness",))
+        self.assertIsNone(c.approximation)
+        self.assertIn("exact", logs.output[0])
+
+    def test_warm_start(self):
+        """
+        Test that warm starting from the base graph converges to the same result in fewer iterations
+        """
+        # warm starts only save iterations on average, sum them over a few graphs
+        iterations = {"cold": Counter(), "warm": Counter()}
+        for seed in range(5):
+            rng = random.Random(seed)
+            g = nx.barabasi_albert_graph(300, 5, seed=seed)
+            base = Centralities()
+            base.calc(g, sparse=True)
+            shrunk = g.copy()
+            shrunk.remove_edges_from(rng.sample(list(g.edges()), 100))
+
+            cold = Centralities()
+            cold.calc(shrunk, sparse=True)
+            warm = Centralities()
+            warm.calc(shrunk, sparse=True, warm_start=base)
+            iterations["cold"].update(cold.iterations)
+            iterations["warm"].update(warm.iterations)
+        for measure in ["pagerank", "eigenvector"]:
+            self.assertLess(iterations["warm"][measure], iterations["cold"][measure])
+
+        # compare the values well below the default tolerance
+        cold.calc(shrunk, sparse=True, tol=1.0e-10)
+        warm.calc(shrunk, sparse=True, tol=1.0e-10, warm_start=base)
+        for measure in ["pagerank", "eigenvector"]:
+            for node in shrunk.nodes():
+                self.assertAlmostEqual(
+                    getattr(cold, measure)[node], getattr(warm, measure)[node], places=5
+                )
+
+        networkx = Centralities()
+        networkx.calc(shrunk, warm_start=base)
+        self.assertEqual(networkx.iterations, {})
+        for node in shrunk.nodes():
+            self.assertAlmostEqual(
+                cold.pagerank[node], networkx.pagerank[node], places=5
+            )
+
+    def test_save_setup(self):
+        """
+        Test that JSON and binary files give back the same centralities
+        """
+        g = generate_barabasi(100, 3)
+        c = Centralities()
+        c.calc(g, sparse=True)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            for options, places in [
+                ({}, 15),
+                ({"binary": True}, 15),
+                ({"binary": True, "compress": True}, 15),
+                ({"binary": True, "float32": True}, 5),
+            ]:
+                file = f"{tmp}/c"
+                c.save(file, **options)
+                loaded = Centralities()
+                loaded.setup(file)
+                self.assertEqual(loaded.iterations, c.iterations)
+                for measure in MEASURES:
+                    expected = getattr(c, measure)
+                    actual = getattr(loaded, measure)
+                    self.assertEqual(len(expected), len(actual))
+                    for node in g.nodes():
+                        # JSON turns the integer labels into strings
+                        key = node if options else str(node)
+                        self.assertAlmostEqual(
+                            expected[node] / max(expected.values()),
+                            actual[key] / max(expected.values()),
+                            places=places,
+                        )
+
+                # binary files can be exported to JSON
+                loaded.save(f"{tmp}/export.json")
+                exported = Centralities()
+                exported.setup(f"{tmp}/export.json")
+                self.assertEqual(len(exported.degree), g.number_of_nodes())
+
+    def test_measures(self):
+        """
+        Test that only the selected measures are calculated, saved and read
+        """
+        g = generate_barabasi(100, 3)
+        full = Centralities()
+        full.calc(g, sparse=True)
+
+        measures = ("degree", "pagerank", "betweenness")
+        for workers in [1, 2]:
+            c = Centralities()
+            c.calc(g, workers=workers, sparse=True, measures=measures)
+            self.assertEqual(c.measures, ("degree", "betweenness", "pagerank"))
+            for measure in MEASURES:
+                if measure in measures:
+                    for node in g.nodes():
+                        self.assertAlmostEqual(
+                            getattr(c, measure)[node],
+                            getattr(full, measure)[node],
+                            places=12,
+                        )
+                else:
+                    self.assertIsNone(getattr(c, measure))
+            self.assertEqual(list(c.iterations), ["pagerank"])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            for options in [{}, {"binary": True}]:
+                file = f"{tmp}/c"
+                c.save(file, **options)
+                loaded = Centralities()
+                loaded.setup(file)
+                self.assertEqual(loaded.measures, c.measures)
+                self.assertIsNone(loaded.closeness)
+                self.assertEqual(len(loaded.betweenness), g.number_of_nodes())
+
+    def test_lazy(self):
+        """
+        Test that lazy measures are calculated on first access, together with their group
+        """
+        g = generate_barabasi(100, 3)
+        full = Centralities()
+        full.calc(g)
+
+        c = Centralities()
+        c.calc(g, lazy=True)
+        self.assertNotIn("degree", vars(c))
+        self.assertEqual(c.degree, full.degree)
+        self.assertNotIn("closeness", vars(c))
+        self.assertEqual(c.load, full.load)
+        # the shortest path measures come from one traversal
+        self.assertIn("closeness", vars(c))
+        self.assertNotIn("subgraph", vars(c))
+
+        # without the graph, pending measures can't be calculated
+        c.g_copy = None
+        self.assertIsNone(c.subgraph)
+        with self.assertRaises(AttributeError):
+            c.unknown
+
+    def test_subgraph_tol(self):
+        """
+        Test that estimated subgraph centrality keeps its error bound through save and setup
+        """
+        g = generate_barabasi(100, 3)
+        exact = Centralities()
+        exact.calc(g, measures=("subgraph",))
+        self.assertIsNone(exact.subgraph_error)
+
+        c = Centralities()
+        c.calc(g, workers=2, measures=("subgraph",), subgraph_tol=1.0e-06)
+        self.assertLessEqual(c.subgraph_error["error"], 1.0e-06)
+        for node in g.nodes():
+            self.assertAlmostEqual(
+                c.subgraph[node] / exact.subgraph[node], 1.0, delta=1.0e-06
+            )
+
+        with tempfile.TemporaryDirectory() as tmp:
+            c.save(f"{tmp}/c", binary=True)
+            loaded = Centralities()
+            loaded.setup(f"{tmp}/c")
+            self.assertEqual(loaded.subgraph_error, c.subgraph_error)
+            self.assertEqual(loaded.provenance, c.provenance)
+
+        # an estimate only stands in for an estimate of at most its error
+        estimated = c.provenance["subgraph"]
+        self.assertTrue(reusable(estimated, provenance("subgraph", 1.0e-06)))
+        self.assertFalse(reusable(estimated, provenance("subgraph", 1.0e-09)))
+        self.assertFalse(reusable(estimated, provenance("subgraph")))
+        self.assertTrue(reusable(exact.provenance["subgraph"], provenance("subgraph")))
+        self.assertTrue(reusable(None, provenance("subgraph", 1.0e-06)))
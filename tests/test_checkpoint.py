@@ -0,0 +1,41 @@
+import os
+import tempfile
+import unittest
+
+from src.checkpoint import Manifest, unit_seed
+
+
+class TestCheckpoint(unittest.TestCase):
+    def test_unit_seed(self):
+        self.assertEqual(
+            unit_seed(1, "net", 0, [10], 3), unit_seed(1, "net", 0, [10], 3)
+        )
+        self.assertNotEqual(
+            unit_seed(1, "net", 0, [10], 3), unit_seed(1, "net", 0, [10], 4)
+        )
+        self.assertNotEqual(
+            unit_seed(1, "net", 0, [10], 3), unit_seed(2, "net", 0, [10], 3)
+        )
+        self.assertLess(unit_seed(None, "net"), 2**32)
+
+    def test_manifest(self):
+        """
+        Test that completed units survive a reopen and a torn last line is skipped
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            file = os.path.join(tmp, "manifest.jsonl")
+            manifest = Manifest(file)
+            self.assertEqual(len(manifest), 0)
+            manifest.record("net", 1, 10, 0, seed=5)
+            manifest.record("net", 1, 10, 1, seed=6)
+            self.assertTrue(manifest.done("net", 1, 10, 1))
+
+            with open(file, "a") as f:
+                f.write('{"network": "net", "method": 1, "perc')
+            manifest = Manifest(file)
+            self.assertEqual(len(manifest), 2)
+            self.assertTrue(manifest.done("net", 1, 10, 0))
+            self.assertFalse(manifest.done("net", 1, 20, 0))
+
+            manifest.record("net", 1, 20, 0)
+            self.assertEqual(len(Manifest(file)), 3)
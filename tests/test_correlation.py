@@ -0,0 +1,106 @@
+import unittest
+import numpy as np
+from scipy.stats import kendalltau, spearmanr
+
+from src.centrality import MEASURES, Centralities
+from src.correlation import CorrelationEngine, Correlations
+from src.methods import edge_removal_random
+from src.networks import generate_barabasi
+
+
+class TestCorrelation(unittest.TestCase):
+
+    base = None
+    mods = None
+
+    @classmethod
+    def setUpClass(cls):
+        cls.g = generate_barabasi(200, 3)
+        cls.base = Centralities()
+        cls.base.calc(cls.g)
+        cls.mods = []
+        for remove in [50, 200]:
+            mod = Centralities()
+            # a new node order must not matter
+            shrunk = edge_removal_random(cls.g, remove)
+            reordered = shrunk.__class__()
+            reordered.add_nodes_from(reversed(list(shrunk.nodes())))
+            reordered.add_edges_from(shrunk.edges())
+            mod.calc(reordered)
+            cls.mods.append(mod)
+
+    def test_batch_matches_scipy(self):
+        """
+        Test the vectorized statistics against scipy, computed one by one
+        """
+        nodes = list(self.g.nodes())
+        engine = CorrelationEngine(self.base, nodes)
+        statistics = engine.correlate(self.mods, kendall=True, top_k=10)
+        self.assertEqual(statistics["spearman"].shape, (2, len(MEASURES)))
+
+        for b, mod in enumerate(self.mods):
+            for j, measure in enumerate(MEASURES):
+                base_values = [getattr(self.base, measure)[n] for n in nodes]
+                mod_values = [getattr(mod, measure)[n] for n in nodes]
+                self.assertAlmostEqual(
+                    statistics["spearman"][b, j],
+                    spearmanr(base_values, mod_values).statistic,
+                )
+                self.assertAlmostEqual(
+                    statistics["kendall"][b, j],
+                    kendalltau(base_values, mod_values).statistic,
+                )
+                self.assertGreaterEqual(statistics["top10"][b, j], 0)
+                self.assertLessEqual(statistics["top10"][b, j], 1)
+
+        identical = engine.correlate([self.base], top_k=10)
+        self.assertTrue(np.allclose(identical["spearman"], 1))
+        self.assertTrue(np.allclose(identical["top10"], 1))
+
+    def test_correlations(self):
+        """
+        Test that the per iteration correlations expose the Spearman values
+        """
+        c = Correlations(self.base, self.mods[0], self.g)
+        engine = CorrelationEngine(self.base, list(self.g.nodes()))
+        expected = engine.correlate([self.mods[0]])["spearman"][0]
+        for measure, value in zip(MEASURES, expected):
+            self.assertAlmostEqual(getattr(c, measure), value)
+
+    def test_correlations_batch(self):
+        """
+        Test that correlating a batch gives the correlations of each iteration
+        """
+        engine = CorrelationEngine(self.base, list(self.g.nodes()))
+        batch = Correlations.batch(engine, self.mods, kendall=True, top_k=10)
+        self.assertEqual(len(batch), len(self.mods))
+        for c, mod in zip(batch, self.mods):
+            single = Correlations(self.base, mod, self.g, kendall=True, top_k=10)
+            self.assertEqual(c.statistics.keys(), single.statistics.keys())
+            for statistic, values in single.statistics.items():
+                self.assertTrue(np.allclose(c.statistics[statistic], values))
+
+    def test_partial_measures(self):
+        """
+        Test that measures computed for only one of the centralities are NaN
+        """
+        mod = Centralities()
+        mod.calc(edge_removal_random(self.g, 50), measures=("degree", "closeness"))
+        c = Correlations(self.base, mod, self.g)
+        engine = CorrelationEngine(self.base, list(self.g.nodes()), mod.measures)
+        expected = dict(zip(mod.measures, engine.correlate([mod])["spearman"][0]))
+        for measure in MEASURES:
+            if measure in mod.measures:
+                self.assertAlmostEqual(getattr(c, measure), expected[measure])
+            else:
+                self.assertTrue(np.isnan(getattr(c, measure)))
+        self.assertEqual(len(c.statistics["spearman"]), len(MEASURES))
+
+    def test_top_k_positive(self):
+        """
+        Test that a top k overlap of no or a negative number of nodes is refused
+        """
+        engine = CorrelationEngine(self.base, list(self.g.nodes()))
+        for top_k in [0, -3]:
+            with self.assertRaises(ValueError):
+                engine.correlate(self.mods, top_k=top_k)
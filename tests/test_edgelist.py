@@ -0,0 +1,133 @@
+import random
+import unittest
+import networkx as nx
+import numpy as np
+
+from src.edgelist import (
+    EdgeList,
+    LiveIncidence,
+    apply_edge_removal_mask,
+    keep_mask,
+    removal_order,
+)
+from src.methods import apply_edge_removal, edge_removal_random
+from src.networks import generate_ws
+
+
+class TestEdgeList(unittest.TestCase):
+
+    test_graph = None
+
+    @classmethod
+    def setUpClass(cls):
+        cls.test_graph = generate_ws(1000, 20, 0.1)
+
+    def test_from_graph(self):
+        """
+        Test the round trip between networkx graphs and edge lists
+        """
+        g = nx.relabel_nodes(self.test_graph, lambda n: f"P{n}")
+        g.add_node("isolated")
+        g.add_edge("P1", "P1")
+        edge_list = EdgeList.from_graph(g)
+        self.assertEqual(edge_list.number_of_nodes(), g.number_of_nodes())
+        self.assertEqual(edge_list.number_of_edges(), g.number_of_edges())
+        self.assertEqual(
+            edge_list.degrees().tolist(), [d for _, d in g.degree(g.nodes())]
+        )
+
+        g_copy = edge_list.to_graph()
+        self.assertEqual(list(g_copy.nodes()), list(g.nodes()))
+        self.assertTrue(nx.utils.graphs_equal(g, g_copy))
+        self.assertTrue(
+            np.array_equal(
+                edge_list.adjacency().toarray(),
+                nx.to_numpy_array(g, nodelist=g.nodes()),
+            )
+        )
+
+    def test_live_incidence(self):
+        """
+        Test that removed edges disappear from the incidence of both end points
+        """
+        g = nx.Graph([(0, 1), (0, 2), (1, 2), (2, 2), (2, 3)])
+        edge_list = EdgeList.from_graph(g)
+        incidence = LiveIncidence(edge_list)
+        self.assertEqual(sorted(incidence.edges_of(2)), [1, 2, 3, 4])
+
+        for edge in [2, 3, 0]:
+            incidence.remove(edge)
+        self.assertEqual(sorted(incidence.edges_of(2)), [1, 4])
+        self.assertEqual(incidence.edges_of(1), [])
+        self.assertEqual(incidence.edges_of(0), [1])
+        self.assertEqual(incidence.other(4, 2), 3)
+
+    def test_apply_edge_removal_mask(self):
+        """
+        Test that all methods remove the requested number of edges
+        """
+        g = self.test_graph.copy()
+        g.add_edge(0, 0)
+        edge_list = EdgeList.from_graph(g)
+        expected_edges = g.number_of_edges()
+
+        for method in range(6):
+            for remove in [0, 100, 1234, 9999999999]:
+                keep = apply_edge_removal_mask(edge_list, remove, method)
+                self.assertEqual(keep.sum(), max(0, expected_edges - remove))
+                g_copy = edge_list.to_graph(keep)
+                self.assertEqual(g_copy.number_of_nodes(), g.number_of_nodes())
+                self.assertEqual(
+                    g_copy.number_of_edges(), max(0, expected_edges - remove)
+                )
+
+    def test_removal_order(self):
+        """
+        Test that removal orders are free of duplicates and are prefixes of the graph's edges
+        """
+        g = self.test_graph.copy()
+        edge_list = EdgeList.from_graph(g)
+        m = g.number_of_edges()
+
+        for method in range(6):
+            for remove in [0, 100, 9999999999]:
+                order = removal_order(edge_list, remove, method)
+                self.assertEqual(len(order), min(m, remove))
+                self.assertEqual(len(np.unique(order)), len(order))
+                keep = keep_mask(edge_list, order[:50])
+                self.assertEqual(keep.sum(), m - min(50, len(order)))
+
+    def test_random_paths_agree(self):
+        """
+        Test that the graph and edge array paths of method 0 remove the same edges for the same seed
+        """
+        g = self.test_graph
+        edge_list = EdgeList.from_graph(g)
+        np.random.seed(5)
+        expected = edge_removal_random(g, 300)
+        np.random.seed(5)
+        keep = apply_edge_removal_mask(edge_list, 300, 0)
+        self.assertTrue(nx.utils.graphs_equal(edge_list.to_graph(keep), expected))
+
+    def test_biased_paths_agree(self):
+        """
+        Test that the graph and edge array paths of the degree biased methods remove every edge equally often
+        """
+        g = nx.barabasi_albert_graph(20, 2, seed=1)
+        edge_list = EdgeList.from_graph(g)
+        trials, remove = 2000, 5
+        random.seed(3)
+        np.random.seed(3)
+        for method in [1, 2, 3]:
+            removed_mask = np.zeros(g.number_of_edges())
+            removed_graph = np.zeros(g.number_of_edges())
+            for _ in range(trials):
+                removed_mask += ~apply_edge_removal_mask(edge_list, remove, method)
+                shrunk = apply_edge_removal(g, remove, method)
+                removed_graph += [not shrunk.has_edge(u, v) for u, v in g.edges()]
+            frequencies = removed_mask / trials
+            self.assertLess(np.abs(frequencies - removed_graph / trials).max(), 0.05)
+            if method == 2:
+                # edges of lowly connected nodes are removed visibly more often
+                uniform = remove / g.number_of_edges()
+                self.assertGreater(np.abs(frequencies - uniform).max(), 0.1)
@@ -0,0 +1,122 @@
+import unittest
+import networkx as nx
+import numpy as np
+
+from src.centrality import MEASURES, Centralities
+from src.edgelist import EdgeList, apply_edge_removal_mask
+from src.graph import CompactGraph
+from src.networks import generate_ws
+from src.paths import adjacency
+from src.simulation import shrunk_centralities
+
+
+class TestCompactGraph(unittest.TestCase):
+
+    test_graph = None
+
+    @classmethod
+    def setUpClass(cls):
+        cls.test_graph = nx.relabel_nodes(generate_ws(200, 8, 0.1), lambda n: f"P{n}")
+        cls.test_graph.add_node("isolated")
+        cls.test_graph.add_edge("P1", "P1")
+
+    def test_from_networkx(self):
+        """
+        Test that a compact graph has the adjacency and degrees of the networkx graph
+        """
+        g = self.test_graph
+        compact = CompactGraph.from_networkx(g)
+        self.assertEqual(compact.nodes(), list(g.nodes()))
+        self.assertEqual(compact.number_of_nodes(), g.number_of_nodes())
+        self.assertEqual(compact.number_of_edges(), g.number_of_edges())
+        self.assertEqual(compact.degree.tolist(), [d for _, d in g.degree(g.nodes())])
+        self.assertTrue(
+            np.array_equal(
+                compact.csr().toarray(), nx.to_numpy_array(g, nodelist=g.nodes())
+            )
+        )
+
+        labels, indptr, indices = adjacency(compact)
+        _, nx_indptr, nx_indices = adjacency(g)
+        self.assertEqual(indptr, nx_indptr)
+        for v in range(len(labels)):
+            self.assertEqual(
+                sorted(indices[indptr[v] : indptr[v + 1]]),
+                sorted(nx_indices[nx_indptr[v] : nx_indptr[v + 1]]),
+            )
+
+        g_copy = compact.to_networkx()
+        self.assertEqual(list(g_copy.nodes()), list(g.nodes()))
+        self.assertTrue(nx.utils.graphs_equal(g, g_copy))
+
+    def test_from_edge_list(self):
+        """
+        Test that a masked edge list gives the same graph as a networkx graph
+        """
+        edge_list = EdgeList.from_graph(self.test_graph)
+        keep = apply_edge_removal_mask(edge_list, 300, 0)
+        compact = CompactGraph.from_edge_list(edge_list, keep)
+        self.assertIs(compact.nodes(), edge_list.nodes)
+        self.assertTrue(
+            nx.utils.graphs_equal(compact.to_networkx(), edge_list.to_graph(keep))
+        )
+        self.assertEqual(compact.edges().shape, (int(keep.sum()), 2))
+
+    def test_calc(self):
+        """
+        Test that the centralities of a compact graph match those of the networkx graph
+        """
+        g = nx.convert_node_labels_to_integers(generate_ws(100, 6, 0.2))
+        expected = Centralities()
+        expected.calc(g)
+        for sparse in [False, True]:
+            for workers in [1, 2]:
+                compact = Centralities()
+                compact.calc(
+                    CompactGraph.from_networkx(g), workers=workers, sparse=sparse
+                )
+                for measure in MEASURES:
+                    for node in g.nodes():
+                        self.assertAlmostEqual(
+                            getattr(compact, measure)[node],
+                            getattr(expected, measure)[node],
+                            delta=1.0e-04,
+                            msg=f"{measure} of {node}",
+                        )
+
+    def test_single_conversion(self):
+        """
+        Test that pagerank and eigenvector centrality of a compact graph share one networkx copy
+        """
+
+        class CountingGraph(CompactGraph):
+            conversions = 0
+
+            def to_networkx(self) -> nx.Graph:
+                CountingGraph.conversions += 1
+                return super().to_networkx()
+
+        g = CountingGraph.from_networkx(generate_ws(100, 6, 0.2))
+        c = Centralities()
+        c.calc(g, measures=("degree", "pagerank", "eigenvector"))
+        self.assertEqual(CountingGraph.conversions, 1)
+        self.assertEqual(len(c.pagerank), 100)
+        self.assertEqual(len(c.eigenvector), 100)
+
+    def test_shrunk_centralities(self):
+        """
+        Test that shrunk compact graphs are compact and keep all nodes
+        """
+        g = CompactGraph.from_networkx(generate_ws(100, 6, 0.2))
+        edge_list = EdgeList(g.nodes(), g.edges())
+        base = Centralities()
+        base.calc(g)
+        current = shrunk_centralities(g, base, edge_list, 50, 0, {})
+        self.assertEqual(len(current.degree), 100)
+        self.assertAlmostEqual(
+            sum(current.degree.values()) * 99 / 2, g.number_of_edges() - 50
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,9 @@
+import os
+import tempfile
 import unittest
 
+import networkx as nx
+
 from src.networks import (
     get_graph,
     generate_er,
@@ -20,6 +24,51 @@ class TestNetworks(unittest.TestCase):
         self.assertEqual(g.number_of_nodes(), 6394)
         self.assertEqual(g.number_of_edges(), 986995)
 
+    def test_read_string_db_file(self):
+        """
+        Test parsing of a small STRING file with duplicates, a self-loop and low scores
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            file = os.path.join(tmp, "links.txt")
+            with open(file, "w") as f:
+                f.write("protein1 protein2 combined_score\n")
+                f.write("4932.A 4932.B 500\n")
+                f.write("4932.B 4932.A 500\n")
+                f.write("4932.A 4932.C 150\n")
+                f.write("4932.C 4932.D 151\n")
+                f.write("4932.D 4932.D 900\n")
+                f.write("4932.E 4932.F 100\n")
+                f.write("4932.D  700\n")
+            # duplicates within and across chunks
+            for chunksize in [1 << 20, 2, 1]:
+                g = read_string_db(file, chunksize=chunksize)
+                self.assertEqual(list(g.nodes()), ["A", "B", "C", "D"])
+                self.assertEqual(list(g.edges()), [("A", "B"), ("C", "D"), ("D", "D")])
+
+                g = read_string_db(file, threshold=50, chunksize=chunksize)
+                self.assertEqual(g.number_of_nodes(), 6)
+                self.assertEqual(g.number_of_edges(), 5)
+
+    def test_read_csv_file(self):
+        """
+        Test that undirected duplicates in CSV networks collapse into one edge
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            file = os.path.join(tmp, "network.csv")
+            with open(file, "w") as f:
+                f.write("protein1,protein2\n")
+                f.write("a,b\nb,a\nb,c\na,b\nc,c\n")
+            g = read_csv(file)
+            self.assertEqual(list(g.nodes()), ["a", "b", "c"])
+            self.assertEqual(g.number_of_edges(), 3)
+
+            # rows with a missing end point are dropped
+            with open(file, "w") as f:
+                f.write("protein1,protein2\n")
+                f.write("A,B\nB,C\n,A\nC,\n")
+            g = read_csv(file)
+            self.assertEqual(list(g.edges()), [("A", "B"), ("B", "C")])
+
     def test_read_biogrid_db(self):
         """
         Test parsing of the BIOGRID DB data
@@ -114,6 +163,22 @@ class TestNetworks(unittest.TestCase):
             self.assertEqual(g.number_of_nodes(), 1000)
             self.assertTrue(random)
 
+    def test_get_graph_seed(self):
+        """
+        Test that seeded generated graphs are identical, whether generated or read from the cache
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            g, random = get_graph("ER-1000-0.1", seed=1)
+            self.assertTrue(random)
+            self.assertTrue(
+                nx.utils.graphs_equal(g, get_graph("ER-1000-0.1", seed=1)[0])
+            )
+            cached = [get_graph("ER-1000-0.1", tmp, seed=1)[0] for _ in range(2)]
+            self.assertEqual(len(os.listdir(tmp)), 1)
+            self.assertTrue(nx.utils.graphs_equal(g, cached[0]))
+            self.assertTrue(nx.utils.graphs_equal(cached[0], cached[1]))
+            self.assertEqual(list(cached[0].edges()), list(cached[1].edges()))
+
     def test_get_graph_file(self):
         """
         Test that generated graphs have correct sizes and are all marked to be *NOT* random
@@ -0,0 +1,88 @@
+import unittest
+import networkx as nx
+
+from src.paths import path_centralities, pivot_count, pivot_error
+from src.networks import generate_er, generate_barabasi, generate_ws
+
+
+class TestPaths(unittest.TestCase):
+    def assertSameCentrality(self, expected: dict, actual: dict):
+        self.assertEqual(set(expected.keys()), set(actual.keys()))
+        for node in expected:
+            self.assertAlmostEqual(
+                expected[node], actual[node], delta=1.0e-12 * max(1.0, expected[node])
+            )
+
+    def assertMatchesNetworkx(self, g: nx.Graph):
+        betweenness, load, closeness, harmonic = path_centralities(g)
+        self.assertSameCentrality(nx.betweenness_centrality(g), betweenness)
+        self.assertSameCentrality(nx.load_centrality(g), load)
+        self.assertSameCentrality(nx.closeness_centrality(g), closeness)
+        self.assertSameCentrality(nx.harmonic_centrality(g), harmonic)
+
+    def test_generated_networks(self):
+        """
+        Test that the fused traversal reproduces the networkx measures
+        """
+        self.assertMatchesNetworkx(generate_er(100, 0.05))
+        self.assertMatchesNetworkx(generate_barabasi(100, 3))
+        self.assertMatchesNetworkx(generate_ws(100, 4, 0.1))
+
+    def test_disconnected_network(self):
+        """
+        Test graphs with several components, isolated nodes and string labels
+        """
+        g = nx.relabel_nodes(generate_er(60, 0.03), lambda n: f"P{n}")
+        g.add_node("isolated")
+        g.add_edge("a", "b")
+        self.assertMatchesNetworkx(g)
+
+    def test_tiny_networks(self):
+        """
+        Test the corner cases without normalisation
+        """
+        g = nx.Graph()
+        g.add_node(1)
+        self.assertMatchesNetworkx(g)
+        g.add_edge(1, 2)
+        self.assertMatchesNetworkx(g)
+
+    def test_pivot_count(self):
+        """
+        Test the number of pivots for an error bound
+        """
+        self.assertEqual(pivot_count(1000, 0.1, 0.95), 530)
+        self.assertEqual(pivot_count(1000, 0.01, 0.95), 1000)
+        self.assertLessEqual(pivot_error(1000, 530, 0.95), 0.1)
+        self.assertGreater(pivot_error(1000, 529, 0.95), 0.1)
+        self.assertEqual(pivot_error(1000, 1000, 0.95), 0)
+        for error, confidence in [(0, 0.95), (-0.1, 0.95), (0.1, 1), (0.1, 0)]:
+            with self.assertRaises(ValueError):
+                pivot_count(1000, error, confidence)
+
+    def test_approximation(self):
+        """
+        Test that sampled pivots estimate betweenness and load within the bound
+        """
+        g = generate_barabasi(500, 3)
+        pivots = set(range(0, 500, 2))
+        betweenness, load, closeness, harmonic = path_centralities(g, pivots)
+        error = pivot_error(500, len(pivots), 0.95)
+        expected = nx.betweenness_centrality(g)
+        for node in g:
+            self.assertLess(abs(expected[node] - betweenness[node]), error)
+        expected = nx.load_centrality(g)
+        for node in g:
+            self.assertLess(abs(expected[node] - load[node]), error)
+        self.assertSameCentrality(nx.closeness_centrality(g), closeness)
+        self.assertSameCentrality(nx.harmonic_centrality(g), harmonic)
+
+        # without closeness and harmonic only the pivots are swept
+        only_pivots = path_centralities(g, pivots, distances=False)
+        self.assertSameCentrality(betweenness, only_pivots[0])
+        self.assertSameCentrality(load, only_pivots[1])
+        self.assertEqual(set(only_pivots[2].values()), {0.0})
+
+        # all nodes as pivots is exact
+        betweenness, *_ = path_centralities(g, set(range(500)))
+        self.assertSameCentrality(nx.betweenness_centrality(g), betweenness)
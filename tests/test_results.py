@@ -0,0 +1,73 @@
+import glob
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from src.centrality import MEASURES, Centralities
+from src.correlation import Correlations
+from src.methods import edge_removal_random
+from src.networks import generate_barabasi
+from src.results import HOST, CsvSink, SqliteSink, query_results
+
+
+class TestResults(unittest.TestCase):
+
+    correlations = None
+
+    @classmethod
+    def setUpClass(cls):
+        g = generate_barabasi(100, 3)
+        base = Centralities()
+        base.calc(g)
+        mod = Centralities()
+        mod.calc(edge_removal_random(g, 30))
+        cls.correlations = Correlations(base, mod, g, kendall=True)
+
+    def test_csv_sink(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            sink = CsvSink(tmp)
+            sink.open_run({})
+            for iteration in range(3):
+                sink.write(self.correlations, "net", 10, 2, iteration)
+            sink.close_run()
+            with open(f"{tmp}/net--10--method-2--{HOST}.csv") as f:
+                self.assertEqual(len(f.readlines()), 3)
+            self.assertEqual(len(glob.glob(f"{tmp}/*--kendall.csv")), 1)
+
+    def test_sqlite_sink(self):
+        """
+        Test that batched rows are all stored with their run and can be queried
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            database = os.path.join(tmp, "sub", "results.sqlite")
+            sink = SqliteSink(database, batch_size=4)
+            sink.open_run({"seed": 3, "networks": ["net"]})
+            for iteration in range(3):
+                sink.write(self.correlations, "net", 10, 2, iteration, seed=iteration)
+            # 6 rows were written, the last batch is still buffered
+            self.assertEqual(len(query_results(database, statistic="kendall")), 2)
+            sink.write(self.correlations, "other", 20, 1, 0)
+            sink.close()
+
+            spearman = query_results(database, network="net", method=2)
+            self.assertEqual(len(spearman), 3)
+            self.assertEqual(list(spearman["iteration"]), [0, 1, 2])
+            self.assertEqual(list(spearman["seed"]), [0, 1, 2])
+            self.assertEqual((spearman["host"] == HOST).all(), True)
+            for measure in MEASURES:
+                self.assertAlmostEqual(
+                    spearman[measure][0], getattr(self.correlations, measure)
+                )
+            self.assertEqual(len(query_results(database, percentage=20)), 1)
+            self.assertEqual(len(query_results(database, host="elsewhere")), 0)
+
+            connection = sqlite3.connect(database)
+            ((mode,),) = connection.execute("PRAGMA journal_mode").fetchall()
+            self.assertEqual(mode, "wal")
+            ((seed, finished),) = connection.execute(
+                "SELECT seed, finished FROM runs"
+            ).fetchall()
+            self.assertEqual(seed, 3)
+            self.assertIsNotNone(finished)
+            connection.close()
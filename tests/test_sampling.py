@@ -0,0 +1,110 @@
+import random
+import unittest
+from collections import Counter
+
+import networkx as nx
+import numpy as np
+
+from src.methods import edge_removal_3_degree_probabilities
+from src.networks import generate_barabasi
+from src.sampling import (
+    DegreeRankSampler,
+    WeightedSampler,
+    sample_without_replacement,
+)
+
+
+class TestSampling(unittest.TestCase):
+    def test_weighted_sampler(self):
+        """
+        Test that keys are drawn proportionally to their weights
+        """
+        random.seed(42)
+        weights = {"a": 1.0, "b": 2.0, "c": 0.0, "d": 5.0, "e": 2.0}
+        sampler = WeightedSampler(weights.keys(), weights.values())
+        self.assertEqual(sampler.total(), 10.0)
+
+        draws = 100000
+        counts = Counter(sampler.sample() for _ in range(draws))
+        self.assertNotIn("c", counts)
+        for key, weight in weights.items():
+            self.assertAlmostEqual(counts[key] / draws, weight / 10.0, delta=0.01)
+
+    def test_weighted_sampler_update(self):
+        """
+        Test that updated weights are taken into account and zero weights are never drawn
+        """
+        random.seed(42)
+        keys = list(range(7))
+        sampler = WeightedSampler(keys, [1.0] * 7)
+        for key in keys[:-1]:
+            sampler.update(key, 0)
+        sampler.add(6, 2.5)
+        self.assertEqual(sampler.total(), 3.5)
+        self.assertEqual(sampler.weight(6), 3.5)
+        self.assertEqual({sampler.sample() for _ in range(1000)}, {6})
+
+        sampler.update(6, 0)
+        self.assertRaises(ValueError, sampler.sample)
+
+    def test_degree_rank_sampler(self):
+        """
+        Test that the rank sampler matches the probabilities of `edge_removal_3_degree_probabilities`
+        """
+        random.seed(42)
+        g = generate_barabasi(60, 2)
+        g.add_node("isolated")
+        sampler = DegreeRankSampler(dict(nx.degree(g)))
+        for u, v in list(g.edges())[:40]:
+            g.remove_edge(u, v)
+            sampler.decrement(u)
+            sampler.decrement(v)
+
+        # average the probabilities over many random tie breaks
+        rounds = 2000
+        expected = Counter()
+        for _ in range(rounds):
+            probabilities = edge_removal_3_degree_probabilities(g)
+            total = sum(probabilities.values())
+            for node, probability in probabilities.items():
+                expected[node] += probability / total / rounds
+
+        self.assertEqual(len(sampler), len(expected))
+        self.assertAlmostEqual(sum(sampler.probability(n) for n in g.nodes()), 1.0)
+        for node in g.nodes():
+            self.assertAlmostEqual(
+                sampler.probability(node), expected[node], delta=0.001
+            )
+
+        draws = 100000
+        counts = Counter(sampler.sample() for _ in range(draws))
+        for node in g.nodes():
+            self.assertAlmostEqual(
+                counts[node] / draws, sampler.probability(node), delta=0.005
+            )
+
+    def test_sample_without_replacement(self):
+        """
+        Test that batched draws are distributed like successive weighted draws
+        """
+        np.random.seed(42)
+        weights = np.array([1.0, 2.0, 3.0, 4.0, 0.0])
+        draws = 50000
+        counts = Counter(
+            tuple(sample_without_replacement(5, 2, weights).tolist())
+            for _ in range(draws)
+        )
+        self.assertFalse([pair for pair in counts if 4 in pair])
+        for (first, second), count in counts.items():
+            expected = weights[first] / 10 * weights[second] / (10 - weights[first])
+            self.assertAlmostEqual(count / draws, expected, delta=0.01)
+
+        # zero weights are drawn last
+        order = sample_without_replacement(5, 10, weights)
+        self.assertEqual(sorted(order.tolist()), [0, 1, 2, 3, 4])
+        self.assertEqual(order[-1], 4)
+
+        counts = Counter(sample_without_replacement(4, 1)[0] for _ in range(draws))
+        for i in range(4):
+            self.assertAlmostEqual(counts[i] / draws, 0.25, delta=0.01)
+        self.assertEqual(len(sample_without_replacement(4, 0)), 0)
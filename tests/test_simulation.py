@@ -0,0 +1,283 @@
+import glob
+import math
+import os
+import random
+import tempfile
+import unittest
+
+import networkx as nx
+import numpy as np
+
+from src.centrality import MEASURES, Centralities
+from src.checkpoint import Manifest
+from src.edgelist import EdgeList
+from src.graph import CompactGraph
+from src.networks import generate_barabasi
+from src.results import SqliteSink, query_results
+from src.simulation import (
+    Simulation,
+    centrality_file,
+    nested_centralities,
+    shrunk_centralities,
+)
+
+
+class TestSimulation(unittest.TestCase):
+
+    g = None
+    base = None
+
+    @classmethod
+    def setUpClass(cls):
+        cls.g = generate_barabasi(100, 3)
+        cls.base = Centralities()
+        cls.base.calc(cls.g.copy())
+
+    def test_shrunk_centralities(self):
+        for edge_list in [None, EdgeList.from_graph(self.g)]:
+            current = shrunk_centralities(
+                self.g, self.base, edge_list, 50, 1, {"sparse": True}, warm_start=True
+            )
+            self.assertIsNone(current.g_copy)
+            self.assertEqual(set(current.degree), set(self.g.nodes()))
+
+    def test_nested_centralities(self):
+        """
+        Test that in place and rebuilt nested removals give the same centralities for the same order
+        """
+        edge_list = EdgeList.from_graph(self.g)
+        nums = [60, 20, 40]
+        results = []
+        for in_place in [True, False]:
+            random.seed(3)
+            np.random.seed(3)
+            results.append(
+                nested_centralities(
+                    self.g, self.base, edge_list, nums, 0, {}, in_place=in_place
+                )
+            )
+        for num, in_place, rebuilt in zip(nums, *results):
+            degrees = sum(in_place.degree.values()) * (self.g.number_of_nodes() - 1)
+            self.assertAlmostEqual(degrees, 2 * (self.g.number_of_edges() - num))
+            for node in self.g.nodes():
+                self.assertAlmostEqual(
+                    in_place.betweenness[node], rebuilt.betweenness[node]
+                )
+        self.assertIsNone(results[0][0].g_copy)
+
+    def test_centrality_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            prefix = os.path.join(tmp, "net")
+            first = centrality_file(prefix, "json")
+            open(first, "w").close()
+            second = centrality_file(prefix, "json")
+            self.assertNotEqual(first, second)
+
+    def test_run(self):
+        """
+        Test that serial and parallel runs record every iteration of every run
+        """
+        runs = [(0, 10, 25), (2, 20, 50), (2, 10, 25)]
+        for processes, nested in [(1, False), (2, False), (1, True), (2, True)]:
+            with tempfile.TemporaryDirectory() as tmp:
+                simulation = Simulation(
+                    processes=processes,
+                    edge_array=not nested,
+                    top_k=5,
+                    nested=nested,
+                    out_dir=tmp,
+                )
+                simulation._run("test", self.g, self.base, runs, 3)
+
+                for method, percentage, _ in runs:
+                    prefix = f"{tmp}/test--{percentage}--method-{method}--"
+                    self.assertEqual(len(glob.glob(f"{prefix}*.json")), 3)
+                    (csv,) = glob.glob(f"{prefix}*[!5].csv")
+                    with open(csv) as f:
+                        rows = [line.split(",") for line in f]
+                    self.assertEqual(len(rows), 3)
+                    for row in rows:
+                        self.assertEqual(row[1:3], ["test", str(percentage)])
+                        self.assertEqual(len(row), 12)
+                        self.assertEqual(row[-1].strip(), str(method))
+                    self.assertEqual(len(glob.glob(f"{prefix}*--top5.csv")), 1)
+
+    def test_compact_run(self):
+        """
+        Test that runs on a compact graph record every iteration of every run
+        """
+        g = CompactGraph.from_networkx(self.g)
+        runs = [(0, 10, 25), (2, 20, 50)]
+        for nested in [False, True]:
+            with tempfile.TemporaryDirectory() as tmp:
+                simulation = Simulation(compact=True, nested=nested, out_dir=tmp)
+                simulation._run("test", g, self.base, runs, 2)
+
+                for method, percentage, _ in runs:
+                    prefix = f"{tmp}/test--{percentage}--method-{method}--"
+                    self.assertEqual(len(glob.glob(f"{prefix}*.json")), 2)
+                    (csv,) = glob.glob(f"{prefix}*.csv")
+                    with open(csv) as f:
+                        self.assertEqual(len(f.readlines()), 2)
+
+    def test_seeded_base(self):
+        """
+        Test that seeded generated networks and their base centralities are read from the cache
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            simulation = Simulation(
+                calc_options={"measures": ("degree",)},
+                cache_dir=os.path.join(tmp, "cache"),
+                out_dir=os.path.join(tmp, "out"),
+                network_seed=7,
+            )
+            g, base = simulation.base("ER-1000-0.1", "label")
+            self.assertEqual(len(glob.glob(f"{tmp}/cache/*.base.json")), 1)
+            cached, cached_base = simulation.base("ER-1000-0.1", "label")
+            self.assertTrue(nx.utils.graphs_equal(g, cached))
+            self.assertEqual(cached_base.degree, base.degree)
+            self.assertFalse(glob.glob(f"{tmp}/out/*basefor*"))
+
+            simulation.network_seed = 8
+            other, _ = simulation.base("ER-1000-0.1", "label")
+            self.assertFalse(nx.utils.graphs_equal(g, other))
+            self.assertEqual(len(glob.glob(f"{tmp}/cache/*.base.json")), 2)
+
+    def test_base_subgraph_tol(self):
+        """
+        Test that a stored base estimate of subgraph centrality is only reused for estimates
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            options = {
+                "calc_options": {"measures": ("subgraph",), "subgraph_tol": 1.0e-02},
+                "cache_dir": os.path.join(tmp, "cache"),
+                "out_dir": os.path.join(tmp, "out"),
+                "network_seed": 7,
+            }
+            _, base = Simulation(**options).base("ER-1000-0.1", "label")
+            self.assertLessEqual(base.subgraph_error["error"], 1.0e-02)
+
+            options["calc_options"] = {"measures": ("subgraph",)}
+            _, base = Simulation(**options).base("ER-1000-0.1", "label")
+            self.assertIsNone(base.subgraph_error)
+            self.assertEqual(base.provenance["subgraph"], {"backend": "networkx"})
+
+            # the exact values stand in for an estimate
+            options["calc_options"]["subgraph_tol"] = 1.0e-02
+            _, reused = Simulation(**options).base("ER-1000-0.1", "label")
+            self.assertIsNone(reused.subgraph_error)
+            self.assertEqual(reused.subgraph, base.subgraph)
+
+            # but other backends don't
+            options["calc_options"]["backends"] = ("scipy",)
+            _, scipy = Simulation(**options).base("ER-1000-0.1", "label")
+            self.assertEqual(scipy.provenance["subgraph"], {"backend": "scipy"})
+            options["calc_options"] = {"measures": ("subgraph",)}
+            _, base = Simulation(**options).base("ER-1000-0.1", "label")
+            self.assertEqual(base.provenance["subgraph"], {"backend": "networkx"})
+
+    def test_seeded_base_options(self):
+        """
+        Test that a cached base centrality is only reused with the options it was computed with
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            options = {
+                "cache_dir": os.path.join(tmp, "cache"),
+                "out_dir": os.path.join(tmp, "out"),
+                "network_seed": 7,
+            }
+
+            def base(**calc_options) -> Centralities:
+                calc_options["measures"] = ("pagerank",)
+                simulation = Simulation(calc_options=calc_options, **options)
+                return simulation.base("Barabasi-1000-50", "label")[1]
+
+            self.assertEqual(
+                base(sparse=True, tol=1.0e-03).provenance["pagerank"]["tol"], 1.0e-03
+            )
+            self.assertEqual(
+                base(sparse=True, tol=1.0e-08).provenance["pagerank"]["tol"], 1.0e-08
+            )
+            # a tighter tolerance stands in for a looser one
+            self.assertEqual(
+                base(sparse=True, tol=1.0e-03).provenance["pagerank"]["tol"], 1.0e-08
+            )
+            self.assertEqual(base().provenance["pagerank"], {"backend": "networkx"})
+
+    def test_measures(self):
+        """
+        Test that runs on a subset of the measures store NaN for the others
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            simulation = Simulation(
+                calc_options={"measures": ("degree", "closeness")}, out_dir=tmp
+            )
+            simulation._run("test", self.g, self.base, [(0, 10, 25)], 1)
+            (csv,) = glob.glob(f"{tmp}/test--10--method-0--*.csv")
+            with open(csv) as f:
+                row = f.readline().split(",")
+            self.assertEqual(len(row), 12)
+            values = dict(zip(MEASURES, map(float, row[3:11])))
+            for measure, value in values.items():
+                self.assertEqual(
+                    math.isnan(value), measure not in ("degree", "closeness"), measure
+                )
+            (json_file,) = glob.glob(f"{tmp}/test--10--method-0--*.json")
+            current = Centralities()
+            current.setup(json_file)
+            self.assertEqual(current.measures, ("degree", "closeness"))
+
+    def test_resume(self):
+        """
+        Test that a manifest skips completed iterations and seeded iterations are repeatable
+        """
+        runs = [(1, 10, 25), (1, 20, 50)]
+        with tempfile.TemporaryDirectory() as tmp:
+            file = os.path.join(tmp, "manifest.jsonl")
+
+            def rows() -> list[list[str]]:
+                result = []
+                for csv in sorted(glob.glob(f"{tmp}/*.csv")):
+                    with open(csv) as f:
+                        result += [line.split(",")[1:] for line in f]
+                return result
+
+            for nested in [False, True]:
+                simulation = Simulation(
+                    seed=7, manifest=Manifest(file), nested=nested, out_dir=tmp
+                )
+                simulation._run("test", self.g, self.base, runs, 2)
+                self.assertEqual(len(rows()), 4)
+                self.assertEqual(len(Manifest(file)), 4)
+                first = rows()
+
+                # drop the last completed iteration, as if the job was killed
+                with open(file) as f:
+                    lines = f.readlines()
+                with open(file, "w") as f:
+                    f.writelines(lines[:-1])
+                for csv in glob.glob(f"{tmp}/*--20--*.csv"):
+                    with open(csv) as f:
+                        kept = f.readlines()[:-1]
+                    with open(csv, "w") as f:
+                        f.writelines(kept)
+
+                simulation.manifest = Manifest(file)
+                simulation._run("test", self.g, self.base, runs, 2)
+                self.assertEqual(rows(), first)
+
+                for f in glob.glob(f"{tmp}/*"):
+                    os.remove(f)
+
+    def test_sqlite_sink(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            database = os.path.join(tmp, "results.sqlite")
+            sink = SqliteSink(database, batch_size=3)
+            simulation = Simulation(
+                sink=sink, manifest=Manifest(os.path.join(tmp, "m")), out_dir=tmp
+            )
+            simulation._run("test", self.g, self.base, [(0, 10, 25), (1, 10, 25)], 2)
+            sink.close()
+            self.assertEqual(len(query_results(database)), 4)
+            self.assertEqual(len(glob.glob(f"{tmp}/*.csv")), 0)
+            self.assertEqual(len(Manifest(os.path.join(tmp, "m"))), 4)
@@ -0,0 +1,66 @@
+import os
+import pstats
+import tempfile
+import unittest
+
+from src import spans
+from src.centrality import Centralities
+from src.networks import generate_barabasi
+from src.spans import Tracer, configure, read_spans, span
+
+
+class TestSpans(unittest.TestCase):
+    def test_nested_spans(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            file = os.path.join(tmp, "spans.jsonl")
+            tracer = Tracer(file, profile=["inner"], trace_memory=["outer"])
+            with tracer.span("outer", iteration=3) as outer:
+                with tracer.span("inner"):
+                    data = [0] * 100000
+                with tracer.span("inner"):
+                    pass
+            self.assertGreater(outer["seconds"], 0)
+
+            inner, _, outer = read_spans(file)
+            self.assertEqual(outer["iteration"], 3)
+            self.assertIsNone(outer["parent"])
+            self.assertEqual(inner["parent"], outer["id"])
+            self.assertEqual(inner["path"], "outer/inner")
+            self.assertGreaterEqual(outer["seconds"], inner["seconds"])
+            self.assertGreater(outer["peak_bytes"], 8 * len(data))
+            self.assertNotIn("peak_bytes", inner)
+            pstats.Stats(inner["profile"])
+            self.assertTrue(inner["profile"].endswith(f"--inner--{inner['id']}.prof"))
+
+    def test_nested_memory(self):
+        """
+        Test that traced nested spans keep the peak of the enclosing span
+        """
+        tracer = Tracer(trace_memory=["outer", "inner"])
+        with tracer.span("outer") as outer:
+            data = [0] * 1000000
+            del data
+            with tracer.span("inner") as inner:
+                pass
+        self.assertLess(inner["peak_bytes"], 8 * 1000000)
+        self.assertGreater(outer["peak_bytes"], 8 * 1000000)
+
+    def test_measure_spans(self):
+        """
+        Test that the calculation of centralities records a span per call
+        """
+        g = generate_barabasi(50, 2)
+        with tempfile.TemporaryDirectory() as tmp:
+            file = os.path.join(tmp, "spans.jsonl")
+            configure(file)
+            try:
+                with span("centralities"):
+                    Centralities().calc(g)
+            finally:
+                configure(None)
+            names = [record["path"] for record in read_spans(file)]
+        self.assertIn("centralities/degree", names)
+        self.assertIn("centralities/subgraph", names)
+        self.assertIn("centralities/betweenness+load+closeness+harmonic", names)
+        self.assertEqual(names[-1], "centralities")
+        self.assertIsNone(spans.TRACER.file)
@@ -0,0 +1,74 @@
+import unittest
+import networkx as nx
+
+from src.spectral import (
+    csr_adjacency,
+    eigenvector_arpack,
+    spectral_centralities,
+    spectrum_bound,
+    subgraph_lanczos,
+)
+from src.networks import generate_barabasi, generate_ws
+
+
+class TestSpectral(unittest.TestCase):
+    def assertSameCentrality(self, expected: dict, actual: dict, places: int):
+        self.assertEqual(list(expected.keys()), list(actual.keys()))
+        for node in expected:
+            self.assertAlmostEqual(expected[node], actual[node], places=places)
+
+    def test_spectral_centralities(self):
+        """
+        Test that the sparse backend reproduces the networkx measures
+        """
+        for g in [generate_barabasi(300, 5), generate_ws(300, 10, 0.1)]:
+            pagerank, eigenvector, _ = spectral_centralities(g)
+            self.assertSameCentrality(nx.pagerank(g), pagerank, 10)
+            self.assertSameCentrality(
+                nx.eigenvector_centrality(g, max_iter=1000), eigenvector, 10
+            )
+
+    def test_eigenvector_arpack(self):
+        """
+        Test the ARPACK eigenvector against the power iteration
+        """
+        g = generate_barabasi(300, 5)
+        expected = nx.eigenvector_centrality(g, max_iter=1000, tol=1.0e-10)
+        nodes, a = csr_adjacency(g)
+        actual = dict(zip(nodes, eigenvector_arpack(a, tol=1.0e-10)))
+        self.assertSameCentrality(expected, actual, 6)
+
+    def test_disconnected_graph(self):
+        """
+        Test that shrunk, disconnected graphs still give normalised vectors
+        """
+        g = nx.disjoint_union(nx.path_graph(50), nx.path_graph(50))
+        g.add_nodes_from(["isolated"])
+        pagerank, eigenvector, _ = spectral_centralities(g)
+        self.assertAlmostEqual(sum(pagerank.values()), 1.0)
+        self.assertAlmostEqual(sum(v * v for v in eigenvector.values()), 1.0)
+        self.assertTrue(all(v >= 0 for v in eigenvector.values()))
+
+    def test_subgraph_lanczos(self):
+        """
+        Test that the Lanczos estimate of subgraph centrality is within its error bound
+        """
+        g = generate_barabasi(300, 5)
+        g.add_edge(0, 0)
+        g.add_node("isolated")
+        expected = nx.subgraph_centrality(g)
+        for tol in [1.0e-04, 1.0e-08]:
+            actual, error = subgraph_lanczos(g, tol=tol, batch=64)
+            self.assertEqual(list(actual.keys()), list(expected.keys()))
+            self.assertLessEqual(error["error"], tol)
+            for node in g.nodes():
+                self.assertLessEqual(
+                    abs(actual[node] - expected[node]),
+                    (tol + 1.0e-12) * expected[node],
+                )
+        self.assertEqual(actual["isolated"], 1.0)
+
+        _, a = csr_adjacency(g)
+        self.assertGreaterEqual(
+            spectrum_bound(a), max(nx.adjacency_spectrum(g).real) - 1.0e-09
+        )